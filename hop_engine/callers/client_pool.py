@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import openai
+
+try:  # HTTP/2 需要可选依赖 h2
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _mask_key(api_key: str) -> str:
+    if not api_key:
+        return ""
+    return f"{api_key[:4]}***{api_key[-2:]}" if len(api_key) > 8 else "***"
+
+
+class _PooledClient:
+    """共享的 openai 客户端及其取用计数"""
+
+    def __init__(self, client: Any, http_client: Any, key: tuple):
+        self.client = client
+        self.http_client = http_client
+        self.key = key
+        self.created_at = time.time()
+        # 从池中取用的次数，LLM 与 AsyncLLM 均在每次请求时取用一次
+        self.lookups = 0
+
+
+class ClientPool:
+    """进程级 openai.Client 复用池
+
+    按 base_url/api_key 及连接池参数共享同一个长连接客户端，避免每次调用都重建
+    连接池、重复 TCP/TLS 握手。openai.Client 与底层 httpx.Client 均为线程安全。
+    """
+
+    _lock = threading.Lock()
+    _clients: Dict[tuple, _PooledClient] = {}
+    # 异步客户端的连接绑定在事件循环上，按事件循环分别缓存；
+    # 事件循环结束前需调用 aclose_async_clients 关闭连接，否则连接在循环销毁后泄漏
+    _async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    @staticmethod
+    def _make_key(
+        base_url: str,
+        api_key: str,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        http2: bool,
+    ) -> tuple:
+        return (
+            base_url,
+            api_key,
+            max_connections,
+            max_keepalive_connections,
+            keepalive_expiry,
+            http2 and HTTP2_AVAILABLE,
+        )
+
+    @staticmethod
+    def _make_limits(key: tuple) -> httpx.Limits:
+        _, _, max_connections, max_keepalive_connections, keepalive_expiry, _ = key
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+
+    @classmethod
+    def get_client(
+        cls,
+        base_url: str,
+        api_key: str,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+    ) -> openai.Client:
+        key = cls._make_key(
+            base_url,
+            api_key,
+            max_connections,
+            max_keepalive_connections,
+            keepalive_expiry,
+            http2,
+        )
+        with cls._lock:
+            pooled = cls._clients.get(key)
+            if pooled is None:
+                # DefaultHttpxClient 保留 SDK 默认的超时与重定向设置
+                http_client = openai.DefaultHttpxClient(
+                    limits=cls._make_limits(key), http2=key[-1]
+                )
+                client = openai.Client(
+                    base_url=base_url,
+                    api_key=api_key,
+                    http_client=http_client,
+                    # 重试统一由 LLM 的 RetryPolicy 控制，避免 SDK 内部重试叠加
+                    max_retries=0,
+                )
+                pooled = _PooledClient(client, http_client, key)
+                cls._clients[key] = pooled
+            pooled.lookups += 1
+        return pooled.client
+
+    @classmethod
+    def get_async_client(
+        cls,
+        base_url: str,
+        api_key: str,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+    ) -> openai.AsyncClient:
+        """获取当前事件循环下共享的 openai.AsyncClient，需在协程中调用"""
+        loop = asyncio.get_running_loop()
+        key = cls._make_key(
+            base_url,
+            api_key,
+            max_connections,
+            max_keepalive_connections,
+            keepalive_expiry,
+            http2,
+        )
+        with cls._lock:
+            loop_clients = cls._async_clients.setdefault(loop, {})
+            pooled = loop_clients.get(key)
+            if pooled is None:
+                http_client = openai.DefaultAsyncHttpxClient(
+                    limits=cls._make_limits(key), http2=key[-1]
+                )
+                client = openai.AsyncClient(
+                    base_url=base_url,
+                    api_key=api_key,
+                    http_client=http_client,
+                    max_retries=0,
+                )
+                pooled = _PooledClient(client, http_client, key)
+                loop_clients[key] = pooled
+            pooled.lookups += 1
+        return pooled.client
+
+    @classmethod
+    def _connection_stats(cls, http_client: Any) -> Tuple[int, int]:
+        """读取 httpcore 连接池中的连接数（总数, 空闲数），取不到时返回 (-1, -1)"""
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None)
+        if connections is None:
+            return -1, -1
+        connections = list(connections)
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return len(connections), idle
+
+    @classmethod
+    def get_stats(cls, base_url: str = None) -> List[Dict[str, Any]]:
+        """获取连接池统计，可按 base_url 过滤"""
+        with cls._lock:
+            pooled_clients = [(False, pooled) for pooled in cls._clients.values()]
+            for loop_clients in cls._async_clients.values():
+                pooled_clients.extend(
+                    (True, pooled) for pooled in loop_clients.values()
+                )
+        stats = []
+        for is_async, pooled in pooled_clients:
+            url, api_key, max_conn, max_keepalive, expiry, use_http2 = pooled.key
+            if base_url and url != base_url:
+                continue
+            total, idle = cls._connection_stats(pooled.http_client)
+            stats.append(
+                {
+                    "base_url": url,
+                    "api_key": _mask_key(api_key),
+                    "async": is_async,
+                    "http2": use_http2,
+                    "max_connections": max_conn,
+                    "max_keepalive_connections": max_keepalive,
+                    "keepalive_expiry": expiry,
+                    "lookups": pooled.lookups,
+                    "open_connections": total,
+                    "idle_connections": idle,
+                    "uptime": time.time() - pooled.created_at,
+                }
+            )
+        return stats
+
+    @classmethod
+    def close_all(cls):
+        """关闭并清空所有同步共享客户端，异步客户端通过 aclose_async_clients 关闭"""
+        with cls._lock:
+            pooled_clients = list(cls._clients.values())
+            cls._clients.clear()
+        for pooled in pooled_clients:
+            pooled.client.close()
+
+    @classmethod
+    async def aclose_async_clients(cls):
+        """关闭并清空当前事件循环下的异步共享客户端，需在事件循环结束前调用"""
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            loop_clients = cls._async_clients.pop(loop, {})
+        for pooled in loop_clients.values():
+            await pooled.client.close()
@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from hop_engine.callers.retry_policy import (
+    ERROR_CONNECTION,
+    ERROR_SERVER,
+    ERROR_TIMEOUT,
+)
+
+# 负载均衡策略
+LEAST_OUTSTANDING = "least_outstanding"
+LATENCY_WEIGHTED = "latency"
+
+# 熔断器状态
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 计入熔断的错误类型，限流与参数错误说明副本仍可响应，不计入
+BREAKER_ERRORS = {ERROR_CONNECTION, ERROR_SERVER, ERROR_TIMEOUT}
+
+
+class _Endpoint:
+    """单个副本端点的健康状态与统计"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.outstanding = 0
+        self.requests = 0
+        self.successes = 0
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.latency_ewma: Optional[float] = None
+        self.total_latency = 0.0
+
+    def available(self, now: float) -> bool:
+        # 熔断冷却结束后允许一个探测请求（half-open），探测期间不再分配
+        return self.state == CLOSED or (self.state == OPEN and now >= self.open_until)
+
+
+class EndpointPool:
+    """同一模型多副本端点的负载均衡与熔断
+
+    - least_outstanding：选择在途请求最少的副本，相同时取延迟较低者
+    - latency：按 延迟 EWMA x (在途请求数 + 1) 选择，尚无延迟数据的副本优先探测
+    连续失败达到阈值的副本被摘除，冷却后放行一个探测请求，成功则恢复。
+    """
+
+    # 延迟 EWMA 平滑系数
+    _EWMA_ALPHA = 0.2
+
+    _registry_lock = threading.Lock()
+    _registry: Dict[Tuple[Tuple[str, ...], str], "EndpointPool"] = {}
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        strategy: str = LEAST_OUTSTANDING,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ):
+        if strategy not in (LEAST_OUTSTANDING, LATENCY_WEIGHTED):
+            raise ValueError(f"Unsupported load balance strategy: {strategy}")
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._endpoints = {url: _Endpoint(url) for url in base_urls}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(
+        cls,
+        base_urls: List[str],
+        model: str,
+        strategy: str = LEAST_OUTSTANDING,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ) -> Optional["EndpointPool"]:
+        """按端点列表与模型获取进程内共享的实例，单端点时返回 None"""
+        if len(base_urls) <= 1:
+            return None
+        key = (tuple(base_urls), model)
+        with cls._registry_lock:
+            pool = cls._registry.get(key)
+            if pool is None:
+                pool = cls(base_urls, strategy, failure_threshold, cooldown)
+                cls._registry[key] = pool
+            return pool
+
+    @property
+    def urls(self) -> List[str]:
+        return list(self._endpoints)
+
+    def _score(self, endpoint: _Endpoint) -> Tuple[float, float]:
+        latency = endpoint.latency_ewma or 0.0
+        if self.strategy == LATENCY_WEIGHTED:
+            return latency * (endpoint.outstanding + 1), endpoint.outstanding
+        return endpoint.outstanding, latency
+
+    def has_available(self, exclude: Iterable[str] = ()) -> bool:
+        """除 exclude 外是否还有可用副本，用于判断能否故障转移"""
+        now = time.monotonic()
+        with self._lock:
+            return any(
+                endpoint.available(now)
+                for url, endpoint in self._endpoints.items()
+                if url not in exclude
+            )
+
+    def acquire(self, exclude: Iterable[str] = ()) -> str:
+        """选择一个副本并计入在途请求，优先避开 exclude 中本次调用已失败的副本"""
+        now = time.monotonic()
+        with self._lock:
+            endpoints = list(self._endpoints.values())
+            candidates = [
+                e for e in endpoints if e.url not in exclude and e.available(now)
+            ]
+            if not candidates:
+                candidates = [e for e in endpoints if e.available(now)]
+            if not candidates:
+                # 全部被摘除时选择最早恢复的副本，避免整体不可用
+                candidates = [min(endpoints, key=lambda e: e.open_until)]
+            endpoint = min(candidates, key=self._score)
+            if endpoint.state == OPEN:
+                endpoint.state = HALF_OPEN
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint.url
+
+    def release(
+        self,
+        url: str,
+        latency: Optional[float] = None,
+        error_class: Optional[str] = None,
+    ) -> None:
+        """请求结束：成功时传 latency，失败时传 error_class，两者都为空表示请求被取消"""
+        now = time.monotonic()
+        with self._lock:
+            endpoint = self._endpoints[url]
+            endpoint.outstanding -= 1
+            if latency is not None:
+                endpoint.successes += 1
+                endpoint.total_latency += latency
+                endpoint.latency_ewma = (
+                    latency
+                    if endpoint.latency_ewma is None
+                    else self._EWMA_ALPHA * latency
+                    + (1 - self._EWMA_ALPHA) * endpoint.latency_ewma
+                )
+                endpoint.consecutive_failures = 0
+                endpoint.state = CLOSED
+            elif error_class is not None:
+                endpoint.errors[error_class] += 1
+                if error_class not in BREAKER_ERRORS:
+                    endpoint.consecutive_failures = 0
+                    endpoint.state = CLOSED
+                    return
+                endpoint.consecutive_failures += 1
+                if (
+                    endpoint.state == HALF_OPEN
+                    or endpoint.consecutive_failures >= self.failure_threshold
+                ):
+                    endpoint.state = OPEN
+                    endpoint.open_until = now + self.cooldown
+                    endpoint.ejections += 1
+            elif endpoint.state == HALF_OPEN:
+                # 探测请求被取消，允许下一个请求重新探测
+                endpoint.state = OPEN
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "base_url": endpoint.url,
+                    "state": endpoint.state,
+                    "outstanding": endpoint.outstanding,
+                    "requests": endpoint.requests,
+                    "successes": endpoint.successes,
+                    "errors": dict(endpoint.errors),
+                    "consecutive_failures": endpoint.consecutive_failures,
+                    "ejections": endpoint.ejections,
+                    "latency_ewma": endpoint.latency_ewma,
+                    "avg_latency": (
+                        endpoint.total_latency / endpoint.successes
+                        if endpoint.successes
+                        else None
+                    ),
+                }
+                for endpoint in self._endpoints.values()
+            ]
@@ -0,0 +1,47 @@
+import threading
+from collections import deque
+from typing import Optional
+
+
+class HedgePolicy:
+    """对冲请求策略：请求耗时超过近期延迟的指定分位数仍未返回时，发出一个重复请求
+
+    延迟样本不足 min_samples 时不对冲，避免冷启动阶段误判。
+    分位数每新增 refresh_interval 个样本重算一次，delay() 只读取缓存值。
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        min_delay: float = 0.1,
+        window: int = 500,
+        refresh_interval: int = 20,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.refresh_interval = refresh_interval
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._since_refresh = 0
+        self._delay: Optional[float] = None
+
+    def record(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._since_refresh += 1
+            if len(self._latencies) < self.min_samples:
+                return
+            if self._delay is None or self._since_refresh >= self.refresh_interval:
+                self._delay = self._percentile()
+                self._since_refresh = 0
+
+    def _percentile(self) -> float:
+        latencies = sorted(self._latencies)
+        index = min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)
+        return max(latencies[index], self.min_delay)
+
+    def delay(self) -> Optional[float]:
+        """返回发出对冲请求前的等待秒数，样本不足时返回 None 表示不对冲"""
+        return self._delay
@@ -1,11 +1,29 @@
-from typing import Any, Dict, List
-from hop_engine.utils.utils import LoggerUtils
-import openai
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from hop_engine.callers.client_pool import ClientPool
+from hop_engine.callers.endpoint_pool import EndpointPool
+from hop_engine.callers.hedging import HedgePolicy
+from hop_engine.callers.rate_limiter import RateLimiter, estimate_tokens
+from hop_engine.callers.response_cache import (
+    ResponseCache,
+    make_cache_key,
+    pending_cache_writes,
+)
+from hop_engine.callers.retry_policy import RetryPolicy, classify_error
+from hop_engine.callers.single_flight import SingleFlight
+from hop_engine.config.constants import N_SAMPLING_ENGINES
+from hop_engine.utils.status_recorder import (
+    OperatorMetrics,
+    TokenUsageRecorder,
+)
+from hop_engine.utils.tracing import Tracer
+from hop_engine.utils.utils import LoggerUtils, get_json_schema
 
 logger = LoggerUtils.get_logger()
 
 
 class LLM:
+
     def __init__(
         self,
         model: str,
@@ -15,6 +33,20 @@ class LLM:
         timeout: int = 120,
         inference_engine: str = "vllm",
         max_retry_count: int = 1,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        supports_n: bool = False,
+        cache: Optional[ResponseCache] = None,
+        cache_sampled: bool = False,
+        single_flight: Optional[SingleFlight] = None,
+        rate_limiters: Optional[Dict[str, RateLimiter]] = None,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 30.0,
+        retry_deadline: Optional[float] = None,
+        endpoint_pool: Optional[EndpointPool] = None,
+        hedge: Optional[HedgePolicy] = None,
     ):
         self.model = model
         self.api_key = api_key
@@ -23,28 +55,135 @@ class LLM:
         self.max_retry_count = max_retry_count
         self.inference_engine = inference_engine
         self.system_prompt = system_prompt
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        # 是否通过 n 参数一次返回多个候选，需显式开启：
+        # 开启后核验采样由多次独立请求变为一次请求，随机种子与前缀缓存行为随之变化
+        self.supports_n = supports_n
+        if supports_n and inference_engine not in N_SAMPLING_ENGINES:
+            logger.warning(
+                f"推理引擎 {inference_engine} 不在已知支持 n 参数的引擎 {N_SAMPLING_ENGINES} 中，"
+                "多候选请求失败时会回退为逐次采样"
+            )
+        # 响应缓存，仅 temperature=0 的请求走缓存，除非显式开启 cache_sampled
+        self.cache = cache
+        self.cache_sampled = cache_sampled
+        # 在途请求合并，仅对 temperature=0 的确定性请求生效
+        self.single_flight = single_flight
+        # 按端点（base_url）的限流器，同一端点的所有 LLM 实例共享，
+        # 多副本时各副本分别限流，在选定端点后再获取许可
+        self.rate_limiters = rate_limiters or {}
+        # 仅可重试的错误（限流、超时、连接、5xx）按指数退避重试
+        self.retry_policy = RetryPolicy(
+            max_attempts=max_retry_count,
+            base_delay=retry_base_delay,
+            max_delay=retry_max_delay,
+            deadline=retry_deadline,
+        )
+        # 多副本端点的负载均衡与熔断，单端点时为 None，始终使用 base_url
+        self.endpoint_pool = endpoint_pool
+        # 对冲请求（可选），慢请求超过近期延迟分位数时向其他副本发出重复请求；
+        # 同步客户端无法中断落败的请求，仅 AsyncLLM 使用
+        self.hedge = hedge
 
-    def _create_client(self):
-        return openai.Client(
-            base_url=self.base_url,
+    def _create_client(self, base_url: Optional[str] = None):
+        # 复用进程级共享客户端，避免每次调用重建连接池；
+        # 与 AsyncLLM 一致，每次请求都从池中取用，不在实例上缓存
+        return ClientPool.get_client(
+            base_url=base_url or self.base_url,
             api_key=self.api_key,
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+            http2=self.http2,
         )
 
-    def _handle_error(self, e: Exception, attempt: int) -> str:
-        error_message = f"Attempt {attempt + 1}/{self.max_retry_count} failed: {str(e)}"
+    def get_pool_stats(self) -> List[Dict[str, Any]]:
+        """获取当前 base_url（多副本时为全部端点）对应的连接池统计"""
+        if self.endpoint_pool is None:
+            return ClientPool.get_stats(self.base_url)
+        return [
+            stats
+            for base_url in self.endpoint_pool.urls
+            for stats in ClientPool.get_stats(base_url)
+        ]
+
+    def get_endpoint_stats(self) -> List[Dict[str, Any]]:
+        """获取各副本端点的健康状态、延迟与错误统计"""
+        if self.endpoint_pool is None:
+            return []
+        return self.endpoint_pool.stats()
+
+    def _acquire_endpoint(self, tried: set) -> str:
+        if self.endpoint_pool is None:
+            return self.base_url
+        return self.endpoint_pool.acquire(exclude=tried)
+
+    def _release_endpoint(
+        self,
+        base_url: str,
+        began: float,
+        response: Any = None,
+        error: Optional[Exception] = None,
+    ):
+        if self.endpoint_pool is None:
+            return
+        if error is not None:
+            self.endpoint_pool.release(base_url, error_class=classify_error(error))
+        elif response is not None:
+            self.endpoint_pool.release(base_url, latency=time.monotonic() - began)
+        else:
+            self.endpoint_pool.release(base_url)
+
+    def _can_failover(self, tried: set) -> bool:
+        return self.endpoint_pool is not None and self.endpoint_pool.has_available(
+            tried
+        )
+
+    def _handle_error(
+        self, e: Exception, attempt: int, start: float, failover: bool = False
+    ) -> Tuple[str, Optional[float]]:
+        """记录失败并按错误分类决定是否重试，返回 (错误信息, 重试前等待秒数或 None)
+
+        failover 为 True 时下次重试换到其他副本，无需退避等待。
+        """
+        error_class = classify_error(e)
+        OperatorMetrics.add_metric(f"llm_errors_{error_class}")
+        error_message = f"Attempt {attempt + 1}/{self.max_retry_count} failed ({error_class}): {str(e)}"
         logger.error(error_message)
-        if attempt < self.max_retry_count - 1:
-            logger.info(f"Retrying... Attempt {attempt + 2}/{self.max_retry_count}")
-        return error_message
+        delay = self.retry_policy.next_delay(e, error_class, attempt, start)
+        if delay is not None and failover:
+            OperatorMetrics.add_metric(f"llm_retries_{error_class}")
+            OperatorMetrics.add_metric("llm_failovers")
+            logger.info(
+                f"Failing over to another endpoint... Attempt {attempt + 2}/{self.max_retry_count}"
+            )
+            return error_message, 0.0
+        if delay is not None:
+            OperatorMetrics.add_metric(f"llm_retries_{error_class}")
+            OperatorMetrics.add_metric("llm_retry_wait", delay)
+            logger.info(
+                f"Retrying in {delay:.2f}s... Attempt {attempt + 2}/{self.max_retry_count}"
+            )
+        return error_message, delay
 
-    def query_llm(
+    def _apply_deadline(self, params: Dict[str, Any], start: float):
+        """设置了整体截止时间时，单次请求超时不超过剩余时间"""
+        remaining = self.retry_policy.remaining(start)
+        if remaining is not None:
+            params["timeout"] = max(min(self.timeout, remaining), 1.0)
+
+    def _build_request(
         self,
         messages: List[Dict[str, str]],
         response_format: Any = None,
         temperature: float = 0,
         max_tokens: int = 1000,
-    ):
-        client = self._create_client()
+        n: int = 1,
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """按推理引擎构造请求参数，返回 (是否走 parse 接口, 请求参数)"""
         params = {
             "model": self.model,
             "messages": messages,
@@ -53,44 +192,263 @@ class LLM:
             "max_tokens": max_tokens,
             "extra_body": {"split_reasoning_content": True, "separate_reasoning": True},
         }
+        if n > 1:
+            params["n"] = n
+        if not response_format:
+            return False, params
+
+        json_schema = get_json_schema(response_format)
+        params["extra_body"]["guided_json"] = json_schema
+        if self.inference_engine == "aistudio-vllm":
+            params["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"schema": json_schema},
+            }
+        elif self.inference_engine in ["siliconflow"]:
+            params["response_format"] = {"type": "json_object"}
+        # bailian 不使用 json_object
+        elif self.inference_engine in ["bailian"]:
+            params["extra_body"]["enable_thinking"] = False
+        else:
+            params["response_format"] = response_format
+            return True, params
+        return False, params
+
+    @staticmethod
+    def _extract_contents(response: Any, use_parse: bool) -> List[str]:
+        if use_parse:
+            return [choice.message.parsed.json() for choice in response.choices]
+        # 深度推理模型 think
+        # if hasattr(response.choices[0].message, "reasoning_content"):
+        return [choice.message.content for choice in response.choices]
+
+    def query_llm(
+        self,
+        messages: List[Dict[str, str]],
+        response_format: Any = None,
+        temperature: float = 0,
+        max_tokens: int = 1000,
+    ):
+        with Tracer.span("llm.query", model=self.model) as span:
+            success, result = self._query(
+                messages, response_format, temperature, max_tokens
+            )
+            span.set_attribute("success", success)
+        if success:
+            return True, result[0]
+        return False, result
+
+    def query_llm_multi(
+        self,
+        messages: List[Dict[str, str]],
+        n: int,
+        response_format: Any = None,
+        temperature: float = 0,
+        max_tokens: int = 1000,
+    ):
+        """单次请求通过 n 参数返回多个候选，共享 prompt 的 prefill，需引擎支持 n"""
+        with Tracer.span("llm.query", model=self.model, n=n) as span:
+            success, result = self._query(
+                messages, response_format, temperature, max_tokens, n=n
+            )
+            span.set_attribute("success", success)
+        return success, result
+
+    def _request_key(
+        self,
+        messages: List[Dict[str, str]],
+        response_format: Any,
+        temperature: float,
+        max_tokens: int,
+        n: int,
+    ) -> Optional[str]:
+        """返回请求内容键，缓存与在途合并均未启用时返回 None"""
+        if self.cache is None and self.single_flight is None:
+            return None
+        json_schema = get_json_schema(response_format) if response_format else None
+        return make_cache_key(
+            self.model,
+            self.inference_engine,
+            messages,
+            json_schema,
+            temperature,
+            max_tokens,
+            n,
+        )
+
+    def _cache_key(
+        self, request_key: Optional[str], temperature: float
+    ) -> Optional[str]:
+        """返回缓存键，不走缓存时返回 None"""
+        if self.cache is None or request_key is None:
+            return None
+        if temperature > 0 and not self.cache_sampled:
+            OperatorMetrics.add_metric("llm_cache_bypass")
+            return None
+        return request_key
+
+    def _flight_key(
+        self, request_key: Optional[str], temperature: float
+    ) -> Optional[str]:
+        """返回在途合并键，采样请求各自独立，不做合并"""
+        if self.single_flight is None or temperature > 0:
+            return None
+        return request_key
+
+    def _cache_get(self, cache_key: Optional[str]) -> Optional[List[str]]:
+        if cache_key is None:
+            return None
+        cached = self.cache.get(cache_key)
+        OperatorMetrics.add_metric(
+            "llm_cache_hits" if cached is not None else "llm_cache_misses"
+        )
+        Tracer.set_attributes(cache_hit=cached is not None)
+        return cached
+
+    def _cache_put(self, cache_key: Optional[str], contents: List[str]):
+        if cache_key is None:
+            return
+        # 算子生成阶段的响应在核验通过后才写入缓存
+        pending = pending_cache_writes()
+        if pending is not None:
+            pending.add(self.cache, cache_key, contents)
+        else:
+            self.cache.put(cache_key, contents)
+
+    def _acquire_slot(self, base_url: str, messages: List[Dict[str, str]]) -> int:
+        """等待所选端点的限流许可，返回预估的 prompt token 数，用于响应后按实际用量修正"""
+        rate_limiter = self.rate_limiters.get(base_url)
+        if rate_limiter is None:
+            return 0
+        estimated_tokens = estimate_tokens(messages)
+        wait = rate_limiter.acquire(estimated_tokens)
+        OperatorMetrics.add_metric("llm_queue_wait", wait)
+        Tracer.set_attributes(queue_wait=wait)
+        return estimated_tokens
+
+    def _release_slot(self, base_url: str, estimated_tokens: int, response: Any = None):
+        rate_limiter = self.rate_limiters.get(base_url)
+        if rate_limiter is not None:
+            rate_limiter.release(estimated_tokens, getattr(response, "usage", None))
+
+    def _query(
+        self,
+        messages: List[Dict[str, str]],
+        response_format: Any = None,
+        temperature: float = 0,
+        max_tokens: int = 1000,
+        n: int = 1,
+    ) -> Tuple[bool, List[str]]:
+        request_key = self._request_key(
+            messages, response_format, temperature, max_tokens, n
+        )
+        cache_key = self._cache_key(request_key, temperature)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return True, cached
+
+        flight_key = self._flight_key(request_key, temperature)
+        if flight_key is None:
+            return self._query_upstream(
+                messages, response_format, temperature, max_tokens, n, cache_key
+            )
+        result, coalesced = self.single_flight.do(
+            flight_key,
+            lambda: self._query_upstream(
+                messages, response_format, temperature, max_tokens, n, cache_key
+            ),
+        )
+        if coalesced:
+            OperatorMetrics.add_metric("llm_coalesced")
+            Tracer.set_attributes(coalesced=True)
+        return result
+
+    def _query_upstream(
+        self,
+        messages: List[Dict[str, str]],
+        response_format: Any,
+        temperature: float,
+        max_tokens: int,
+        n: int,
+        cache_key: Optional[str],
+    ) -> Tuple[bool, List[str]]:
+        use_parse, params = self._build_request(
+            messages, response_format, temperature, max_tokens, n
+        )
         error_details = []
+        # 本次调用中已失败的副本，重试时优先换到其他副本
+        tried = set()
+        start = time.monotonic()
         for attempt in range(self.max_retry_count):
+            self._apply_deadline(params, start)
             try:
-                if response_format:
-                    json_schema = response_format.model_json_schema()
-                    params["extra_body"]["guided_json"] = json_schema
-                    if self.inference_engine == "aistudio-vllm":
-                        response = client.chat.completions.create(
-                            **params,
-                            response_format={
-                                "type": "json_schema",
-                                "json_schema": {"schema": json_schema},
-                            },
-                        )
-                    elif self.inference_engine in ["siliconflow"]:
-                        response = client.chat.completions.create(
-                            **params,
-                            response_format={"type": "json_object"},
-                        )
-                    # bailian 不使用 json_object
-                    elif self.inference_engine in ["bailian"]:
-                        params["extra_body"]["enable_thinking"] = False
-                        response = client.chat.completions.create(
-                            **params,
-                        )
-                    else:
-                        response = client.beta.chat.completions.parse(
-                            **params, response_format=response_format
-                        )
-                        return True, response.choices[0].message.parsed.json()
+                response = self._send(messages, params, use_parse, tried)
+                contents = self._extract_contents(response, use_parse)
+                self._cache_put(cache_key, contents)
+                return True, contents
+            except Exception as e:
+                error_message, delay = self._handle_error(
+                    e, attempt, start, failover=self._can_failover(tried)
+                )
+                error_details.append(error_message)
+            if delay is None:
+                break
+            with Tracer.span("llm.backoff", delay=delay):
+                time.sleep(delay)
+        return False, error_details
+
+    def _send(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        use_parse: bool,
+        tried: set,
+    ) -> Any:
+        base_url = self._acquire_endpoint(tried)
+        return self._send_once(messages, params, use_parse, base_url, tried)
+
+    def _send_once(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+        use_parse: bool,
+        base_url: str,
+        tried: set,
+    ) -> Any:
+        """向已选定的端点发送请求，结束时释放限流槽位与端点"""
+        with Tracer.span("llm.request", endpoint=base_url):
+            estimated_tokens = self._acquire_slot(base_url, messages)
+            client = self._create_client(base_url)
+            response = None
+            error = None
+            began = time.monotonic()
+            try:
+                if use_parse:
+                    response = client.beta.chat.completions.parse(**params)
                 else:
                     response = client.chat.completions.create(**params)
-
-                # 深度推理模型 think
-                # if hasattr(response.choices[0].message, "reasoning_content"):
-                return True, response.choices[0].message.content
+                self._record_usage(response, time.monotonic() - began)
+                return response
             except Exception as e:
-                error_message = self._handle_error(e, attempt)
-                if error_message:
-                    error_details.append(error_message)
-        return False, error_details
+                error = e
+                tried.add(base_url)
+                raise
+            finally:
+                self._release_slot(base_url, estimated_tokens, response)
+                self._release_endpoint(base_url, began, response, error)
+
+    @staticmethod
+    def _record_usage(response: Any, duration: float):
+        """将响应中的 token 用量记入 TokenUsageRecorder，cached_tokens 为服务端前缀缓存命中的 prompt token"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        TokenUsageRecorder.record_usage(usage, duration)
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        # token 数逐层汇总到 LLM 调用、核验、尝试与算子 span
+        Tracer.accumulate(
+            prompt_tokens=usage.prompt_tokens or 0,
+            completion_tokens=usage.completion_tokens or 0,
+            cached_tokens=cached_tokens or 0,
+        )
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """粗略估算 prompt token 数，中文约 1 字 1 token、英文约 4 字符 1 token，统一按 2 字符估算"""
+    chars = sum(len(str(message.get("content", ""))) for message in messages)
+    return chars // 2 + 1
+
+
+class TokenBucket:
+    """令牌桶，允许透支：预约后返回需等待的秒数，由调用方自行等待"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        # 默认允许 1 秒的突发量
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        """按实际消耗修正已预约的令牌，delta 为负时退还"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class RateLimiter:
+    """按模型端点的客户端限流：请求数/秒、token 数/秒两个令牌桶加最大并发
+
+    同一 (base_url, model) 在进程内共享一个实例，同步与异步调用共用同一配额。
+    """
+
+    # 异步等待并发槽位时的轮询间隔上限（秒）
+    _ASYNC_POLL_MAX = 0.05
+    # 等待超过该时长（秒）才计为一次被限流
+    _THROTTLE_THRESHOLD = 0.001
+
+    _registry_lock = threading.Lock()
+    _registry: Dict[Tuple[str, str], "RateLimiter"] = {}
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.request_bucket = (
+            TokenBucket(requests_per_second) if requests_per_second else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_second) if tokens_per_second else None
+        )
+        self.max_concurrency = max_concurrency
+        self._semaphore = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        )
+        self._lock = threading.Lock()
+        self._stats = {
+            "acquired": 0,
+            "throttled": 0,
+            "in_flight": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    @classmethod
+    def shared(
+        cls,
+        base_url: str,
+        model: str,
+        requests_per_second: Optional[float] = None,
+        tokens_per_second: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> Optional["RateLimiter"]:
+        """按端点获取进程内共享的限流器，首次创建时的配置生效；未配置任何限制时返回 None"""
+        if not (requests_per_second or tokens_per_second or max_concurrency):
+            return None
+        key = (base_url, model)
+        with cls._registry_lock:
+            limiter = cls._registry.get(key)
+            if limiter is None:
+                limiter = cls(requests_per_second, tokens_per_second, max_concurrency)
+                cls._registry[key] = limiter
+            return limiter
+
+    def _reserve(self, tokens: int) -> float:
+        wait = 0.0
+        if self.request_bucket is not None:
+            wait = self.request_bucket.reserve(1)
+        if self.token_bucket is not None:
+            wait = max(wait, self.token_bucket.reserve(tokens))
+        return wait
+
+    def _record_acquire(self, wait: float) -> None:
+        with self._lock:
+            self._stats["acquired"] += 1
+            self._stats["in_flight"] += 1
+            self._stats["total_wait"] += wait
+            if wait > self._THROTTLE_THRESHOLD:
+                self._stats["throttled"] += 1
+                self._stats["max_wait"] = max(self._stats["max_wait"], wait)
+
+    def acquire(self, tokens: int = 0) -> float:
+        """阻塞直到获得调用许可，返回排队等待的秒数"""
+        start = time.monotonic()
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        waited = time.monotonic() - start
+        self._record_acquire(waited)
+        return waited
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """异步版本，等待期间不阻塞事件循环"""
+        start = time.monotonic()
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if self._semaphore is not None:
+            # 与同步调用共用同一信号量，非阻塞尝试并指数退避轮询
+            poll = 0.001
+            while not self._semaphore.acquire(blocking=False):
+                await asyncio.sleep(poll)
+                poll = min(poll * 2, self._ASYNC_POLL_MAX)
+        waited = time.monotonic() - start
+        self._record_acquire(waited)
+        return waited
+
+    def release(self, estimated_tokens: int = 0, usage: Any = None) -> None:
+        """释放并发槽位，并按响应中的实际 token 用量修正 token 桶"""
+        if self._semaphore is not None:
+            self._semaphore.release()
+        with self._lock:
+            self._stats["in_flight"] -= 1
+        if self.token_bucket is not None and usage is not None:
+            total_tokens = getattr(usage, "total_tokens", None)
+            if total_tokens is not None:
+                self.token_bucket.adjust(total_tokens - estimated_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_wait"] = (
+            stats["total_wait"] / stats["acquired"] if stats["acquired"] else 0.0
+        )
+        return stats
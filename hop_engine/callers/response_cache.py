@@ -0,0 +1,272 @@
+import contextlib
+import contextvars
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def make_cache_key(
+    model: str,
+    inference_engine: str,
+    messages: List[Dict[str, str]],
+    json_schema: Optional[dict],
+    temperature: float,
+    max_tokens: int,
+    n: int = 1,
+) -> str:
+    """按请求内容生成内容寻址的缓存键"""
+    payload = json.dumps(
+        [model, inference_engine, messages, json_schema, temperature, max_tokens, n],
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LLM 响应缓存：内存 LRU 层 + 可选 SQLite 磁盘层
+
+    两层均支持 TTL 与条目数/字节数上限，超限时按最近最少使用淘汰。
+    磁盘层命中后会回填内存层。所有方法线程安全。
+    """
+
+    # 磁盘层每写入多少次检查一次容量与过期
+    _DISK_EVICT_INTERVAL = 64
+
+    _registry_lock = threading.Lock()
+    _registry: Dict[Optional[str], "ResponseCache"] = {}
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = None,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 100000,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        self.disk_max_bytes = disk_max_bytes
+
+        self._lock = threading.Lock()
+        # key -> (过期时间, 响应内容, 字节数)
+        self._memory: "OrderedDict[str, Tuple[float, List[str], int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_writes = 0
+        self._stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "puts": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+
+        self._disk = None
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._disk = sqlite3.connect(
+                disk_path, check_same_thread=False, isolation_level=None
+            )
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute("PRAGMA synchronous=NORMAL")
+            self._disk.execute("""CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expire_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )""")
+            self._disk.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)"
+            )
+
+    @classmethod
+    def shared(cls, disk_path: Optional[str] = None, **kwargs) -> "ResponseCache":
+        """按磁盘路径获取进程内共享的缓存实例，首次创建时使用 kwargs 配置"""
+        with cls._registry_lock:
+            cache = cls._registry.get(disk_path)
+            if cache is None:
+                cache = cls(disk_path=disk_path, **kwargs)
+                cls._registry[disk_path] = cache
+            return cache
+
+    def _expire_at(self, now: float) -> float:
+        return now + self.ttl if self.ttl else float("inf")
+
+    def get(self, key: str) -> Optional[List[str]]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expire_at, value, size = entry
+                if expire_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return value
+                self._memory.pop(key)
+                self._memory_bytes -= size
+                self._stats["expired"] += 1
+
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT value, expire_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value_json, expire_at = row
+                    if expire_at > now:
+                        self._disk.execute(
+                            "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                            (now, key),
+                        )
+                        value = json.loads(value_json)
+                        self._put_memory(key, value, len(value_json), expire_at)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._disk.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: List[str]) -> None:
+        now = time.time()
+        expire_at = self._expire_at(now)
+        value_json = json.dumps(value, ensure_ascii=False)
+        size = len(value_json)
+        with self._lock:
+            self._stats["puts"] += 1
+            self._put_memory(key, value, size, expire_at)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)",
+                    (key, value_json, size, expire_at, now),
+                )
+                self._disk_writes += 1
+                if self._disk_writes % self._DISK_EVICT_INTERVAL == 0:
+                    self._evict_disk(now)
+
+    def _put_memory(
+        self, key: str, value: List[str], size: int, expire_at: float
+    ) -> None:
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[2]
+        if size > self.max_bytes:
+            return
+        self._memory[key] = (expire_at, value, size)
+        self._memory_bytes += size
+        while self._memory and (
+            len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes
+        ):
+            _, (_, _, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._stats["evictions"] += 1
+
+    def _evict_disk(self, now: float) -> None:
+        """清理过期条目，并按最近访问时间淘汰超出容量的条目"""
+        cursor = self._disk.execute(
+            "DELETE FROM llm_cache WHERE expire_at <= ?", (now,)
+        )
+        self._stats["expired"] += max(cursor.rowcount, 0)
+        while True:
+            count, total_bytes = self._disk.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            if count <= self.disk_max_entries and total_bytes <= self.disk_max_bytes:
+                return
+            # 超出条目数时一次删到上限，仅超出字节数时分批淘汰
+            batch = max(count - self.disk_max_entries, self._DISK_EVICT_INTERVAL)
+            cursor = self._disk.execute(
+                """DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?
+                )""",
+                (batch,),
+            )
+            self._stats["evictions"] += max(cursor.rowcount, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self._disk is not None:
+                self._disk.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+            if self._disk is not None:
+                count, total_bytes = self._disk.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+                ).fetchone()
+                stats["disk_entries"] = count
+                stats["disk_bytes"] = total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+class PendingCacheWrites:
+    """延迟写入的缓存条目：答案核验通过后 commit 写入缓存，未通过时丢弃
+
+    避免核验失败的生成结果被缓存后，在重试及之后的相同请求中反复命中。
+    嵌套开启延迟写入时，内层 commit 并入外层，外层核验通过后才真正写入。
+    """
+
+    def __init__(self, parent: Optional["PendingCacheWrites"] = None):
+        self._lock = threading.Lock()
+        self._entries: List[Tuple[ResponseCache, str, List[str]]] = []
+        self._parent = parent
+
+    def add(self, cache: ResponseCache, key: str, value: List[str]) -> None:
+        with self._lock:
+            self._entries.append((cache, key, value))
+
+    def commit(self) -> None:
+        with self._lock:
+            entries, self._entries = self._entries, []
+        for cache, key, value in entries:
+            if self._parent is not None:
+                self._parent.add(cache, key, value)
+            else:
+                cache.put(key, value)
+
+    def discard(self) -> None:
+        with self._lock:
+            self._entries = []
+
+
+_pending_writes: contextvars.ContextVar = contextvars.ContextVar(
+    "pending_cache_writes", default=None
+)
+
+
+@contextlib.contextmanager
+def defer_cache_writes() -> Iterator[PendingCacheWrites]:
+    """with 块内发起的 LLM 调用不直接写入响应缓存，而是记录到返回的 PendingCacheWrites"""
+    pending = PendingCacheWrites(_pending_writes.get())
+    token = _pending_writes.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending_writes.reset(token)
+
+
+def pending_cache_writes() -> Optional[PendingCacheWrites]:
+    """当前上下文中延迟写入的缓存条目，未开启延迟写入时返回 None"""
+    return _pending_writes.get()
@@ -0,0 +1,99 @@
+import email.utils
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+import openai
+
+# 错误分类
+ERROR_RATE_LIMIT = "rate_limit"
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+ERROR_SERVER = "server"
+ERROR_FATAL = "fatal"
+
+RETRYABLE_ERRORS = {ERROR_RATE_LIMIT, ERROR_TIMEOUT, ERROR_CONNECTION, ERROR_SERVER}
+
+
+def classify_error(e: Exception) -> str:
+    """将调用异常归类，fatal 类错误（参数错误、鉴权失败、结构化解析失败等）重试无意义"""
+    if isinstance(e, openai.RateLimitError):
+        return ERROR_RATE_LIMIT
+    # APITimeoutError 是 APIConnectionError 的子类，需先判断
+    if isinstance(e, (openai.APITimeoutError, httpx.TimeoutException)):
+        return ERROR_TIMEOUT
+    if isinstance(e, (openai.APIConnectionError, httpx.TransportError)):
+        return ERROR_CONNECTION
+    if isinstance(e, openai.APIStatusError):
+        if e.status_code == 408:
+            return ERROR_TIMEOUT
+        if e.status_code == 429:
+            return ERROR_RATE_LIMIT
+        if e.status_code >= 500:
+            return ERROR_SERVER
+        return ERROR_FATAL
+    # 其余异常（结构化解析失败、输出被截断等）对相同请求重试无意义
+    return ERROR_FATAL
+
+
+def retry_after(e: Exception) -> Optional[float]:
+    """读取响应中的 Retry-After（秒数或 HTTP 日期）与 retry-after-ms，没有时返回 None"""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(float(retry_after_ms) / 1000, 0.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at - time.time(), 0.0)
+
+
+@dataclass
+class RetryPolicy:
+    """LLM 调用重试策略：错误分类 + 指数退避（full jitter）+ 整体截止时间"""
+
+    max_attempts: int = 3
+    base_delay: float = 0.5  # 首次重试的退避上限（秒），之后按 2 倍增长
+    max_delay: float = 30.0  # 单次退避上限（秒），Retry-After 不受此限制
+    deadline: Optional[float] = None  # 所有尝试的总时长上限（秒），为空时不限制
+
+    def backoff(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """第 attempt 次（从 0 开始）失败后的等待时长，服务端给出 Retry-After 时优先使用"""
+        server_delay = retry_after(error) if error is not None else None
+        if server_delay is not None:
+            return server_delay
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2**attempt)))
+
+    def remaining(self, start: float) -> Optional[float]:
+        """距截止时间的剩余秒数，未设置截止时间时返回 None"""
+        if self.deadline is None:
+            return None
+        return self.deadline - (time.monotonic() - start)
+
+    def next_delay(
+        self, error: Exception, error_class: str, attempt: int, start: float
+    ) -> Optional[float]:
+        """返回下次重试前的等待秒数，不应重试时返回 None"""
+        if error_class not in RETRYABLE_ERRORS or attempt >= self.max_attempts - 1:
+            return None
+        delay = self.backoff(attempt, error)
+        remaining = self.remaining(start)
+        if remaining is not None and delay >= remaining:
+            return None
+        return delay
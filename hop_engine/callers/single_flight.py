@@ -0,0 +1,89 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class _Call:
+    """一次在途的上游调用"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """在途请求合并：并发的相同请求只发起一次上游调用，所有等待者共享同一结果
+
+    只合并同时在途的请求，调用完成后立即移除，不承担缓存职责。
+    """
+
+    _registry_lock = threading.Lock()
+    _shared: Optional["SingleFlight"] = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        # 异步请求按事件循环区分，key 为 (事件循环id, 请求key)
+        self._async_calls: Dict[tuple, "asyncio.Task"] = {}
+        self._stats = {"leaders": 0, "coalesced": 0}
+
+    @classmethod
+    def shared(cls) -> "SingleFlight":
+        """进程内共享实例，所有 LLM 实例的相同请求都可合并"""
+        with cls._registry_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """执行 fn，若相同 key 已在途则等待其结果。返回 (结果, 是否被合并)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["leaders"] += 1
+                is_leader = True
+            else:
+                self._stats["coalesced"] += 1
+                is_leader = False
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def do_async(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """异步版本：上游调用在独立任务中执行，发起方被取消时不影响其他等待者"""
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            task = self._async_calls.get(loop_key)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self._async_calls[loop_key] = task
+                task.add_done_callback(lambda _: self._async_calls.pop(loop_key, None))
+                self._stats["leaders"] += 1
+                coalesced = False
+            else:
+                self._stats["coalesced"] += 1
+                coalesced = True
+        return await asyncio.shield(task), coalesced
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls) + len(self._async_calls)
+        return stats
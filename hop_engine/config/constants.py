@@ -48,6 +48,26 @@ SAFETY_TOKENS = [
     "[/INST]",
 ]
 
+# 重试模式：rebuild 将核验反馈拼入上下文后重建 prompt；
+# continue 保持原 messages 不变，追加上一轮回答与核验反馈作为新的对话轮次，便于服务端复用前缀缓存
+RETRY_REBUILD = "rebuild"
+RETRY_CONTINUE = "continue"
+RETRY_MODES = [RETRY_REBUILD, RETRY_CONTINUE]
+
+# prompt 布局：default 为原模板；prefix 按 指令 -> 上下文 -> schema -> 任务 排列，
+# 共享上下文的请求可复用服务端前缀缓存；prefix_system 在 prefix 基础上将静态指令拆分为 system 消息
+PROMPT_LAYOUT_DEFAULT = "default"
+PROMPT_LAYOUT_PREFIX = "prefix"
+PROMPT_LAYOUT_PREFIX_SYSTEM = "prefix_system"
+PROMPT_LAYOUTS = [
+    PROMPT_LAYOUT_DEFAULT,
+    PROMPT_LAYOUT_PREFIX,
+    PROMPT_LAYOUT_PREFIX_SYSTEM,
+]
+
+# 支持 n 参数（单次请求返回多个候选）的推理引擎
+N_SAMPLING_ENGINES = ["vllm", "aistudio-vllm", "sglang"]
+
 # 工具域定义 TODO: 先固定使用，后续可以根据用户配置来实现
 TOOL_DOMAINS = {
     "all": [
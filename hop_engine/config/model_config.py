@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from pydantic import BaseModel
 import yaml
 from pathlib import Path
@@ -8,15 +10,60 @@ class ModelConfig(BaseModel):
     inference_engine: str = "vllm"
     openai_api_key: str
     openai_base_url: str
+    # 同一模型的多个副本端点，为空时仅使用 openai_base_url
+    openai_base_urls: List[str] = []
+    load_balance: str = "least_outstanding"  # 负载均衡策略：least_outstanding / latency
+    endpoint_failure_threshold: int = 3  # 副本连续失败多少次后熔断摘除
+    endpoint_cooldown: float = 30.0  # 熔断后多少秒放行探测请求
+    # 对冲请求配置：请求耗时超过近期延迟的 hedge_percentile 分位数时发出重复请求，
+    # 仅异步算子生效（同步请求无法中断落败的一方）
+    hedge_enabled: bool = False
+    hedge_percentile: float = 95.0
+    hedge_min_samples: int = 20  # 延迟样本数不足时不对冲
+    hedge_min_delay: float = 0.1  # 发出对冲请求前的最短等待（秒）
     frequency_penalty: float = 0.0
     max_completion_tokens: int = 1000
     max_tokens: int = 5000
     n: int = 1
+    # 一致性核验是否通过 n 参数单次请求取回全部候选，需引擎支持 n，默认关闭
+    supports_n: bool = False
     stream: bool = False
     temperature: float = 0.1
     top_p: float = 1.0
     timeout: int = 120
     max_retry_count: int = 3
+    # 重试退避配置，仅限流、超时、连接错误与 5xx 会重试
+    retry_base_delay: float = (
+        0.5  # 首次重试的退避上限（秒），之后按 2 倍增长并加随机抖动
+    )
+    retry_max_delay: float = (
+        30.0  # 单次退避上限（秒），服务端返回 Retry-After 时以其为准
+    )
+    retry_deadline: Optional[float] = None  # 所有尝试的总时长上限（秒）
+    # 连接池配置
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    http2: bool = True
+    # 响应缓存配置，仅对 temperature=0 的请求生效（除非开启 cache_sampled），
+    # 默认 temperature 为 0.1，开启缓存时需同时将 temperature 设为 0
+    cache_enabled: bool = False
+    cache_path: Optional[str] = None  # SQLite 磁盘缓存路径，为空时仅使用内存缓存
+    cache_ttl: Optional[float] = None  # 缓存有效期（秒），为空时不过期
+    cache_max_entries: int = 10000
+    cache_max_bytes: int = 64 * 1024 * 1024
+    cache_sampled: bool = False  # temperature>0 的采样请求是否也走缓存
+    # 合并并发的相同请求，只发起一次上游调用；仅对 temperature=0 的请求生效，默认关闭
+    coalesce_requests: bool = False
+    # 端点级限流配置，同一 base_url + model 在进程内共享，均为空时不限流；
+    # 配置多个副本端点时为每个副本单独的容量，各副本分别限流
+    rate_limit_rps: Optional[float] = None  # 每秒请求数
+    rate_limit_tps: Optional[float] = None  # 每秒 token 数
+    max_concurrency: Optional[int] = None  # 最大并发请求数
+
+    @property
+    def endpoints(self) -> List[str]:
+        return self.openai_base_urls or [self.openai_base_url]
 
     @classmethod
     def from_yaml(cls, config_type: str, file_path: str = None):
@@ -39,8 +86,13 @@ class ModelConfig(BaseModel):
             with open(api_key_path, "r") as key_file:
                 openai_api_key = key_file.read().strip()
 
+            # base_url 可配置为列表，表示同一模型的多个副本端点
+            base_url = data["openai"]["base_url"]
+            base_urls = base_url if isinstance(base_url, list) else []
+
             return cls(
                 openai_api_key=openai_api_key,
-                openai_base_url=data["openai"]["base_url"],
+                openai_base_url=base_urls[0] if base_urls else base_url,
+                openai_base_urls=base_urls,
                 **data,
             )
@@ -1,9 +1,21 @@
 from inspect import signature
+import asyncio
 import json
-from typing import Any, Callable, Literal, Optional, Tuple, Type
+from typing import Any, Callable, Dict, Literal, Optional, Tuple, Type
 
+from hop_engine.callers.async_llm import AsyncLLM
 from hop_engine.callers.llm import LLM
-from hop_engine.config.constants import TOOL_DOMAINS
+from hop_engine.callers.endpoint_pool import EndpointPool
+from hop_engine.callers.hedging import HedgePolicy
+from hop_engine.callers.rate_limiter import RateLimiter
+from hop_engine.callers.response_cache import ResponseCache, defer_cache_writes
+from hop_engine.callers.single_flight import SingleFlight
+from hop_engine.config.constants import (
+    PROMPT_LAYOUTS,
+    RETRY_CONTINUE,
+    RETRY_MODES,
+    TOOL_DOMAINS,
+)
 from hop_engine.config.constants import HopStatus, JsonValue
 from hop_engine.config.model_config import ModelConfig
 from hop_engine.prompts.prompt_strategies import (
@@ -14,23 +26,39 @@ from hop_engine.prompts.prompt_strategies import (
 )
 from pydantic import BaseModel
 from qwen_agent.tools.base import TOOL_REGISTRY
-from hop_engine.utils.status_recorder import RetryContext, auto_record_status
+from hop_engine.utils.status_recorder import (
+    PHASE_VERIFICATION,
+    OperatorMetrics,
+    RetryContext,
+    TokenUsageRecorder,
+    auto_record_status,
+)
+from hop_engine.utils.tracing import Tracer
 from hop_engine.utils.utils import (
     LoggerUtils,
     create_response_format_model,
+    get_json_schema,
+    JSONPayloadError,
+    repair_json_parse,
     safe_json_parse,
+    sanitize_text,
+    sanitize_texts,
 )
 from hop_engine.validators.result_validators import (
     VerifyContext,
     forward_cross_verify,
+    resolve_async_verifier,
     reverse_verify,
     tool_use_verifier,
+    tool_use_verifier_async,
+    unwrap_verifier,
 )
 
 logger = LoggerUtils.get_logger()
 
 
 class HopProc:
+
     def __init__(
         self,
         run_model_config: Optional[ModelConfig] = None,
@@ -38,16 +66,28 @@ class HopProc:
         hop_retry: int = 3,
         system_prompt: str = "",
         debug: bool = False,
+        retry_mode: str = "rebuild",
+        prompt_layout: str = "default",
     ):
         if run_model_config is None:
             raise ValueError("run_model_config 不能为 None，请通过配置文件显式传递参数")
         if verify_model_config is None:
-            raise ValueError("verify_model_config 不能为 None，请通过配置文件显式传递参数")
+            raise ValueError(
+                "verify_model_config 不能为 None，请通过配置文件显式传递参数"
+            )
         self.run_model_config = run_model_config
         self.verify_model_config = verify_model_config
         self.system_prompt = system_prompt
         self.hop_retry = hop_retry
         self.debug = debug
+        if retry_mode not in RETRY_MODES:
+            raise ValueError(f"retry_mode 仅支持 {RETRY_MODES}，当前为 {retry_mode}")
+        self.retry_mode = retry_mode
+        if prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(
+                f"prompt_layout 仅支持 {PROMPT_LAYOUTS}，当前为 {prompt_layout}"
+            )
+        self.prompt_layout = prompt_layout
         self._init_models(run_model_config, verify_model_config)
         self.validators = {"reverse": reverse_verify, "cross": forward_cross_verify}
 
@@ -57,9 +97,12 @@ class HopProc:
 
         self.run_llm = self._create_llm(self.run_cfg)
         self.verify_llm = self._create_llm(self.verify_cfg)
+        # 异步算子使用的LLM，客户端在首次调用时按事件循环创建
+        self.async_run_llm = self._create_llm(self.run_cfg, llm_class=AsyncLLM)
+        self.async_verify_llm = self._create_llm(self.verify_cfg, llm_class=AsyncLLM)
 
-    def _create_llm(self, config: ModelConfig) -> LLM:
-        return LLM(
+    def _create_llm(self, config: ModelConfig, llm_class: Type[LLM] = LLM) -> LLM:
+        return llm_class(
             model=config.model,
             system_prompt=self.system_prompt,
             api_key=config.openai_api_key,
@@ -67,6 +110,70 @@ class HopProc:
             inference_engine=config.inference_engine,
             timeout=config.timeout,
             max_retry_count=config.max_retry_count,
+            retry_base_delay=config.retry_base_delay,
+            retry_max_delay=config.retry_max_delay,
+            retry_deadline=config.retry_deadline,
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+            http2=config.http2,
+            supports_n=config.supports_n,
+            cache=self._create_cache(config),
+            cache_sampled=config.cache_sampled,
+            single_flight=SingleFlight.shared() if config.coalesce_requests else None,
+            rate_limiters=self._create_rate_limiters(config),
+            endpoint_pool=EndpointPool.shared(
+                config.endpoints,
+                config.model,
+                strategy=config.load_balance,
+                failure_threshold=config.endpoint_failure_threshold,
+                cooldown=config.endpoint_cooldown,
+            ),
+            # 同步客户端无法中断落败的请求，只有异步 LLM 对冲
+            hedge=(
+                self._create_hedge(config) if issubclass(llm_class, AsyncLLM) else None
+            ),
+        )
+
+    def _create_rate_limiters(self, config: ModelConfig) -> Dict[str, RateLimiter]:
+        """每个副本端点一个限流器，限流配置为单个端点的容量"""
+        rate_limiters = {}
+        for base_url in config.endpoints:
+            rate_limiter = RateLimiter.shared(
+                base_url,
+                config.model,
+                requests_per_second=config.rate_limit_rps,
+                tokens_per_second=config.rate_limit_tps,
+                max_concurrency=config.max_concurrency,
+            )
+            if rate_limiter is not None:
+                rate_limiters[base_url] = rate_limiter
+        return rate_limiters
+
+    def _create_hedge(self, config: ModelConfig) -> Optional[HedgePolicy]:
+        if not config.hedge_enabled:
+            return None
+        # 延迟样本按 LLM 实例统计
+        return HedgePolicy(
+            percentile=config.hedge_percentile,
+            min_samples=config.hedge_min_samples,
+            min_delay=config.hedge_min_delay,
+        )
+
+    def _create_cache(self, config: ModelConfig) -> Optional[ResponseCache]:
+        if not config.cache_enabled:
+            return None
+        if config.temperature > 0 and not config.cache_sampled:
+            logger.warning(
+                f"模型 {config.model} 开启了 cache_enabled，但 temperature={config.temperature}，"
+                "响应缓存仅对 temperature=0 的请求生效；如需缓存采样请求请开启 cache_sampled"
+            )
+        # 同一缓存路径在进程内共享，缓存键包含模型名，不同模型互不影响
+        return ResponseCache.shared(
+            disk_path=config.cache_path,
+            max_entries=config.cache_max_entries,
+            max_bytes=config.cache_max_bytes,
+            ttl=config.cache_ttl,
         )
 
     def _create_response_model(
@@ -111,19 +218,12 @@ class HopProc:
         tool_domain: str = "",
         strategy_class: Type[PromptStrategy] = PromptStrategy,
         response_model: Optional[Type[BaseModel]] = None,
+        sanitize: bool = True,
     ) -> list:
-        """任务准备阶段：生成prompt messages"""
-        from hop_engine.config.constants import SAFETY_TOKENS
-
-        # 过滤越狱TOKEN
-        def sanitize_text(text: str) -> str:
-            for token in SAFETY_TOKENS:
-                text = text.replace(token, "")
-            return text
-
-        task = sanitize_text(task)
-        context = sanitize_text(context)
-        strategy = strategy_class()
+        """任务准备阶段：生成prompt messages，sanitize=False 表示调用方已过滤越狱TOKEN"""
+        if sanitize:
+            task, context = sanitize_texts([task, context])
+        strategy = strategy_class(self.prompt_layout)
         if strategy_class == ToolUsePromptStrategy:
             return strategy.create_prompt(
                 task=task,
@@ -135,7 +235,7 @@ class HopProc:
                 return strategy.create_prompt(
                     task=task,
                     context=context,
-                    return_format=response_model.model_json_schema(),
+                    return_format=get_json_schema(response_model),
                 )
             return strategy.create_prompt(task=task, context=context)
 
@@ -157,62 +257,303 @@ class HopProc:
         except Exception as e:
             raise RuntimeError(f"Execution Failed: {str(e)}")
 
-    def _verify_result(
+    async def _execute_core_async(
+        self, messages: list, response_model: Optional[Type[BaseModel]] = None
+    ) -> str:
+        """核心执行阶段（异步）：LLM交互"""
+        try:
+            success, response = await self.async_run_llm.query_llm(
+                messages,
+                response_format=response_model,
+                temperature=self.run_cfg.temperature,
+                max_tokens=self.run_cfg.max_tokens,
+            )
+            if not success:
+                raise ValueError(f"LLM API Error: {response}")
+            return str(response)
+
+        except Exception as e:
+            raise RuntimeError(f"Execution Failed: {str(e)}")
+
+    def _parse_answer(
         self,
-        verifier: Optional[Callable],
-        task: str,
-        context: str,
-        messages: list,
         answer: str,
         tool_domain: str,
         response_model: Optional[Type[BaseModel]] = None,
-    ) -> Tuple[HopStatus, str, str]:
-        """HOP验证阶段"""
-
+    ) -> Tuple[Optional[Tuple[HopStatus, str, str]], Any, str]:
+        """格式解析，返回 (失败结果或None, 处理后答案, 思考过程)"""
         # 工具类解析
         if tool_domain:
             has_action, func_name, func_args = self._detect_tool(answer)
             if not has_action:
-                return HopStatus.FAIL, f"解析失败: 未找到Action和Action Input", answer
+                return (
+                    (HopStatus.FAIL, f"解析失败: 未找到Action和Action Input", answer),
+                    None,
+                    "",
+                )
             if not func_name or not func_args:
-                return HopStatus.FAIL, f"解析失败: Action和Action Input为空", answer
+                return (
+                    (HopStatus.FAIL, f"解析失败: Action和Action Input为空", answer),
+                    None,
+                    "",
+                )
             processed_answer = {"action": func_name, "action_input": func_args}
-            processed_answer = json.dumps(processed_answer)
-            process = ""
+            return None, json.dumps(processed_answer), ""
         # 非工具场景解析
-        else:
-            # 格式核验
-            try:
-                if response_model:
-                    parsed_result = safe_json_parse(answer, response_model)
-                    processed_answer = (
-                        parsed_result.final_answer.json()
-                        if isinstance(parsed_result.final_answer, BaseModel)
-                        else parsed_result.final_answer
-                    )
-                    process = parsed_result.explanation
-                else:
-                    processed_answer = answer
-                    process = ""
-            except Exception as e:
-                return HopStatus.FAIL, f"解析失败: {str(e)}", ""
+        # 格式核验
+        try:
+            if response_model:
+                parsed_result = self._parse_structured(answer, response_model)
+                processed_answer = (
+                    parsed_result.final_answer.json()
+                    if isinstance(parsed_result.final_answer, BaseModel)
+                    else parsed_result.final_answer
+                )
+                return None, processed_answer, parsed_result.explanation
+            return None, answer, ""
+        except Exception as e:
+            return (HopStatus.FAIL, f"解析失败: {str(e)}", ""), None, ""
 
-        if verifier == None:
-            return HopStatus.OK, "", processed_answer
+    @staticmethod
+    def _parse_structured(answer: str, response_model: Type[BaseModel]) -> BaseModel:
+        """结构化解析，JSON 不合法时先尝试本地修复，修复仍失败才交给重试
 
-        verify_ctx = VerifyContext(
+        JSON 合法但不符合模型定义的校验失败不做修复，直接交给重试
+        """
+        try:
+            return safe_json_parse(answer, response_model)
+        except JSONPayloadError as e:
+            try:
+                parsed_result = repair_json_parse(answer, response_model)
+            except ValueError:
+                OperatorMetrics.add_metric("json_retried")
+                raise e
+            OperatorMetrics.add_metric("json_repaired")
+            return parsed_result
+
+    def _build_verify_ctx(
+        self,
+        process: str,
+        messages: list,
+        tool_domain: str,
+        response_model: Optional[Type[BaseModel]] = None,
+    ) -> VerifyContext:
+        return VerifyContext(
             think=process,
             messages=messages,
             tool_domain=tool_domain,
             response_format=response_model,
             verify_llm=self.verify_llm,
+            async_verify_llm=self.async_verify_llm,
+            prompt_layout=self.prompt_layout,
+        )
+
+    @staticmethod
+    def _verify_span(verifier: Callable):
+        """核验阶段 span，记录核验器名称"""
+        if not Tracer.enabled():
+            return Tracer.span("verify")
+        name = getattr(unwrap_verifier(verifier), "__name__", repr(verifier))
+        return Tracer.span("verify", verifier=name)
+
+    def _verify_result(
+        self,
+        verifier: Optional[Callable],
+        task: str,
+        context: str,
+        messages: list,
+        answer: str,
+        tool_domain: str,
+        response_model: Optional[Type[BaseModel]] = None,
+    ) -> Tuple[HopStatus, str, str]:
+        """HOP验证阶段"""
+        with Tracer.span("parse"):
+            failure, processed_answer, process = self._parse_answer(
+                answer, tool_domain, response_model
+            )
+        if failure:
+            return failure
+
+        if verifier == None:
+            return HopStatus.OK, "", processed_answer
+
+        verify_ctx = self._build_verify_ctx(
+            process, messages, tool_domain, response_model
         )
+        span = self._verify_span(verifier)
+        with TokenUsageRecorder.phase(PHASE_VERIFICATION), span:
+            verification_result = verifier(
+                task=task,
+                context=context,
+                model_result=processed_answer,
+                ctx=verify_ctx,
+            )
+            span.set_attribute("status", verification_result.status.name)
+        return verification_result.status, verification_result.reason, processed_answer
 
-        verification_result = verifier(
+    async def _verify_result_async(
+        self,
+        verifier: Optional[Callable],
+        task: str,
+        context: str,
+        messages: list,
+        answer: str,
+        tool_domain: str,
+        response_model: Optional[Type[BaseModel]] = None,
+    ) -> Tuple[HopStatus, str, str]:
+        """HOP验证阶段（异步）：内置核验器使用原生协程，自定义同步核验器放入线程执行"""
+        with Tracer.span("parse"):
+            failure, processed_answer, process = self._parse_answer(
+                answer, tool_domain, response_model
+            )
+        if failure:
+            return failure
+
+        if verifier == None:
+            return HopStatus.OK, "", processed_answer
+
+        verify_ctx = self._build_verify_ctx(
+            process, messages, tool_domain, response_model
+        )
+        verify_kwargs = dict(
             task=task, context=context, model_result=processed_answer, ctx=verify_ctx
         )
+        async_verifier = resolve_async_verifier(verifier)
+        span = self._verify_span(verifier)
+        with TokenUsageRecorder.phase(PHASE_VERIFICATION), span:
+            if async_verifier is not None:
+                verification_result = await async_verifier(**verify_kwargs)
+            else:
+                verification_result = await asyncio.to_thread(verifier, **verify_kwargs)
+            span.set_attribute("status", verification_result.status.name)
         return verification_result.status, verification_result.reason, processed_answer
 
+    def _check_task(
+        self,
+        strategy_class: Type[PromptStrategy],
+        tool_domain: str,
+        verifier: Optional[Callable],
+    ) -> Optional[Tuple[HopStatus, str, int]]:
+        """执行前检查，不合法时返回失败结果"""
+        if strategy_class == ToolUsePromptStrategy:
+            if tool_domain not in TOOL_DOMAINS:
+                return HopStatus.FAIL, f"工具域{tool_domain}不存在", 0
+            if verifier and unwrap_verifier(verifier) not in (
+                tool_use_verifier,
+                tool_use_verifier_async,
+            ):
+                return HopStatus.FAIL, f"工具验证器{verifier}必须是tool_use_verifier", 0
+        return None
+
+    def _build_attempt_messages(
+        self,
+        task: str,
+        original_context: str,
+        error_info: str,
+        tool_domain: str,
+        strategy_class: Type[PromptStrategy],
+        response_model: Optional[Type[BaseModel]] = None,
+    ) -> list:
+        """task 与 original_context 已在算子调用开始时过滤，这里只过滤核验反馈"""
+        current_context = original_context
+
+        if error_info:
+            current_context += (
+                f"\n核验反馈信息：{sanitize_text(error_info)} 请重新再执行一下哈\n"
+            )
+
+        # 动态生成任务messages
+        messages = self._prepare_task(
+            task,
+            current_context,
+            tool_domain,
+            strategy_class,
+            response_model,
+            sanitize=False,
+        )
+        if self.debug:
+            logger.info("========prompt========")
+            logger.info(messages)
+        return messages
+
+    def _next_attempt_messages(
+        self,
+        messages: Optional[list],
+        answer: str,
+        task: str,
+        original_context: str,
+        error_info: str,
+        tool_domain: str,
+        strategy_class: Type[PromptStrategy],
+        response_model: Optional[Type[BaseModel]] = None,
+    ) -> list:
+        """生成本轮 messages：continue 模式的重试在上一轮对话后追加回答与核验反馈"""
+        if self.retry_mode != RETRY_CONTINUE or messages is None:
+            return self._build_attempt_messages(
+                task,
+                original_context,
+                error_info,
+                tool_domain,
+                strategy_class,
+                response_model,
+            )
+        messages = messages + [
+            {"role": "assistant", "content": sanitize_text(answer)},
+            {
+                "role": "user",
+                "content": f"核验反馈信息：{sanitize_text(error_info)} 请重新再执行一下哈",
+            },
+        ]
+        if self.debug:
+            logger.info("========prompt========")
+            logger.info(messages)
+        return messages
+
+    def _track_prefix_reuse(self, attempt: int, usage_mark: int) -> None:
+        """continue 模式下统计重试节省的 prompt token
+
+        只计服务端在 usage 中返回的 cached_tokens；未返回时节省量未知，不做估计。
+        命中响应缓存或合并到相同请求的调用不产生 usage，不计入。
+        """
+        if self.retry_mode != RETRY_CONTINUE or attempt == 1:
+            return
+        cached_tokens = TokenUsageRecorder.reported_cached_tokens(usage_mark)
+        if cached_tokens:
+            OperatorMetrics.add_metric("retry_prompt_tokens_saved", cached_tokens)
+
+    def _settle_attempt(
+        self,
+        attempt: int,
+        status: HopStatus,
+        reason: str,
+        processed_answer: Any,
+        error_info: str,
+    ) -> Tuple[Optional[Tuple[HopStatus, Any]], Tuple[HopStatus, Any]]:
+        """根据单次核验结果决定是否结束，返回 (最终结果或None, 重试日志项)"""
+        is_last_attempt = attempt == self.hop_retry
+        if self.debug:
+            logger.info("========HOP核验结果========")
+        if status == HopStatus.OK:
+            logger.info(f"Attempt {attempt}/{self.hop_retry} OK")
+            return (status, processed_answer), (status, processed_answer)
+
+        elif is_last_attempt:
+            if status in (HopStatus.LACK_OF_INFO, HopStatus.UNCERTAIN):
+                logger.info(
+                    f"Attempt {attempt}/{self.hop_retry} not OK, retrying... Status:{status},Reason:{processed_answer}"
+                )
+                return (status, processed_answer), (status, processed_answer)
+            else:
+                logger.info(
+                    f"Attempt {attempt}/{self.hop_retry} failed, retrying... Status:{status},Reason:{error_info}"
+                )
+                return (HopStatus.FAIL, reason), (HopStatus.FAIL, reason)
+        else:
+            logger.info(
+                f"Attempt {attempt}/{self.hop_retry} failed, retrying... Status:{status},Reason:{reason}"
+            )
+            return None, (status, reason)
+
     def _execute_task(
         self,
         task: str,
@@ -223,76 +564,142 @@ class HopProc:
         verifier: Optional[Callable] = None,
     ) -> Tuple[HopStatus, Optional[Any], int]:  # 返回元组增加重试次数
         """整合执行流程，返回重试次数"""
+        invalid = self._check_task(strategy_class, tool_domain, verifier)
+        if invalid:
+            return invalid
 
-        if strategy_class == ToolUsePromptStrategy:
-            if tool_domain not in TOOL_DOMAINS:
-                return HopStatus.FAIL, f"工具域{tool_domain}不存在", 0
-            if verifier and verifier != tool_use_verifier:
-                return HopStatus.FAIL, f"工具验证器{verifier}必须是tool_use_verifier", 0
-
-        original_context = context  # 保存原始上下文避免污染
+        # 越狱TOKEN过滤每次算子调用只做一次，各次重试复用
+        prompt_task, original_context = sanitize_texts([task, context])
         error_info = ""
+        messages, answer = None, ""
         attempts = 0
 
         for attempt in range(1, self.hop_retry + 1):
             attempts = attempt  # 记录当前尝试次数
-            is_last_attempt = attempt == self.hop_retry
-            current_context = original_context
-
-            if error_info:
-                current_context += f"\n核验反馈信息：{error_info} 请重新再执行一下哈\n"
-
-            # 动态生成任务messages
-            messages = self._prepare_task(
-                task, current_context, tool_domain, strategy_class, response_model
-            )
-            if self.debug:
-                logger.info("========prompt========")
-                logger.info(messages)
-            # 执行核心流程
-            answer = self._execute_core(messages, response_model)
-            if self.debug:
-                logger.info("========llm返回答案========")
-                logger.info(answer)
-            # HOP验证结果
-            status, reason, processed_answer = self._verify_result(
-                verifier=verifier,
-                task=task,
-                context=context,
-                messages=messages,
-                answer=answer,
-                tool_domain=tool_domain,
-                response_model=response_model,
+            TokenUsageRecorder.set_attempt(attempt)
+            with Tracer.span("attempt", attempt=attempt) as attempt_span:
+                with Tracer.span("prompt"):
+                    messages = self._next_attempt_messages(
+                        messages,
+                        answer,
+                        prompt_task,
+                        original_context,
+                        error_info,
+                        tool_domain,
+                        strategy_class,
+                        response_model,
+                    )
+                usage_mark = TokenUsageRecorder.usage_mark()
+                # 执行核心流程，生成结果核验通过后才写入响应缓存
+                with Tracer.span("generation"), defer_cache_writes() as cache_writes:
+                    answer = self._execute_core(messages, response_model)
+                self._track_prefix_reuse(attempt, usage_mark)
+                if self.debug:
+                    logger.info("========llm返回答案========")
+                    logger.info(answer)
+                # HOP验证结果
+                status, reason, processed_answer = self._verify_result(
+                    verifier=verifier,
+                    task=task,
+                    context=context,
+                    messages=messages,
+                    answer=answer,
+                    tool_domain=tool_domain,
+                    response_model=response_model,
+                )
+                attempt_span.set_attribute("status", status.name)
+            if status == HopStatus.OK:
+                cache_writes.commit()
+            final, retry_log = self._settle_attempt(
+                attempt, status, reason, processed_answer, error_info
             )
-            if self.debug:
-                logger.info("========HOP核验结果========")
             # 记录重试每次日志
-            if status == HopStatus.OK:
-                RetryContext.log_retry_attempt(status, processed_answer)
-                logger.info(f"Attempt {attempt}/{self.hop_retry} OK")
-                return status, processed_answer, attempts - 1
-
-            elif is_last_attempt:
-                if status in (HopStatus.LACK_OF_INFO, HopStatus.UNCERTAIN):
-                    RetryContext.log_retry_attempt(status, processed_answer)
-                    logger.info(
-                        f"Attempt {attempt}/{self.hop_retry} not OK, retrying... Status:{status},Reason:{processed_answer}"
-                    )
-                    return status, processed_answer, attempts - 1
-                else:
-                    RetryContext.log_retry_attempt(HopStatus.FAIL, reason)
-                    logger.info(
-                        f"Attempt {attempt}/{self.hop_retry} failed, retrying... Status:{status},Reason:{error_info}"
+            RetryContext.log_retry_attempt(*retry_log)
+            if final:
+                return final[0], final[1], attempts - 1
+            error_info = reason
+        return HopStatus.FAIL, None, attempts - 1
+
+    async def _execute_task_async(
+        self,
+        task: str,
+        context: str,
+        strategy_class: Type[PromptStrategy],
+        response_model: Optional[Type[BaseModel]] = None,
+        tool_domain: str = "",
+        verifier: Optional[Callable] = None,
+    ) -> Tuple[HopStatus, Optional[Any], int]:
+        """整合执行流程（异步），返回重试次数
+
+        RetryContext 存储在 contextvars 中，同一线程上并发的协程各自记录重试日志。
+        """
+        invalid = self._check_task(strategy_class, tool_domain, verifier)
+        if invalid:
+            return invalid
+
+        # 越狱TOKEN过滤每次算子调用只做一次，各次重试复用
+        prompt_task, original_context = sanitize_texts([task, context])
+        error_info = ""
+        messages, answer = None, ""
+        attempts = 0
+
+        for attempt in range(1, self.hop_retry + 1):
+            attempts = attempt
+            TokenUsageRecorder.set_attempt(attempt)
+            with Tracer.span("attempt", attempt=attempt) as attempt_span:
+                with Tracer.span("prompt"):
+                    messages = self._next_attempt_messages(
+                        messages,
+                        answer,
+                        prompt_task,
+                        original_context,
+                        error_info,
+                        tool_domain,
+                        strategy_class,
+                        response_model,
                     )
-                    return HopStatus.FAIL, reason, attempts - 1
-            else:
-                error_info = reason
-                logger.info(
-                    f"Attempt {attempt}/{self.hop_retry} failed, retrying... Status:{status},Reason:{error_info}"
+                usage_mark = TokenUsageRecorder.usage_mark()
+                with Tracer.span("generation"), defer_cache_writes() as cache_writes:
+                    answer = await self._execute_core_async(messages, response_model)
+                self._track_prefix_reuse(attempt, usage_mark)
+                if self.debug:
+                    logger.info("========llm返回答案========")
+                    logger.info(answer)
+                status, reason, processed_answer = await self._verify_result_async(
+                    verifier=verifier,
+                    task=task,
+                    context=context,
+                    messages=messages,
+                    answer=answer,
+                    tool_domain=tool_domain,
+                    response_model=response_model,
                 )
-                RetryContext.log_retry_attempt(status, reason)
+                attempt_span.set_attribute("status", status.name)
+            if status == HopStatus.OK:
+                cache_writes.commit()
+            final, retry_log = self._settle_attempt(
+                attempt, status, reason, processed_answer, error_info
+            )
+            # 记录重试每次日志
+            RetryContext.log_retry_attempt(*retry_log)
+            if final:
+                return final[0], final[1], attempts - 1
+            error_info = reason
         return HopStatus.FAIL, None, attempts - 1
 
+    def _get_response_model(
+        self,
+        task_type: str,
+        return_format: JsonValue,
+        explanation_description: str = "",
+    ) -> Type[BaseModel]:
+        # 构建 Structured Outputs pydantic类
+        if explanation_description:
+            return self._create_response_model(
+                task_type, return_format, explanation_description
+            )
+        return self._create_response_model(task_type, return_format)
+
     @auto_record_status
     def hop_get(
         self,
@@ -304,13 +711,9 @@ class HopProc:
     ) -> Tuple[HopStatus, JsonValue]:
         """信息获取型任务"""
         if return_format:
-            # 构建 Structured Outputs pydantic类
-            if explanation_description:
-                response_model = self._create_response_model(
-                    "Get", return_format, explanation_description
-                )
-            else:
-                response_model = self._create_response_model("Get", return_format)
+            response_model = self._get_response_model(
+                "Get", return_format, explanation_description
+            )
         else:
             response_model = None
 
@@ -326,6 +729,34 @@ class HopProc:
         RetryContext.set_retry_count(attempts)
         return status, result
 
+    @auto_record_status
+    async def hop_get_async(
+        self,
+        task: str,
+        context: str = "",
+        return_format: JsonValue = None,
+        verifier: Optional[Callable] = reverse_verify,
+        explanation_description: str = "",
+    ) -> Tuple[HopStatus, JsonValue]:
+        """信息获取型任务（异步）"""
+        if return_format:
+            response_model = self._get_response_model(
+                "Get", return_format, explanation_description
+            )
+        else:
+            response_model = None
+
+        status, result, attempts = await self._execute_task_async(
+            task=task,
+            context=context,
+            strategy_class=HopGetPromptStrategy,
+            response_model=response_model,
+            verifier=verifier,
+        )
+        # 将重试次数存储在上下文
+        RetryContext.set_retry_count(attempts)
+        return status, result
+
     @auto_record_status
     def hop_judge(
         self,
@@ -338,13 +769,9 @@ class HopProc:
         """研判型任务"""
         if return_format is None:
             return_format = Literal[tuple(["True", "False", "Uncertain"])]
-        # 构建 Structured Outputs pydantic类
-        if explanation_description:
-            response_model = self._create_response_model(
-                "Judge", return_format, explanation_description
-            )
-        else:
-            response_model = self._create_response_model("Judge", return_format)
+        response_model = self._get_response_model(
+            "Judge", return_format, explanation_description
+        )
         status, result, attempts = self._execute_task(
             task=task,
             context=context,
@@ -357,6 +784,32 @@ class HopProc:
         RetryContext.set_retry_count(attempts)
         return status, result
 
+    @auto_record_status
+    async def hop_judge_async(
+        self,
+        task: str,
+        context: str = "",
+        return_format: JsonValue = None,
+        verifier: Optional[Callable] = reverse_verify,
+        explanation_description: str = "",
+    ) -> Tuple[HopStatus, JsonValue]:
+        """研判型任务（异步）"""
+        if return_format is None:
+            return_format = Literal[tuple(["True", "False", "Uncertain"])]
+        response_model = self._get_response_model(
+            "Judge", return_format, explanation_description
+        )
+        status, result, attempts = await self._execute_task_async(
+            task=task,
+            context=context,
+            strategy_class=HopJudgePromptStrategy,
+            response_model=response_model,
+            verifier=verifier,
+        )
+        # 将重试次数存储在上下文
+        RetryContext.set_retry_count(attempts)
+        return status, result
+
     @auto_record_status
     def hop_tool_use(
         self,
@@ -379,13 +832,48 @@ class HopProc:
         )
         RetryContext.set_retry_count(attempts)
         if status == HopStatus.OK:
-            processed_answer = json.loads(str(processed_answer))
-            action, action_input = (
-                processed_answer["action"],
-                processed_answer["action_input"],
-            )
-            tool = TOOL_REGISTRY[action]()
-            tool_result = tool.call(action_input)
+            tool, action_input = self._load_tool(processed_answer)
+            with Tracer.span("tool.call", tool=tool.name):
+                tool_result = tool.call(action_input)
+            return status, tool_result
+        else:
+            return status, processed_answer
+
+    @auto_record_status
+    async def hop_tool_use_async(
+        self,
+        task: str,
+        context: str = "",
+        tool_domain: str = "all",
+        verifier: Optional[Callable] = tool_use_verifier,
+    ) -> Tuple[HopStatus, JsonValue]:
+        """工具调用任务（异步），工具本身为同步实现，放入线程执行"""
+        if not tool_domain:
+            tool_domain = "all"
+
+        status, processed_answer, attempts = await self._execute_task_async(
+            task=task,
+            context=context,
+            strategy_class=ToolUsePromptStrategy,
+            response_model=None,
+            tool_domain=tool_domain,
+            verifier=verifier,
+        )
+        # 将重试次数存储在上下文
+        RetryContext.set_retry_count(attempts)
+        if status == HopStatus.OK:
+            tool, action_input = self._load_tool(processed_answer)
+            with Tracer.span("tool.call", tool=tool.name):
+                tool_result = await asyncio.to_thread(tool.call, action_input)
             return status, tool_result
         else:
             return status, processed_answer
+
+    @staticmethod
+    def _load_tool(processed_answer: Any):
+        processed_answer = json.loads(str(processed_answer))
+        action, action_input = (
+            processed_answer["action"],
+            processed_answer["action_input"],
+        )
+        return TOOL_REGISTRY[action](), action_input
@@ -1,12 +1,31 @@
 from qwen_agent.tools.base import BaseTool, register_tool, TOOL_REGISTRY
-from hop_engine.config.constants import TOOL_DOMAINS
+from hop_engine.config.constants import (
+    PROMPT_LAYOUT_DEFAULT,
+    PROMPT_LAYOUT_PREFIX_SYSTEM,
+    PROMPT_LAYOUTS,
+    TOOL_DOMAINS,
+)
 from hop_engine.prompts.hop import (
+    HOP_GET_INPUT,
+    HOP_GET_INSTRUCTION,
     HOP_GET_PROMPT,
+    HOP_JUDGE_INPUT,
+    HOP_JUDGE_INSTRUCTION,
     HOP_JUDGE_PROMPT,
+    HOP_TOOL_USE_INPUT,
+    HOP_TOOL_USE_INSTRUCTION,
     HOP_TOOL_USE_PROMPT,
+    HOP_REVERSE_VERIFIER_INPUT,
+    HOP_REVERSE_VERIFIER_INPUT_NO_PROCESS,
+    HOP_REVERSE_VERIFIER_INPUT_PROCESS,
+    HOP_REVERSE_VERIFIER_INSTRUCTION,
+    HOP_REVERSE_VERIFIER_INSTRUCTION_NO_PROCESS,
+    HOP_REVERSE_VERIFIER_INSTRUCTION_PROCESS,
     HOP_REVERSE_VERIFIER_PROMPT,
     HOP_REVERSE_VERIFIER_PROMPT_PROCESS,
     HOP_REVERSE_VERIFIER_PROMPT_NO_PROCESS,
+    HOP_TOOL_USE_VERIFIER_INPUT,
+    HOP_TOOL_USE_VERIFIER_INSTRUCTION,
     HOP_TOOL_USE_VERIFIER_PROMPT,
 )
 from hop_engine.prompts.verifier import (
@@ -17,31 +36,70 @@ from hop_engine.sec_tools import *
 
 # 定义 Prompt 策略基类
 class PromptStrategy:
+
+    def __init__(self, layout: str = PROMPT_LAYOUT_DEFAULT):
+        if layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"prompt_layout 仅支持 {PROMPT_LAYOUTS}，当前为 {layout}")
+        self.layout = layout
+
     def create_prompt(self, *args, **kwargs):
         raise NotImplementedError("子类必须实现 create_prompt 方法")
 
+    def render(self, template, instruction, user_input, **kwargs):
+        """按布局渲染：default 使用原模板，prefix 布局使用 指令 + 数据 的拆分模板"""
+        if self.layout == PROMPT_LAYOUT_DEFAULT:
+            return generate_user_prompt(template.format(**kwargs))
+        instruction = instruction.format(**kwargs)
+        user_input = user_input.format(**kwargs)
+        if self.layout == PROMPT_LAYOUT_PREFIX_SYSTEM:
+            return generate_system_prompt(instruction, user_input)
+        return generate_user_prompt(instruction + user_input)
+
 
 # 辅助函数，用于生成用户角色的提示列表
 def generate_user_prompt(prompt_content):
     return [{"role": "user", "content": prompt_content}]
 
 
+# 辅助函数，静态指令作为 system 消息，逐次调用的数据作为 user 消息
+def generate_system_prompt(instruction, prompt_content):
+    return [
+        {"role": "system", "content": instruction.strip()},
+        {"role": "user", "content": prompt_content.strip()},
+    ]
+
+
+# 辅助函数，生成工具选取的问题，prefix 布局下上下文在前、任务在后
+def generate_tool_query(task, context, layout):
+    if layout == PROMPT_LAYOUT_DEFAULT:
+        return "根据我的工具要求:{}，日志:{},帮我选取下工具".format(task, str(context))
+    return "日志:{}，根据我的工具要求:{},帮我选取下工具".format(str(context), task)
+
+
 # 定义 hop_get 的 Prompt 策略类
 class HopGetPromptStrategy(PromptStrategy):
     def create_prompt(self, task, context, return_format=""):
-        prompt = HOP_GET_PROMPT.format(
-            task=task, return_format=return_format, context=context
+        return self.render(
+            HOP_GET_PROMPT,
+            HOP_GET_INSTRUCTION,
+            HOP_GET_INPUT,
+            task=task,
+            return_format=return_format,
+            context=context,
         )
-        return generate_user_prompt(prompt)
 
 
 # 定义 hop_judge 的 Prompt 策略类
 class HopJudgePromptStrategy(PromptStrategy):
     def create_prompt(self, task, context, return_format=""):
-        prompt = HOP_JUDGE_PROMPT.format(
-            task=task, return_format=return_format, context=context
+        return self.render(
+            HOP_JUDGE_PROMPT,
+            HOP_JUDGE_INSTRUCTION,
+            HOP_JUDGE_INPUT,
+            task=task,
+            return_format=return_format,
+            context=context,
         )
-        return generate_user_prompt(prompt)
 
 
 # 定义 tool_use 的 Prompt 策略类
@@ -64,11 +122,14 @@ class ToolUsePromptStrategy(PromptStrategy):
                 + str(TOOL_REGISTRY[tool].parameters)
             )
 
-        query = "根据我的工具要求:{}，日志:{},帮我选取下工具".format(task, str(context))
-        prompt = HOP_TOOL_USE_PROMPT.format(
-            tool_descs=tool_descs, tool_names=tool_names, task=query
+        return self.render(
+            HOP_TOOL_USE_PROMPT,
+            HOP_TOOL_USE_INSTRUCTION,
+            HOP_TOOL_USE_INPUT,
+            tool_descs=tool_descs,
+            tool_names=tool_names,
+            task=generate_tool_query(task, context, self.layout),
         )
-        return generate_user_prompt(prompt)
 
 
 # 定义 verify 的 Prompt 策略类
@@ -76,33 +137,41 @@ class ToolUsePromptStrategy(PromptStrategy):
 
 class HopReverseVerifyStrategy(PromptStrategy):
     def create_prompt(self, task, context, conclusion, return_format=""):
-        prompt = HOP_REVERSE_VERIFIER_PROMPT.format(
+        return self.render(
+            HOP_REVERSE_VERIFIER_PROMPT,
+            HOP_REVERSE_VERIFIER_INSTRUCTION,
+            HOP_REVERSE_VERIFIER_INPUT,
             task=task,
             context=context,
             conclusion=conclusion,
             return_format=str(return_format),
         )
-        return generate_user_prompt(prompt)
 
 
 
 class HopReverseProcessVerifyStrategy(PromptStrategy):
     def create_prompt(self, context, think, conclusion, return_format=""):
-        prompt = HOP_REVERSE_VERIFIER_PROMPT_PROCESS.format(
+        return self.render(
+            HOP_REVERSE_VERIFIER_PROMPT_PROCESS,
+            HOP_REVERSE_VERIFIER_INSTRUCTION_PROCESS,
+            HOP_REVERSE_VERIFIER_INPUT_PROCESS,
             context=context,
             think=think,
             conclusion=conclusion,
             return_format=str(return_format),
         )
-        return generate_user_prompt(prompt)
 
 
 class HopReverseNoProcessVerifyStrategy(PromptStrategy):
     def create_prompt(self, context, think, conclusion, return_format=""):
-        prompt = HOP_REVERSE_VERIFIER_PROMPT_NO_PROCESS.format(
-            context=context, conclusion=conclusion, return_format=str(return_format)
+        return self.render(
+            HOP_REVERSE_VERIFIER_PROMPT_NO_PROCESS,
+            HOP_REVERSE_VERIFIER_INSTRUCTION_NO_PROCESS,
+            HOP_REVERSE_VERIFIER_INPUT_NO_PROCESS,
+            context=context,
+            conclusion=conclusion,
+            return_format=str(return_format),
         )
-        return generate_user_prompt(prompt)
 
 
 class HopForwardCrossVerifyStrategy(PromptStrategy):
@@ -129,11 +198,14 @@ class ToolUseVerifyPromptStrategy(PromptStrategy):
                 + str(TOOL_REGISTRY[tool].parameters)
             )
 
-        query = "根据我的工具要求:{}，日志:{},帮我选取下工具".format(task, str(context))
-        prompt = HOP_TOOL_USE_VERIFIER_PROMPT.format(
-            tool_descs=tool_descs, tool_names=tool_names, task=query
+        return self.render(
+            HOP_TOOL_USE_VERIFIER_PROMPT,
+            HOP_TOOL_USE_VERIFIER_INSTRUCTION,
+            HOP_TOOL_USE_VERIFIER_INPUT,
+            tool_descs=tool_descs,
+            tool_names=tool_names,
+            task=generate_tool_query(task, context, self.layout),
         )
-        return generate_user_prompt(prompt)
 
 
 # 定义 加法核验 的 Prompt 策略类
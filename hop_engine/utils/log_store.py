@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+
+class FunctionLogStore:
+    """函数执行日志的有界存储
+
+    内存中按条数与字节数上限保留最近的日志，超限时淘汰最早的日志（环形语义）；
+    配置落盘文件后，每批日志在写入时同时追加到 JSONL 文件（每批打开一次文件、写完即关闭），
+    可按函数名与时间范围查询。
+    所有方法线程安全。
+    """
+
+    # 新建实例的默认配置，通过 configure 修改
+    max_entries: int = 1000
+    max_bytes: int = 4 * 1024 * 1024
+    spill_path: Optional[str] = None
+
+    _spill_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        spill_path: Optional[str] = None,
+    ):
+        cls = type(self)
+        self.max_entries = cls.max_entries if max_entries is None else max_entries
+        self.max_bytes = cls.max_bytes if max_bytes is None else max_bytes
+        self.spill_path = spill_path or cls.spill_path
+        self._lock = threading.Lock()
+        # (时间戳, 函数名, 状态, 日志, 字节数)
+        self._entries: Deque[tuple] = deque()
+        self._bytes = 0
+        self._evicted = 0
+
+    @classmethod
+    def configure(
+        cls,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        spill_path: Optional[str] = None,
+    ) -> None:
+        """修改之后新建的日志存储的默认上限与落盘文件，spill_path 为空字符串时关闭落盘"""
+        if max_entries is not None:
+            cls.max_entries = max_entries
+        if max_bytes is not None:
+            cls.max_bytes = max_bytes
+        if spill_path is not None:
+            cls.spill_path = spill_path or None
+
+    def append(self, func_name: str, status: Any, log: str) -> None:
+        self.extend(func_name, [(status, log)])
+
+    def extend(self, func_name: str, logs: Iterable[Tuple[Any, str]]) -> None:
+        """批量写入同一函数的 (状态, 日志)，落盘时整批只打开一次文件"""
+        timestamp = time.time()
+        entries = [
+            (timestamp, func_name, str(status), log, len(log.encode("utf-8")))
+            for status, log in logs
+        ]
+        if not entries:
+            return
+        if self.spill_path:
+            self._spill(
+                self.spill_path,
+                [
+                    {"timestamp": ts, "function": name, "status": status, "log": log}
+                    for ts, name, status, log, _ in entries
+                ],
+            )
+        with self._lock:
+            for entry in entries:
+                self._entries.append(entry)
+                self._bytes += entry[4]
+            # 至少保留最新一条，单条超过字节上限时也可查询到
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._bytes -= self._entries.popleft()[4]
+                self._evicted += 1
+
+    def logs(self, func_name: str) -> List[str]:
+        """内存中保留的指定函数日志，按时间先后排列"""
+        with self._lock:
+            return [entry[3] for entry in self._entries if entry[1] == func_name]
+
+    def query(
+        self,
+        func_name: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """按函数名与时间范围 [start, end) 查询内存中的日志，limit 限制返回最近的条数"""
+        with self._lock:
+            entries = list(self._entries)
+        records = [
+            {"timestamp": ts, "function": name, "status": status, "log": log}
+            for ts, name, status, log, _ in entries
+            if _matches(name, ts, func_name, start, end)
+        ]
+        return records[-limit:] if limit else records
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evicted": self._evicted,
+            }
+
+    @classmethod
+    def _spill(cls, path: str, records: List[Dict[str, Any]]) -> None:
+        # 不长期持有文件句柄：每批以追加模式打开、写完关闭，进程退出或更换落盘路径时无需清理
+        lines = "".join(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        )
+        with cls._spill_lock:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as spill_file:
+                spill_file.write(lines)
+
+    @classmethod
+    def query_spill(
+        cls,
+        func_name: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+        path: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """按函数名与时间范围 [start, end) 查询落盘文件中的日志，path 默认为当前配置的落盘文件"""
+        path = path or cls.spill_path
+        if not path or not Path(path).exists():
+            return []
+        records: Deque[Dict[str, Any]] = deque(maxlen=limit or None)
+        with open(path, encoding="utf-8") as spill_file:
+            for line in spill_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 进程异常退出时最后一行可能不完整
+                    continue
+                if _matches(
+                    record.get("function"),
+                    record.get("timestamp", 0),
+                    func_name,
+                    start,
+                    end,
+                ):
+                    records.append(record)
+        return list(records)
+
+
+def _matches(
+    name: str,
+    timestamp: float,
+    func_name: Optional[str],
+    start: Optional[float],
+    end: Optional[float],
+) -> bool:
+    return (
+        (func_name is None or name == func_name)
+        and (start is None or timestamp >= start)
+        and (end is None or timestamp < end)
+    )
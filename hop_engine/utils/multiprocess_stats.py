@@ -0,0 +1,316 @@
+import atexit
+import contextlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:  # 仅 POSIX 提供，用于识别已退出进程的快照文件
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from hop_engine.utils.status_recorder import GLOBAL_STATS, ExecutionStats
+from hop_engine.utils.utils import LoggerUtils
+
+logger = LoggerUtils.get_logger()
+
+# ==============================
+# 多进程统计汇总
+# ==============================
+# 每个 worker 进程由后台线程定期将本进程汇总后的统计快照写入目录下独占的内存映射文件，
+# 记录统计的调用路径不变、不做任何跨进程通信；读取时合并目录下所有快照文件。
+# worker 退出后其快照文件保留，新 worker 启动时并入归档文件，重启不丢失累计计数。
+
+MULTIPROC_DIR_ENV = "HOP_STATS_MULTIPROC_DIR"
+
+_SUFFIX = ".hopstats"
+_PROCESS_PREFIX = "process_"
+_ARCHIVE_NAME = "archive" + _SUFFIX
+_LOCK_NAME = ".lock"
+
+# 文件头：序号（奇数表示写入中）与快照长度，之后为 JSON 快照
+_HEADER = struct.Struct("<QQ")
+_INITIAL_CAPACITY = 64 * 1024
+_READ_ATTEMPTS = 20
+_READ_RETRY_DELAY = 0.005
+
+
+class _SnapshotFile:
+    """单写者的内存映射快照文件，以序号锁（seqlock）保证读取方拿到完整快照"""
+
+    def __init__(self, path: str, capacity: int = _INITIAL_CAPACITY):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        os.ftruncate(self.fd, capacity)
+        self._mmap = mmap.mmap(self.fd, capacity)
+        self._sequence = 0
+
+    def write(self, payload: bytes) -> None:
+        size = _HEADER.size + len(payload)
+        if size > len(self._mmap):
+            # 扩容期间读取方映射的长度不足，会重新打开文件重试
+            capacity = max(size, 2 * len(self._mmap))
+            self._mmap.close()
+            os.ftruncate(self.fd, capacity)
+            self._mmap = mmap.mmap(self.fd, capacity)
+        self._sequence += 1
+        _HEADER.pack_into(self._mmap, 0, self._sequence, 0)
+        self._mmap[_HEADER.size : size] = payload
+        self._sequence += 1
+        _HEADER.pack_into(self._mmap, 0, self._sequence, len(payload))
+
+    def close(self) -> None:
+        self._mmap.close()
+        os.close(self.fd)
+
+
+def _read_snapshot(path: str) -> Optional[Dict[str, Any]]:
+    """读取快照文件，文件不存在、为空或多次重试仍在写入中时返回 None"""
+    for attempt in range(_READ_ATTEMPTS):
+        if attempt:
+            time.sleep(_READ_RETRY_DELAY)
+        try:
+            with open(path, "rb") as snapshot_file:
+                if os.fstat(snapshot_file.fileno()).st_size < _HEADER.size:
+                    return None
+                with mmap.mmap(
+                    snapshot_file.fileno(), 0, access=mmap.ACCESS_READ
+                ) as mapped:
+                    sequence, length = _HEADER.unpack_from(mapped, 0)
+                    if sequence == 0:
+                        return None
+                    if sequence % 2 or _HEADER.size + length > len(mapped):
+                        continue
+                    payload = mapped[_HEADER.size : _HEADER.size + length]
+                    if _HEADER.unpack_from(mapped, 0)[0] != sequence:
+                        continue
+        except FileNotFoundError:
+            # 归档时已并入归档文件并删除
+            return None
+        return json.loads(payload)
+    logger.warning(f"读取统计快照 {path} 失败：多次重试仍在写入中，本次跳过")
+    return None
+
+
+@contextlib.contextmanager
+def _directory_lock(directory: str, exclusive: bool) -> Iterator[None]:
+    """读取（共享）与归档（独占）互斥，避免同一进程的统计在归档前后被重复读取"""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(os.path.join(directory, _LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _snapshot_paths(directory: str) -> List[str]:
+    return sorted(str(path) for path in Path(directory).glob("*" + _SUFFIX))
+
+
+def aggregate_stats(directory: Optional[str] = None) -> ExecutionStats:
+    """合并目录下所有进程（含已退出进程与归档）的统计快照，返回只读用的 ExecutionStats
+
+    返回值可直接用于 get_operator_stats、get_function_stats 与 render_openmetrics；
+    directory 默认取环境变量 HOP_STATS_MULTIPROC_DIR。
+    """
+    directory = _resolve_directory(directory)
+    aggregated = ExecutionStats()
+    with _directory_lock(directory, exclusive=False):
+        for path in _snapshot_paths(directory):
+            snapshot = _read_snapshot(path)
+            if snapshot is not None:
+                aggregated.merge_snapshot(snapshot)
+    return aggregated
+
+
+def compact(directory: Optional[str] = None) -> int:
+    """将已退出进程的快照文件并入归档文件并删除，返回归档的文件数
+
+    写入进程在存活期间持有自身快照文件的文件锁，能取得文件锁即说明写入进程已退出；
+    不支持 fcntl 的平台上不做归档，已退出进程的快照文件保留并照常参与汇总。
+    """
+    directory = _resolve_directory(directory)
+    if fcntl is None:
+        return 0
+    with _directory_lock(directory, exclusive=True):
+        finished = []
+        try:
+            for path in Path(directory).glob(_PROCESS_PREFIX + "*" + _SUFFIX):
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os.close(fd)
+                    continue
+                finished.append((str(path), fd))
+            if not finished:
+                return 0
+
+            archive_path = os.path.join(directory, _ARCHIVE_NAME)
+            archive = ExecutionStats()
+            for path in [archive_path] + [path for path, _ in finished]:
+                snapshot = _read_snapshot(path)
+                if snapshot is not None:
+                    archive.merge_snapshot(snapshot)
+            # 先写临时文件再替换，读取方总能看到完整的归档
+            temp_path = f"{archive_path}.{os.getpid()}.tmp"
+            temp_file = _SnapshotFile(temp_path)
+            try:
+                temp_file.write(json.dumps(archive.snapshot()).encode("utf-8"))
+            finally:
+                temp_file.close()
+            os.replace(temp_path, archive_path)
+            for path, _ in finished:
+                os.unlink(path)
+            return len(finished)
+        finally:
+            for _, fd in finished:
+                os.close(fd)
+
+
+def _resolve_directory(directory: Optional[str]) -> str:
+    directory = directory or os.environ.get(MULTIPROC_DIR_ENV)
+    if not directory:
+        raise ValueError(
+            f"未指定多进程统计目录，请传入 directory 或设置环境变量 {MULTIPROC_DIR_ENV}"
+        )
+    return directory
+
+
+class MultiprocessStatsWriter:
+    """定期将本进程的执行统计写入目录下独占的快照文件
+
+    快照在后台线程中生成，写入间隔内的统计在下一次写入或进程正常退出时可见；
+    进程被强制终止时丢失最后一个间隔内的统计。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        stats: ExecutionStats = GLOBAL_STATS,
+        flush_interval: float = 1.0,
+    ):
+        self.directory = directory
+        self.stats = stats
+        self.flush_interval = flush_interval
+        self._file: Optional[_SnapshotFile] = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._file.path if self._file else None
+
+    def start(self) -> "MultiprocessStatsWriter":
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        # pid 可能被复用，文件名附加随机后缀
+        path = os.path.join(
+            self.directory,
+            f"{_PROCESS_PREFIX}{os.getpid()}_{uuid.uuid4().hex[:8]}{_SUFFIX}",
+        )
+        # 在目录锁内创建并锁定，避免新文件在加锁前被其他进程当作已退出进程归档
+        with _directory_lock(self.directory, exclusive=False):
+            self._file = _SnapshotFile(path)
+            if fcntl is not None:
+                fcntl.flock(self._file.fd, fcntl.LOCK_EX)
+        self.flush()
+        # 自身快照文件已创建并加锁后再归档，归档时取不到它的文件锁，不会被当作已退出进程
+        compact(self.directory)
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="hop-stats-writer", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"写入统计快照失败: {e}")
+
+    def flush(self) -> None:
+        """立即写入一次快照"""
+        payload = json.dumps(self.stats.snapshot()).encode("utf-8")
+        with self._lock:
+            if self._file is not None:
+                self._file.write(payload)
+
+    def stop(self) -> None:
+        """写入最后一次快照并停止后台线程，快照文件保留，由之后启动的进程归档"""
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _restart_in_child(self) -> None:
+        """fork 后在子进程中调用：清零继承的统计，改为写入子进程自己的快照文件
+
+        flock 锁属于打开的文件描述（open file description），fork 出的描述符与父进程共享同一把锁：
+        子进程不能对其调用 LOCK_UN，否则会一并释放父进程的锁，使父进程存活期间的快照被当作
+        已退出进程归档；只关闭描述符时，锁在父进程仍持有该描述时保持不变。
+        """
+        if self._file is not None:
+            self._file._mmap.close()
+            os.close(self._file.fd)
+            self._file = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.stats.reset_after_fork()
+        self.start()
+
+
+_writer: Optional[MultiprocessStatsWriter] = None
+
+
+def enable_multiprocess(
+    directory: Optional[str] = None,
+    stats: ExecutionStats = GLOBAL_STATS,
+    flush_interval: float = 1.0,
+) -> MultiprocessStatsWriter:
+    """开启多进程统计：本进程的统计定期写入 directory（默认取环境变量 HOP_STATS_MULTIPROC_DIR）
+
+    在 gunicorn 等预派生模型中可在主进程或 worker 中调用；主进程中开启后，
+    fork 出的子进程自动清零继承的统计并写入各自的快照文件。重复调用返回已开启的写入器。
+    """
+    global _writer
+    if _writer is not None:
+        return _writer
+    _writer = MultiprocessStatsWriter(
+        _resolve_directory(directory), stats, flush_interval
+    ).start()
+    return _writer
+
+
+def disable_multiprocess() -> None:
+    global _writer
+    writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+
+
+def _after_fork_in_child() -> None:
+    if _writer is not None:
+        _writer._restart_in_child()
+
+
+atexit.register(disable_multiprocess)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,259 @@
+import threading
+from functools import lru_cache, partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+
+from hop_engine.utils.multiprocess_stats import aggregate_stats
+from hop_engine.utils.quantile_sketch import QuantileSketch
+from hop_engine.utils.status_recorder import GLOBAL_STATS, ExecutionStats
+
+# ==============================
+# OpenMetrics / Prometheus 文本格式导出
+# ==============================
+# 直接读取汇总后的计数与分位数草图生成文本，不经过 get_operator_stats 的逐项格式化；
+# 耗时直方图的桶计数由草图估计，相对误差与草图精度一致，_count 与 _sum 为精确值。
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 耗时直方图的默认桶上界（秒）
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# token 用量字段与导出的 type 标签
+_TOKEN_TYPES = (
+    ("prompt_tokens", "prompt"),
+    ("completion_tokens", "completion"),
+    ("reasoning_tokens", "reasoning"),
+    ("cached_tokens", "cached"),
+)
+
+_OUTCOMES = (("success", "success"), ("uncertain", "uncertain"), ("errors", "error"))
+
+
+@lru_cache(maxsize=4096)
+def _label_value(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _family(
+    lines: List[str],
+    name: str,
+    metric_type: str,
+    help_text: str,
+    unit: str = "",
+    openmetrics: bool = True,
+) -> None:
+    """写入指标族元数据：OpenMetrics 的 counter 族名不含 _total 后缀，Prometheus 文本格式含后缀且没有 UNIT"""
+    if metric_type == "counter" and not openmetrics:
+        name = f"{name}_total"
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+    if unit and openmetrics:
+        lines.append(f"# UNIT {name} {unit}")
+
+
+def _histogram(
+    lines: List[str],
+    name: str,
+    labels: str,
+    sketch: QuantileSketch,
+    buckets: Sequence[float],
+    bucket_labels: Sequence[str],
+) -> None:
+    for le, count in zip(bucket_labels, sketch.cumulative_counts(buckets)):
+        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {sketch.count}')
+    lines.append(f"{name}_count{{{labels}}} {sketch.count}")
+    lines.append(f"{name}_sum{{{labels}}} {_number(sketch.sum)}")
+
+
+def _render(
+    operator_stats: Dict,
+    function_stats: Dict,
+    prefix: str,
+    buckets: Sequence[float],
+    openmetrics: bool,
+) -> str:
+    bucket_labels = [repr(float(bound)) for bound in buckets]
+    operators = [
+        (_label_value(name), stats)
+        for name, stats in sorted(operator_stats.items())
+        if stats["calls"]
+    ]
+    functions = [
+        (_label_value(name), stats)
+        for name, stats in sorted(function_stats.items())
+        if stats["calls"]
+    ]
+    lines: List[str] = []
+    family = partial(_family, lines, openmetrics=openmetrics)
+
+    name = f"{prefix}_operator_calls"
+    family(name, "counter", "算子调用次数，按结果（success/uncertain/error）分类")
+    for operator, stats in operators:
+        for field, outcome in _OUTCOMES:
+            lines.append(
+                f'{name}_total{{operator="{operator}",outcome="{outcome}"}} {stats[field]}'
+            )
+
+    name = f"{prefix}_operator_duration_seconds"
+    family(name, "histogram", "算子调用耗时", "seconds")
+    for operator, stats in operators:
+        _histogram(
+            lines,
+            name,
+            f'operator="{operator}"',
+            stats["time_sketch"],
+            buckets,
+            bucket_labels,
+        )
+
+    name = f"{prefix}_operator_retries"
+    family(name, "counter", "算子核验失败后的重试次数")
+    for operator, stats in operators:
+        lines.append(f'{name}_total{{operator="{operator}"}} {stats["total_retries"]}')
+
+    name = f"{prefix}_operator_llm_calls"
+    family(
+        name, "counter", "算子内的 LLM 调用次数，按阶段（generation/verification）分类"
+    )
+    for operator, stats in operators:
+        for phase, usage in sorted(stats["token_usage"].items()):
+            lines.append(
+                f'{name}_total{{operator="{operator}",phase="{phase}"}} '
+                f'{_number(usage.get("llm_calls", 0))}'
+            )
+
+    name = f"{prefix}_operator_llm_seconds"
+    family(name, "counter", "算子内 LLM 调用耗时合计，按阶段分类", "seconds")
+    for operator, stats in operators:
+        for phase, usage in sorted(stats["token_usage"].items()):
+            lines.append(
+                f'{name}_total{{operator="{operator}",phase="{phase}"}} '
+                f'{_number(usage.get("llm_time", 0))}'
+            )
+
+    name = f"{prefix}_operator_tokens"
+    family(
+        name,
+        "counter",
+        "算子内 LLM 调用的 token 用量，按阶段与类型（prompt/completion/reasoning/cached）分类",
+    )
+    for operator, stats in operators:
+        for phase, usage in sorted(stats["token_usage"].items()):
+            for field, token_type in _TOKEN_TYPES:
+                lines.append(
+                    f'{name}_total{{operator="{operator}",phase="{phase}",type="{token_type}"}} '
+                    f"{_number(usage.get(field, 0))}"
+                )
+
+    name = f"{prefix}_operator_metric"
+    family(name, "counter", "算子内部指标累计值（缓存命中、JSON 修复、限流等待等）")
+    for operator, stats in operators:
+        for metric, value in sorted(stats["metrics"].items()):
+            lines.append(
+                f'{name}_total{{operator="{operator}",metric="{_label_value(metric)}"}} '
+                f"{_number(value)}"
+            )
+
+    name = f"{prefix}_function_calls"
+    family(name, "counter", "业务函数调用次数，按结果分类")
+    for function, stats in functions:
+        for field, outcome in _OUTCOMES:
+            lines.append(
+                f'{name}_total{{function="{function}",outcome="{outcome}"}} {stats[field]}'
+            )
+
+    name = f"{prefix}_function_duration_seconds"
+    family(name, "histogram", "业务函数调用耗时", "seconds")
+    for function, stats in functions:
+        _histogram(
+            lines,
+            name,
+            f'function="{function}"',
+            stats["time_sketch"],
+            buckets,
+            bucket_labels,
+        )
+
+    if openmetrics:
+        lines.append("# EOF")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def render_openmetrics(
+    stats: Optional[ExecutionStats] = None,
+    prefix: str = "hop",
+    buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    openmetrics: bool = True,
+) -> str:
+    """将执行统计渲染为 OpenMetrics 文本
+
+    stats 默认为 GLOBAL_STATS，buckets 为升序的直方图桶上界（秒），
+    openmetrics=False 时输出 Prometheus 文本格式（0.0.4）。
+    """
+    if stats is None:
+        stats = GLOBAL_STATS
+    return stats.read_raw_stats(
+        lambda operator_stats, function_stats: _render(
+            operator_stats, function_stats, prefix, buckets, openmetrics
+        )
+    )
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        server = self.server
+        openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+        stats = server.stats
+        if server.multiprocess_dir:
+            stats = aggregate_stats(server.multiprocess_dir)
+        body = render_openmetrics(
+            stats, server.prefix, server.buckets, openmetrics
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header(
+            "Content-Type",
+            OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE,
+        )
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(
+    port: int = 9464,
+    host: str = "127.0.0.1",
+    stats: Optional[ExecutionStats] = None,
+    prefix: str = "hop",
+    buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    multiprocess_dir: Optional[str] = None,
+) -> ThreadingHTTPServer:
+    """在后台线程启动 /metrics 端点，返回的 server 可通过 shutdown() 停止
+
+    请求头 Accept 包含 application/openmetrics-text 时按 OpenMetrics 返回，否则按 Prometheus 文本格式返回。
+    指定 multiprocess_dir 时忽略 stats，每次请求汇总该目录下所有进程的统计快照。
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.stats = stats
+    server.prefix = prefix
+    server.buckets = buckets
+    server.multiprocess_dir = multiprocess_dir
+    threading.Thread(
+        target=server.serve_forever, name="hop-metrics-server", daemon=True
+    ).start()
+    return server
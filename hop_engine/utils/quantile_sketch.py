@@ -0,0 +1,156 @@
+import math
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class RingBuffer:
+    """固定容量的最近样本缓冲区，写满后覆盖最早的样本，追加为 O(1)"""
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self._items = deque(maxlen=capacity)
+
+    def append(self, value) -> None:
+        self._items.append(value)
+
+    def extend(self, values: Iterable) -> None:
+        self._items.extend(values)
+
+    def values(self) -> List:
+        return list(self._items)
+
+    def __iter__(self) -> Iterator:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class QuantileSketch:
+    """可合并的分位数草图（DDSketch）：对数分桶，分位数估计的相对误差不超过 relative_accuracy
+
+    内存上限为 max_bins 个桶，超出时合并最小的桶（只影响最低分位的精度）；
+    两个草图合并只需逐桶累加计数，耗时与桶数成正比，与样本数无关。
+    适用于非负样本（耗时、重试次数），0 单独计数。
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = float("-inf")
+
+    def _index(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        # 桶 (gamma^(i-1), gamma^i] 的代表值，使相对误差对称
+        return 2 * self._gamma**index / (self._gamma + 1)
+
+    def add(self, value: float) -> None:
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            index = self._index(value)
+            self._bins[index] = self._bins.get(index, 0) + 1
+            if len(self._bins) > self.max_bins:
+                self._collapse()
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """将另一个草图合并到当前草图，两者需使用相同的 relative_accuracy"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("只能合并 relative_accuracy 相同的草图")
+        for index, count in other._bins.items():
+            self._bins[index] = self._bins.get(index, 0) + count
+        if len(self._bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def _collapse(self) -> None:
+        indexes = sorted(self._bins)
+        overflow = len(indexes) - self.max_bins + 1
+        target = indexes[overflow]
+        for index in indexes[:overflow]:
+            self._bins[target] += self._bins.pop(index)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """返回 q 分位数（0 <= q <= 1）的估计值，没有样本时返回 None"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        seen = self.zero_count
+        for index in sorted(self._bins):
+            seen += self._bins[index]
+            if seen > rank:
+                # 估计值限制在实际观测的最小、最大值之间
+                return min(max(self._value(index), self.min), self.max)
+        return self.max
+
+    def cumulative_counts(self, bounds: Sequence[float]) -> List[int]:
+        """按升序的上界返回 <= 各上界的样本数估计，用于导出直方图桶"""
+        counts = []
+        seen = self.zero_count
+        bins = sorted(self._bins.items())
+        position = 0
+        for bound, limit in zip(bounds, _bound_indexes(self._log_gamma, tuple(bounds))):
+            if limit is not None:
+                while position < len(bins) and bins[position][0] <= limit:
+                    seen += bins[position][1]
+                    position += 1
+            counts.append(seen if bound >= 0 else 0)
+        return counts
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """可 JSON 序列化的表示，通过 from_dict 还原"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_bins": self.max_bins,
+            "bins": sorted(self._bins.items()),
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data["max_bins"])
+        sketch._bins = {int(index): count for index, count in data["bins"]}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+@lru_cache(maxsize=64)
+def _bound_indexes(log_gamma: float, bounds: Tuple[float, ...]) -> tuple:
+    """直方图各上界对应的桶序号，同一精度的草图共用，非正上界为 None"""
+    return tuple(
+        math.ceil(math.log(bound) / log_gamma) if bound > 0 else None
+        for bound in bounds
+    )
@@ -1,40 +1,64 @@
+import asyncio
+import contextlib
+import contextvars
 import threading
-from typing import TypedDict, DefaultDict, List, Any, Tuple, cast
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import (
+    TypedDict,
+    Callable,
+    DefaultDict,
+    Dict,
+    List,
+    Any,
+    Optional,
+    Tuple,
+    cast,
+)
 from hop_engine.config.constants import HopStatus
-from collections import defaultdict
+from hop_engine.utils.log_store import FunctionLogStore
+from hop_engine.utils.quantile_sketch import QuantileSketch, RingBuffer
+from hop_engine.utils.tracing import Tracer
+from collections import defaultdict, deque
 
 import functools
 import time
 
 # ==============================
-# 线程局部存储工具类
+# 调用上下文工具类
 # ==============================
+# 上下文均使用 contextvars 存储：同一线程上并发的协程各自独立，
+# 通过 submit_with_context / ContextThreadPoolExecutor 提交到线程池的任务继承提交方的上下文
+
 
 # 定义重试上下文管理
 class RetryContext:
-    _local = threading.local()
+    _retry_count: contextvars.ContextVar = contextvars.ContextVar(
+        "retry_count", default=0
+    )
+    _retry_logs: contextvars.ContextVar = contextvars.ContextVar(
+        "retry_logs", default=None
+    )
 
     @classmethod
     def get_retry_count(cls):
-        if not hasattr(cls._local, "retry_count"):
-            cls._local.retry_count = 0
-        return cls._local.retry_count
+        return cls._retry_count.get()
 
     @classmethod
     def set_retry_count(cls, count):
-        cls._local.retry_count = count
+        cls._retry_count.set(count)
 
     @classmethod
     def reset_retry_count(cls):
-        if hasattr(cls._local, "retry_count"):
-            cls._local.retry_count = 0
+        cls._retry_count.set(0)
 
     @classmethod
     def log_retry_attempt(cls, status: HopStatus, result: Any):
-        if not hasattr(cls._local, "retry_logs"):
-            cls._local.retry_logs = []
+        retry_logs = cls._retry_logs.get()
+        if retry_logs is None:
+            retry_logs = []
+            cls._retry_logs.set(retry_logs)
         current_attempt = cls.get_retry_count() + 1
-        cls._local.retry_logs.append(
+        retry_logs.append(
             {
                 "attempt": current_attempt,
                 "status": str(status),
@@ -45,49 +69,239 @@ class RetryContext:
 
     @classmethod
     def get_retry_logs(cls):
-        return getattr(cls._local, "retry_logs", [])
+        return cls._retry_logs.get() or []
 
     @classmethod
     def reset_retry_logs(cls):
-        if hasattr(cls._local, "retry_logs"):
-            cls._local.retry_logs = []
+        cls._retry_logs.set([])
+
+    @classmethod
+    def reset_scope(cls) -> Tuple[contextvars.Token, contextvars.Token]:
+        """开启新的算子重试作用域，返回用于 restore_scope 的 token"""
+        return cls._retry_count.set(0), cls._retry_logs.set([])
+
+    @classmethod
+    def restore_scope(cls, tokens: Tuple[contextvars.Token, contextvars.Token]):
+        count_token, logs_token = tokens
+        cls._retry_count.reset(count_token)
+        cls._retry_logs.reset(logs_token)
 
 
 # 算子状态收集器
 class FunctionStatusLogCollector:
-    _local = threading.local()
+    _collector: contextvars.ContextVar = contextvars.ContextVar(
+        "status_log_collector", default=None
+    )
 
     @classmethod
     def get_collector(cls):
-        if not hasattr(cls._local, "status_log_collector"):
-            cls._local.status_log_collector = []
-        return cls._local.status_log_collector
+        collector = cls._collector.get()
+        if collector is None:
+            cls.reset_collector()
+            collector = cls._collector.get()
+        return collector
+
+    @classmethod
+    def reset_collector(cls) -> contextvars.Token:
+        """开启新的函数日志收集作用域，返回用于 restore_collector 的 token"""
+        # 只保留最近的日志，与函数日志存储的条数上限一致
+        return cls._collector.set(deque(maxlen=FunctionLogStore.max_entries))
 
     @classmethod
-    def reset_collector(cls):
-        cls._local.status_log_collector = []
+    def restore_collector(cls, token: contextvars.Token):
+        cls._collector.reset(token)
 
     @classmethod
     def collect_status_log(cls, status: HopStatus, log: str):
-        if hasattr(cls._local, "status_log_collector"):
-            cls._local.status_log_collector.append((status, log))
+        collector = cls._collector.get()
+        if collector is not None:
+            collector.append((status, log))
+
+
+def submit_with_context(executor: Executor, fn: Callable, *args, **kwargs) -> Future:
+    """在提交方上下文的副本中执行任务，任务内的算子调用归属到当前会话、函数与算子作用域"""
+    return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """提交任务时自动传播 contextvars 上下文的线程池，map 同样适用"""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+# 算子内部指标收集（LLM缓存命中等）
+# 使用 contextvars 存储：同一线程上并发的协程各自独立，随算子调用记录到 ExecutionStats
+class OperatorMetrics:
+    _metrics: contextvars.ContextVar = contextvars.ContextVar("operator_metrics")
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_metrics(cls) -> DefaultDict[str, float]:
+        metrics = cls._metrics.get(None)
+        if metrics is None:
+            metrics = defaultdict(float)
+            cls._metrics.set(metrics)
+        return metrics
+
+    @classmethod
+    def reset_metrics(cls) -> contextvars.Token:
+        """开启新的算子指标作用域，返回用于 restore_metrics 的 token"""
+        return cls._metrics.set(defaultdict(float))
+
+    @classmethod
+    def restore_metrics(cls, token: contextvars.Token):
+        cls._metrics.reset(token)
+
+    @classmethod
+    def take_metrics(cls) -> Dict[str, float]:
+        """取出当前作用域已累计的指标并清零，避免同一次调用重复记录"""
+        metrics = cls.get_metrics()
+        with cls._lock:
+            taken = dict(metrics)
+            metrics.clear()
+        return taken
+
+    @classmethod
+    def add_metric(cls, name: str, value: float = 1):
+        metrics = cls.get_metrics()
+        # 核验采样可能在多个线程中共享同一作用域
+        with cls._lock:
+            metrics[name] += value
+
+
+# 每个算子/函数保留的最近样本数
+RECENT_SAMPLES = 100
+
+# LLM token 用量归属的阶段
+PHASE_GENERATION = "generation"
+PHASE_VERIFICATION = "verification"
+
+# token 用量统计字段
+USAGE_FIELDS = (
+    "llm_calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "reasoning_tokens",
+    "cached_tokens",
+    "llm_time",
+)
+
+
+# 算子内 LLM 调用的 token 用量记录，按阶段（生成/核验）与尝试序号归属
+# 与 OperatorMetrics 相同使用 contextvars 存储，随算子调用记录到 ExecutionStats
+class TokenUsageRecorder:
+    _scope: contextvars.ContextVar = contextvars.ContextVar("token_usage_scope")
+    _phase: contextvars.ContextVar = contextvars.ContextVar(
+        "token_usage_phase", default=PHASE_GENERATION
+    )
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_scope(cls) -> Dict[str, Any]:
+        scope = cls._scope.get(None)
+        if scope is None:
+            scope = {"attempt": 1, "records": []}
+            cls._scope.set(scope)
+        return scope
+
+    @classmethod
+    def reset_usage(cls) -> contextvars.Token:
+        """开启新的算子用量作用域，返回用于 restore_usage 的 token"""
+        return cls._scope.set({"attempt": 1, "records": []})
+
+    @classmethod
+    def restore_usage(cls, token: contextvars.Token):
+        cls._scope.reset(token)
+
+    @classmethod
+    def set_attempt(cls, attempt: int):
+        """设置当前尝试序号，之后的 LLM 调用（含核验）归属到该次尝试"""
+        cls._get_scope()["attempt"] = attempt
+
+    @classmethod
+    @contextlib.contextmanager
+    def phase(cls, phase: str):
+        """在 with 块内发起的 LLM 调用归属到指定阶段"""
+        token = cls._phase.set(phase)
+        try:
+            yield
+        finally:
+            cls._phase.reset(token)
+
+    @classmethod
+    def record_usage(cls, usage: Any, duration: float):
+        """记录一次 LLM 调用的 token 用量，duration 为该次调用的耗时（秒）"""
+        if usage is None:
+            return
+        completion_details = getattr(usage, "completion_tokens_details", None)
+        prompt_details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(prompt_details, "cached_tokens", None)
+        scope = cls._get_scope()
+        record = {
+            "phase": cls._phase.get(),
+            "attempt": scope["attempt"],
+            "llm_calls": 1,
+            "prompt_tokens": usage.prompt_tokens or 0,
+            "completion_tokens": usage.completion_tokens or 0,
+            "reasoning_tokens": getattr(completion_details, "reasoning_tokens", None)
+            or 0,
+            "cached_tokens": cached_tokens or 0,
+            "llm_time": duration,
+            # 服务端未返回 cached_tokens（未开启前缀缓存或引擎不支持）时无从得知命中数
+            "cached_tokens_reported": cached_tokens is not None,
+        }
+        # 核验采样可能在多个线程中共享同一作用域
+        with cls._lock:
+            scope["records"].append(record)
+
+    @classmethod
+    def usage_mark(cls) -> int:
+        """当前作用域已记录的调用数，配合 reported_cached_tokens 统计其后发起的调用"""
+        scope = cls._get_scope()
+        with cls._lock:
+            return len(scope["records"])
+
+    @classmethod
+    def reported_cached_tokens(cls, mark: int) -> Optional[int]:
+        """usage_mark 之后的调用中服务端返回的前缀缓存命中 token 合计，均未返回时为 None"""
+        scope = cls._get_scope()
+        with cls._lock:
+            records = scope["records"][mark:]
+        reported = [record for record in records if record["cached_tokens_reported"]]
+        if not reported:
+            return None
+        return sum(record["cached_tokens"] for record in reported)
+
+    @classmethod
+    def take_usage(cls) -> List[Dict[str, Any]]:
+        """取出当前作用域已记录的用量并清空，避免同一次调用重复记录"""
+        scope = cls._get_scope()
+        with cls._lock:
+            taken = scope["records"]
+            scope["records"] = []
+        return taken
 
 
 # ==============================
 # 统计数据类型定义
 # ==============================
 
+
 # 算子统计项的类型
 class OperatorStat(TypedDict):
     calls: int
     success: int
     uncertain: int
     errors: int
-    execution_times: List[float]
-    min_time: float
-    max_time: float
-    retry_counts: List[int]
+    execution_times: RingBuffer  # 最近的执行耗时样本
+    time_sketch: QuantileSketch  # 全部执行耗时的分位数草图
+    retry_counts: RingBuffer  # 最近的重试次数样本
+    retry_sketch: QuantileSketch  # 全部重试次数的分位数草图
     total_retries: int
+    metrics: DefaultDict[str, float]
+    token_usage: DefaultDict[str, DefaultDict[str, float]]  # 按阶段累计的 token 用量
+    attempt_token_usage: DefaultDict[int, DefaultDict[str, float]]  # 按尝试序号累计
 
 
 # 定义函数统计项的类型
@@ -96,18 +310,174 @@ class FunctionStat(TypedDict):
     success: int
     uncertain: int
     errors: int
-    execution_times: List[float]
+    execution_times: RingBuffer
+    time_sketch: QuantileSketch
     function_status: HopStatus
-    function_log: List[str]
+
+
+def _new_usage_table() -> DefaultDict[Any, DefaultDict[str, float]]:
+    return defaultdict(lambda: defaultdict(float))
+
+
+def _merge_usage_table(target, source) -> None:
+    for key, usage in source.items():
+        for field, value in usage.items():
+            target[key][field] += value
+
+
+def _sum_usage(usages) -> Dict[str, float]:
+    total = defaultdict(float)
+    for usage in usages:
+        for field in USAGE_FIELDS:
+            total[field] += usage.get(field, 0)
+    return total
+
+
+def _new_operator_stat() -> OperatorStat:
+    return {
+        "calls": 0,
+        "success": 0,
+        "uncertain": 0,
+        "errors": 0,
+        "execution_times": RingBuffer(RECENT_SAMPLES),
+        "time_sketch": QuantileSketch(),
+        "retry_counts": RingBuffer(RECENT_SAMPLES),
+        "retry_sketch": QuantileSketch(),
+        "total_retries": 0,
+        "metrics": defaultdict(float),
+        "token_usage": _new_usage_table(),
+        "attempt_token_usage": _new_usage_table(),
+    }
+
+
+def _new_function_stat() -> FunctionStat:
+    return {
+        "calls": 0,
+        "success": 0,
+        "uncertain": 0,
+        "errors": 0,
+        "execution_times": RingBuffer(RECENT_SAMPLES),
+        "time_sketch": QuantileSketch(),
+        "function_status": HopStatus.OK,  # 用于单次记录
+    }
+
+
+def _new_operator_stats() -> DefaultDict[str, OperatorStat]:
+    return defaultdict(_new_operator_stat)
+
+
+def _new_function_stats() -> DefaultDict[str, FunctionStat]:
+    return defaultdict(_new_function_stat)
+
+
+def _merge_operator_stat(target: "OperatorStat", source: "OperatorStat") -> None:
+    """合并算子统计，耗时与重试次数只合并草图与最近样本，开销与样本总数无关"""
+    target["calls"] += source["calls"]
+    target["success"] += source["success"]
+    target["uncertain"] += source["uncertain"]
+    target["errors"] += source["errors"]
+    target["execution_times"].extend(source["execution_times"])
+    target["time_sketch"].merge(source["time_sketch"])
+    target["retry_counts"].extend(source["retry_counts"])
+    target["retry_sketch"].merge(source["retry_sketch"])
+    target["total_retries"] += source["total_retries"]
+    for metric, value in source["metrics"].items():
+        target["metrics"][metric] += value
+    _merge_usage_table(target["token_usage"], source["token_usage"])
+    _merge_usage_table(target["attempt_token_usage"], source["attempt_token_usage"])
+
+
+def _merge_function_stat(target: "FunctionStat", source: "FunctionStat") -> None:
+    target["calls"] += source["calls"]
+    target["success"] += source["success"]
+    target["uncertain"] += source["uncertain"]
+    target["errors"] += source["errors"]
+    target["execution_times"].extend(source["execution_times"])
+    target["time_sketch"].merge(source["time_sketch"])
+
+
+_STAT_COUNTERS = ("calls", "success", "uncertain", "errors")
+
+
+def _operator_stat_to_dict(stats: "OperatorStat") -> Dict[str, Any]:
+    data = {counter: stats[counter] for counter in _STAT_COUNTERS}
+    data.update(
+        execution_times=stats["execution_times"].values(),
+        time_sketch=stats["time_sketch"].to_dict(),
+        retry_counts=stats["retry_counts"].values(),
+        retry_sketch=stats["retry_sketch"].to_dict(),
+        total_retries=stats["total_retries"],
+        metrics=dict(stats["metrics"]),
+        token_usage={
+            phase: dict(usage) for phase, usage in stats["token_usage"].items()
+        },
+        # JSON 的键只能是字符串，尝试序号还原时转回 int
+        attempt_token_usage={
+            str(attempt): dict(usage)
+            for attempt, usage in stats["attempt_token_usage"].items()
+        },
+    )
+    return data
+
+
+def _operator_stat_from_dict(data: Dict[str, Any]) -> "OperatorStat":
+    stats = _new_operator_stat()
+    for counter in _STAT_COUNTERS:
+        stats[counter] = data[counter]
+    stats["execution_times"].extend(data["execution_times"])
+    stats["time_sketch"] = QuantileSketch.from_dict(data["time_sketch"])
+    stats["retry_counts"].extend(data["retry_counts"])
+    stats["retry_sketch"] = QuantileSketch.from_dict(data["retry_sketch"])
+    stats["total_retries"] = data["total_retries"]
+    stats["metrics"].update(data["metrics"])
+    _merge_usage_table(stats["token_usage"], data["token_usage"])
+    _merge_usage_table(
+        stats["attempt_token_usage"],
+        {int(attempt): usage for attempt, usage in data["attempt_token_usage"].items()},
+    )
+    return stats
+
+
+def _function_stat_to_dict(stats: "FunctionStat") -> Dict[str, Any]:
+    data = {counter: stats[counter] for counter in _STAT_COUNTERS}
+    status = stats["function_status"]
+    data.update(
+        execution_times=stats["execution_times"].values(),
+        time_sketch=stats["time_sketch"].to_dict(),
+        function_status=status.name if isinstance(status, HopStatus) else status,
+    )
+    return data
+
+
+def _function_stat_from_dict(data: Dict[str, Any]) -> "FunctionStat":
+    stats = _new_function_stat()
+    for counter in _STAT_COUNTERS:
+        stats[counter] = data[counter]
+    stats["execution_times"].extend(data["execution_times"])
+    stats["time_sketch"] = QuantileSketch.from_dict(data["time_sketch"])
+    status = data["function_status"]
+    stats["function_status"] = HopStatus.__members__.get(status, status)
+    return stats
+
+
+def _quantiles(sketch: QuantileSketch, suffix: str) -> Dict[str, Any]:
+    """p50/p95/p99 分位数，键名如 p95_time"""
+    return {
+        f"{name}{suffix}": sketch.quantile(q)
+        for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+    }
 
 
 # ==============================
 # 核心统计类
 # ==============================
 class ExecutionStats:
-    """执行统计管理器，支持线程隔离的嵌套会话统计
+    """执行统计管理器，支持按调用上下文隔离的嵌套会话统计
 
-    该类实现了基于线程本地存储的会话栈管理，支持统计数据的层级合并。
+    该类实现了基于 contextvars 的会话栈管理，支持统计数据的层级合并：
+    同一线程上并发的协程各自维护会话栈，通过 submit_with_context 提交到线程池的任务
+    以提交方的当前会话为父会话。
+    顶层会话结束时在全局锁内合并到全局统计；合并只涉及计数、草图与定长样本，开销与样本总数无关。
     主要用于收集算子和函数的执行 metrics，包括调用次数、成功率、执行时间等。
 
     使用示例:
@@ -116,26 +486,30 @@ class ExecutionStats:
             stats.record_operator(...)
     """
 
-    _thread_local = threading.local()
+    # 会话栈使用不可变元组，子上下文继承父上下文的栈而不会互相修改
+    _session_stack: contextvars.ContextVar = contextvars.ContextVar(
+        "session_stack", default=()
+    )
 
     def __init__(self):
         self._lock = threading.Lock()
         self._parent = None
+        self._stack_token = None
+        # function_monitor 会话的根 span，用于导出该次调用的调用链
+        self.span = None
         self.reset()
 
     def __enter__(self):
-        if not hasattr(self._thread_local, "session_stack"):
-            self._thread_local.session_stack = []
-
-        if self._thread_local.session_stack:
-            self._parent = self._thread_local.session_stack[-1]
+        session_stack = self._session_stack.get()
+        if session_stack:
+            self._parent = session_stack[-1]
 
-        self._thread_local.session_stack.append(self)
+        self._stack_token = self._session_stack.set(session_stack + (self,))
         return self
 
     def __exit__(self, *args):
-        self._thread_local.session_stack.pop()
-        if not self._thread_local.session_stack:
+        self._session_stack.reset(self._stack_token)
+        if self._parent is None:
             self.merge_to_global()
         else:
             self.merge_to_parent()
@@ -144,95 +518,61 @@ class ExecutionStats:
         with GLOBAL_STATS._lock:
             # 合并算子统计
             for op_name, session_op in self.operator_stats.items():
-                global_op = GLOBAL_STATS.operator_stats[op_name]
-                global_op["calls"] += session_op["calls"]
-                global_op["success"] += session_op["success"]
-                global_op["uncertain"] += session_op["uncertain"]
-                global_op["errors"] += session_op["errors"]
-
-                # 重试统计合并
-                global_retries = global_op["retry_counts"]
-                global_retries.extend(session_op["retry_counts"])
-                if len(global_retries) > 100:
-                    global_retries = global_retries[-100:]
-                global_op["retry_counts"] = global_retries
-                global_op["total_retries"] += session_op["total_retries"]
-
-                # 时间统计合并
-                global_times = global_op["execution_times"]
-                global_times.extend(session_op["execution_times"])
-                if len(global_times) > 100:
-                    global_times = global_times[-100:]
-                global_op["min_time"] = min(
-                    global_op["min_time"], session_op["min_time"]
-                )
-                global_op["max_time"] = max(
-                    global_op["max_time"], session_op["max_time"]
-                )
+                _merge_operator_stat(GLOBAL_STATS.operator_stats[op_name], session_op)
 
             # 函数统计合并
             for func_name, session_func in self.function_stats.items():
-                global_func = GLOBAL_STATS.function_stats[func_name]
-
-                global_func["calls"] += session_func["calls"]
-                global_func["success"] += session_func["success"]
-                global_func["uncertain"] += session_func["uncertain"]
-                global_func["errors"] += session_func["errors"]
-
-                # 保留最近100条执行时间
-                global_times = global_func["execution_times"]
-                global_times.extend(session_func["execution_times"])
-                if len(global_times) > 100:
-                    global_times = global_times[-100:]
+                _merge_function_stat(
+                    GLOBAL_STATS.function_stats[func_name], session_func
+                )
 
     def merge_to_parent(self):
         if self._parent:
             with self._lock, self._parent._lock:
                 # 合并算子统计到父会话
                 for op_name, session_op in self.operator_stats.items():
-                    parent_op = self._parent.operator_stats[op_name]
-                    parent_op["calls"] += session_op["calls"]
-                    parent_op["success"] += session_op["success"]
-                    parent_op["uncertain"] += session_op["uncertain"]
-                    parent_op["errors"] += session_op["errors"]
-                    parent_op["execution_times"].extend(session_op["execution_times"])
-                    parent_op["retry_counts"].extend(session_op["retry_counts"])
-                    parent_op["total_retries"] += session_op["total_retries"]
-                    parent_op["min_time"] = min(
-                        parent_op["min_time"], session_op["min_time"]
-                    )
-                    parent_op["max_time"] = max(
-                        parent_op["max_time"], session_op["max_time"]
+                    _merge_operator_stat(
+                        self._parent.operator_stats[op_name], session_op
                     )
 
     def reset(self) -> None:
-        # 算子级统计
-        self.operator_stats: DefaultDict[str, OperatorStat] = defaultdict(
-            lambda: {
-                "calls": 0,
-                "success": 0,
-                "uncertain": 0,
-                "errors": 0,
-                "execution_times": [],
-                "min_time": float("inf"),
-                "max_time": 0.0,
-                "retry_counts": [],
-                "total_retries": 0,
-            }
-        )
+        # 在统计锁内替换，并发合并的会话要么计入旧统计、要么计入新统计，不会写入被丢弃的对象
+        with self._lock:
+            # 算子级统计
+            self.operator_stats: DefaultDict[str, OperatorStat] = _new_operator_stats()
 
-        # 函数级统计
-        self.function_stats: DefaultDict[str, FunctionStat] = defaultdict(
-            lambda: {
-                "calls": 0,
-                "success": 0,
-                "uncertain": 0,
-                "errors": 0,
-                "execution_times": [],
-                "function_status": HopStatus.OK,  # 用于单次记录
-                "function_log": [],  # 用于单次记录
-            }
-        )
+            # 函数级统计
+            self.function_stats: DefaultDict[str, FunctionStat] = _new_function_stats()
+
+            # 函数日志，首次记录函数时创建
+            self._function_logs: Optional[FunctionLogStore] = None
+
+    def reset_after_fork(self) -> None:
+        """fork 后在子进程中调用：重建锁并清零从父进程继承的统计
+
+        fork 时父进程其他线程持有的锁在子进程中不会被释放，需重建。
+        """
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def function_logs(self) -> FunctionLogStore:
+        """本会话的函数日志存储，条数与字节数有上限，可配置落盘"""
+        if self._function_logs is None:
+            self._function_logs = FunctionLogStore()
+        return self._function_logs
+
+    def query_function_logs(
+        self,
+        func_name: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """按函数名与时间范围查询本会话内存中保留的日志，落盘日志通过 FunctionLogStore.query_spill 查询"""
+        if self._function_logs is None:
+            return []
+        return self._function_logs.query(func_name, start, end, limit)
 
     def record_operator(
         self,
@@ -241,28 +581,33 @@ class ExecutionStats:
         result: Any,
         duration: float,
         retry_count: int,
+        metrics: Optional[Dict[str, float]] = None,
+        token_usage: Optional[List[Dict[str, Any]]] = None,
     ) -> None:
-        """记录算子执行"""
+        """记录算子执行，token_usage 为本次调用中各次 LLM 调用的用量记录"""
         with self._lock:
-            current_session = (
-                self._thread_local.session_stack[-1]
-                if self._thread_local.session_stack
-                else self
-            )
+            session_stack = self._session_stack.get()
+            current_session = session_stack[-1] if session_stack else self
             stats = current_session.operator_stats[func_name]
 
             stats["calls"] += 1
 
             # 记录执行时间
             stats["execution_times"].append(duration)
-            if len(stats["execution_times"]) > 100:
-                stats["execution_times"].pop(0)
+            stats["time_sketch"].add(duration)
 
             # 记录重试信息
             stats["retry_counts"].append(retry_count)
-            if len(stats["retry_counts"]) > 100:
-                stats["retry_counts"].pop(0)
+            stats["retry_sketch"].add(retry_count)
             stats["total_retries"] += retry_count
+            for metric, value in (metrics or {}).items():
+                stats["metrics"][metric] += value
+            for record in token_usage or []:
+                for field in USAGE_FIELDS:
+                    stats["token_usage"][record["phase"]][field] += record[field]
+                    stats["attempt_token_usage"][record["attempt"]][field] += record[
+                        field
+                    ]
 
             if status == HopStatus.OK:
                 stats["success"] += 1
@@ -277,12 +622,6 @@ class ExecutionStats:
                     log += f"【执行Operator Retry:{retry_log.get('attempt','')}】: {func_name},【核验状态】：{retry_log.get('status','')},【结果】：{retry_log.get('result', '')}\n\n"
             else:
                 log = f"【执行Operator】: {func_name},【核验状态】：{status},【最终结果】：{result.get('final_result', '')}"
-            # 更新时间统计
-            if duration < stats["min_time"]:
-                stats["min_time"] = duration
-            if duration > stats["max_time"]:
-                stats["max_time"] = duration
-
             # 收集状态和日志用于函数级统计
             FunctionStatusLogCollector.collect_status_log(status, log)
 
@@ -291,17 +630,12 @@ class ExecutionStats:
     ) -> None:
         """记录函数执行，基于算子状态集合"""
         with self._lock:
-            current_session = (
-                self._thread_local.session_stack[-1]
-                if self._thread_local.session_stack
-                else self
-            )
+            session_stack = self._session_stack.get()
+            current_session = session_stack[-1] if session_stack else self
             stats = current_session.function_stats[func_name]
             stats["calls"] += 1
             stats["execution_times"].append(duration)
-
-            if len(stats["execution_times"]) > 100:
-                stats["execution_times"].pop(0)
+            stats["time_sketch"].add(duration)
             if collector:
                 last_status, _ = collector[-1]
                 if last_status in (HopStatus.FAIL, "exception"):
@@ -312,8 +646,42 @@ class ExecutionStats:
                     stats["success"] += 1
 
                 stats["function_status"] = last_status
-            for _, log in collector:
-                stats["function_log"].append(log)
+            current_session.function_logs.extend(func_name, collector)
+
+    def read_raw_stats(self, reader: Callable[[Dict, Dict], Any]) -> Any:
+        """在统计锁内以原始算子、函数统计调用 reader 并返回其结果
+
+        用于指标导出等只读场景，直接读取计数与草图，省去逐项格式化；reader 不可修改统计。
+        """
+        with self._lock:
+            return reader(self.operator_stats, self.function_stats)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """原始统计（计数、最近样本与分位数草图）的 JSON 兼容快照，不含函数日志"""
+        return self.read_raw_stats(
+            lambda operator_stats, function_stats: {
+                "operators": {
+                    name: _operator_stat_to_dict(stats)
+                    for name, stats in operator_stats.items()
+                },
+                "functions": {
+                    name: _function_stat_to_dict(stats)
+                    for name, stats in function_stats.items()
+                },
+            }
+        )
+
+    def merge_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        """将 snapshot() 生成的快照合并到本实例，用于汇总其他进程的统计"""
+        with self._lock:
+            for name, data in snapshot.get("operators", {}).items():
+                _merge_operator_stat(
+                    self.operator_stats[name], _operator_stat_from_dict(data)
+                )
+            for name, data in snapshot.get("functions", {}).items():
+                _merge_function_stat(
+                    self.function_stats[name], _function_stat_from_dict(data)
+                )
 
     def get_operator_stats(self, func_name=None):
         """获取算子统计"""
@@ -333,46 +701,80 @@ class ExecutionStats:
         if not stats or stats["calls"] == 0:
             return {}
 
-        times = stats["execution_times"]
-        avg_time = sum(times) / len(times) if times else 0
-
-        retry_counts = stats["retry_counts"]
-        avg_retries = (
-            sum(retry_counts) / len(retry_counts) if len(retry_counts) > 0 else 0
-        )
+        times = stats["time_sketch"]
+        retries = stats["retry_sketch"]
 
         return {
             "calls": stats["calls"],
             "success_rate": stats["success"] / stats["calls"],
             "uncertain_rate": stats["uncertain"] / stats["calls"],
             "error_rate": stats["errors"] / stats["calls"],
-            "avg_time": avg_time,
-            "min_time": stats["min_time"],
-            "max_time": stats["max_time"],
-            "avg_retry_count": avg_retries,
+            "avg_time": times.mean,
+            "min_time": times.min,
+            "max_time": times.max,
+            **_quantiles(times, "_time"),
+            "avg_retry_count": retries.mean,
+            **_quantiles(retries, "_retry_count"),
             "total_retries": stats["total_retries"],
+            "metrics": dict(stats["metrics"]),
+            "token_usage": self._format_token_usage(stats),
         }
 
+    @classmethod
+    def _format_token_usage(cls, stats) -> Dict[str, Any]:
+        """token 用量：总计与按阶段、按尝试序号的分项，均含每次算子调用的平均值与 token/秒"""
+        usage = {
+            "total": cls._format_usage(
+                _sum_usage(stats["token_usage"].values()), stats["calls"]
+            )
+        }
+        for phase, phase_usage in stats["token_usage"].items():
+            usage[phase] = cls._format_usage(phase_usage, stats["calls"])
+        usage["by_attempt"] = {
+            attempt: cls._format_usage(attempt_usage, stats["calls"])
+            for attempt, attempt_usage in sorted(stats["attempt_token_usage"].items())
+        }
+        return usage
+
+    @staticmethod
+    def _format_usage(usage, calls: int) -> Dict[str, float]:
+        total_tokens = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+        llm_time = usage.get("llm_time", 0)
+        formatted = {field: usage.get(field, 0) for field in USAGE_FIELDS}
+        formatted["total_tokens"] = total_tokens
+        formatted["avg_tokens"] = total_tokens / calls if calls else 0
+        formatted["avg_prompt_tokens"] = (
+            usage.get("prompt_tokens", 0) / calls if calls else 0
+        )
+        formatted["avg_completion_tokens"] = (
+            usage.get("completion_tokens", 0) / calls if calls else 0
+        )
+        # 吞吐按 LLM 调用耗时计算，completion 吞吐反映解码速度
+        formatted["tokens_per_second"] = total_tokens / llm_time if llm_time else 0
+        formatted["completion_tokens_per_second"] = (
+            usage.get("completion_tokens", 0) / llm_time if llm_time else 0
+        )
+        return formatted
+
     def get_function_stats(self, func_name=None):
         """获取函数统计"""
         with self._lock:
             if func_name:
                 return self._format_function_stats(
-                    self.function_stats.get(func_name, {})
+                    func_name, self.function_stats.get(func_name, {})
                 )
 
             return {
-                name: self._format_function_stats(stats)
+                name: self._format_function_stats(name, stats)
                 for name, stats in self.function_stats.items()
             }
 
-    def _format_function_stats(self, stats):
+    def _format_function_stats(self, func_name, stats):
         """格式化函数统计信息"""
         if not stats or stats["calls"] == 0:
             return {}
 
-        times = stats["execution_times"]
-        avg_time = sum(times) / len(times) if times else 0
+        times = stats["time_sketch"]
 
         total = stats["calls"]
         success_rate = stats["success"] / total if total > 0 else 0
@@ -384,88 +786,205 @@ class ExecutionStats:
             "success_rate": success_rate,
             "uncertain_rate": uncertain_rate,
             "error_rate": error_rate,
-            "avg_time": avg_time,
+            "avg_time": times.mean,
+            "min_time": times.min,
+            "max_time": times.max,
+            **_quantiles(times, "_time"),
             "function_status": stats["function_status"],
-            "function_log": stats["function_log"],
+            "function_log": (
+                self._function_logs.logs(func_name) if self._function_logs else []
+            ),
         }
 
 
 # 全局统计实例
 GLOBAL_STATS = ExecutionStats()
 
+
 # ==============================
 # 装饰器定义
 # ==============================
 def auto_record_status(func):
-    """算子状态自动记录注解"""
+    """算子状态自动记录注解，同时支持同步算子与异步算子"""
+
+    if asyncio.iscoroutinefunction(func):
+        return _auto_record_status_async(func)
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        with ExecutionStats() as session_stats:
+        span = Tracer.span(func.__name__, kind="operator")
+        with span, ExecutionStats() as session_stats:
             session_stats = cast(ExecutionStats, session_stats)
-            RetryContext.reset_retry_count()
-            RetryContext.reset_retry_logs()
-
+            tokens = _enter_operator_scope()
             start_time = time.time()
             try:
                 status, result = func(*args, **kwargs)
-                duration = time.time() - start_time
-
-                # 同时记录到会话和全局统计
-                session_stats.record_operator(
-                    func.__name__,
-                    status,
-                    {
-                        "final_result": result,
-                        "retry_logs": RetryContext.get_retry_logs(),
-                    },
-                    duration,
-                    RetryContext.get_retry_count(),
+                return _record_operator_result(
+                    session_stats, func.__name__, status, result, start_time
                 )
-                if status != HopStatus.OK:
-                    raise ValueError(f"Operator failed: {func.__name__}", result)
-                return status, result
             except Exception as e:
-                duration = time.time() - start_time
                 # 异常处理中同样记录
-                session_stats.record_operator(
-                    func.__name__,
-                    HopStatus.FAIL,
-                    {"error": str(e)},
-                    duration,
-                    RetryContext.get_retry_count(),
+                _record_operator_error(session_stats, func.__name__, e, start_time)
+                raise
+            finally:
+                _exit_operator_scope(tokens)
+
+    return wrapper
+
+
+def _auto_record_status_async(func):
+    """异步算子状态记录
+
+    会话栈与算子作用域存储在 contextvars 中，同一线程上并发的协程（asyncio 任务）互不串扰。
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        span = Tracer.span(func.__name__, kind="operator")
+        with span, ExecutionStats() as session_stats:
+            session_stats = cast(ExecutionStats, session_stats)
+            tokens = _enter_operator_scope()
+            start_time = time.time()
+            try:
+                status, result = await func(*args, **kwargs)
+                return _record_operator_result(
+                    session_stats, func.__name__, status, result, start_time
                 )
+            except Exception as e:
+                _record_operator_error(session_stats, func.__name__, e, start_time)
                 raise
+            finally:
+                _exit_operator_scope(tokens)
 
     return wrapper
 
 
+def _enter_operator_scope() -> tuple:
+    """开启算子调用的重试、指标与 token 用量作用域"""
+    return (
+        RetryContext.reset_scope(),
+        OperatorMetrics.reset_metrics(),
+        TokenUsageRecorder.reset_usage(),
+    )
+
+
+def _exit_operator_scope(tokens: tuple) -> None:
+    retry_tokens, metrics_token, usage_token = tokens
+    RetryContext.restore_scope(retry_tokens)
+    OperatorMetrics.restore_metrics(metrics_token)
+    TokenUsageRecorder.restore_usage(usage_token)
+
+
+def _record_operator_result(
+    session_stats: ExecutionStats,
+    func_name: str,
+    status: HopStatus,
+    result: Any,
+    start_time: float,
+):
+    """记录算子返回结果，状态非 OK 时抛出异常"""
+    Tracer.set_attributes(
+        status=status.name, retry_count=RetryContext.get_retry_count()
+    )
+    session_stats.record_operator(
+        func_name,
+        status,
+        {
+            "final_result": result,
+            "retry_logs": RetryContext.get_retry_logs(),
+        },
+        time.time() - start_time,
+        RetryContext.get_retry_count(),
+        OperatorMetrics.take_metrics(),
+        TokenUsageRecorder.take_usage(),
+    )
+    if status != HopStatus.OK:
+        raise ValueError(f"Operator failed: {func_name}", result)
+    return status, result
+
+
+def _record_operator_error(
+    session_stats: ExecutionStats, func_name: str, error: Exception, start_time: float
+) -> None:
+    Tracer.set_attributes(
+        status=HopStatus.FAIL.name, retry_count=RetryContext.get_retry_count()
+    )
+    session_stats.record_operator(
+        func_name,
+        HopStatus.FAIL,
+        {"error": str(error)},
+        time.time() - start_time,
+        RetryContext.get_retry_count(),
+        OperatorMetrics.take_metrics(),
+        TokenUsageRecorder.take_usage(),
+    )
+
+
 def function_monitor(func):
-    """业务函数监控注解 - 收集算子、函数状态（当前会话、全局）"""
+    """业务函数监控注解 - 收集算子、函数状态（当前会话、全局），同时支持同步与异步函数
+
+    函数内通过 asyncio 任务或 submit_with_context 并发执行的算子同样归属到本次调用。
+    """
+
+    if asyncio.iscoroutinefunction(func):
+        return _function_monitor_async(func)
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        with ExecutionStats() as session_stats:  # 会话级统计
+        span = Tracer.span(func.__name__, kind="function")
+        with span, ExecutionStats() as session_stats:  # 会话级统计
             session_stats = cast(ExecutionStats, session_stats)
-            FunctionStatusLogCollector.reset_collector()
+            session_stats.span = span
+            collector_token = FunctionStatusLogCollector.reset_collector()
             start_time = time.time()
             try:
                 result = func(*args, **kwargs)
-                duration = time.time() - start_time
-                collector = FunctionStatusLogCollector.get_collector()
-
-                # 记录当前会话统计
-                session_stats.record_function(func.__name__, duration, collector)
                 # 获取当前会话的函数统计数据并返回
-                current_stats = session_stats
-                return result, current_stats
+                _record_function_result(session_stats, func.__name__, start_time)
+                return result, session_stats
             except Exception as e:
-                duration = time.time() - start_time
-                collector = FunctionStatusLogCollector.get_collector()
-                collector.append(("exception", str(e)))
+                _record_function_error(session_stats, func.__name__, e, start_time)
+                raise
+            finally:
+                FunctionStatusLogCollector.restore_collector(collector_token)
+
+    return wrapper
+
 
-                # 记录当前会话统计
-                session_stats.record_function(func.__name__, duration, collector)
+def _function_monitor_async(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        span = Tracer.span(func.__name__, kind="function")
+        with span, ExecutionStats() as session_stats:
+            session_stats = cast(ExecutionStats, session_stats)
+            session_stats.span = span
+            collector_token = FunctionStatusLogCollector.reset_collector()
+            start_time = time.time()
+            try:
+                result = await func(*args, **kwargs)
+                _record_function_result(session_stats, func.__name__, start_time)
+                return result, session_stats
+            except Exception as e:
+                _record_function_error(session_stats, func.__name__, e, start_time)
                 raise
+            finally:
+                FunctionStatusLogCollector.restore_collector(collector_token)
 
     return wrapper
+
+
+def _record_function_result(
+    session_stats: ExecutionStats, func_name: str, start_time: float
+) -> None:
+    # 记录当前会话统计
+    session_stats.record_function(
+        func_name, time.time() - start_time, FunctionStatusLogCollector.get_collector()
+    )
+
+
+def _record_function_error(
+    session_stats: ExecutionStats, func_name: str, error: Exception, start_time: float
+) -> None:
+    collector = FunctionStatusLogCollector.get_collector()
+    collector.append(("exception", str(error)))
+    session_stats.record_function(func_name, time.time() - start_time, collector)
@@ -0,0 +1,230 @@
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from hop_engine.utils.tracing import InMemorySpanExporter, Span
+from hop_engine.utils.utils import LoggerUtils
+
+logger = LoggerUtils.get_logger()
+
+# ==============================
+# 调用链导出：Chrome Trace Event 与关键路径
+# ==============================
+# Chrome Trace Event JSON 可直接在 Perfetto（ui.perfetto.dev）或 chrome://tracing 中打开，
+# 每个线程 / asyncio 任务一条轨道，跨轨道的父子关系以 flow 箭头连接。
+
+# span 起始取墙钟、时长取单调时钟，子 span 的结束时刻可能略晚于父 span
+_CLOCK_TOLERANCE = 1e-4
+
+
+def session_spans(session_stats: Any, exporter: InMemorySpanExporter) -> List[Span]:
+    """返回 function_monitor 会话（session_stats）根 span 及其全部后代 span"""
+    root = getattr(session_stats, "span", None)
+    if root is None or not root.recording:
+        raise ValueError(
+            "会话没有记录调用链，请在调用前通过 Tracer.add_exporter 注册 InMemorySpanExporter"
+        )
+    spans = []
+    for span in exporter.get_spans(root.trace_id):
+        ancestor = span
+        while ancestor is not None and ancestor is not root:
+            ancestor = ancestor.parent
+        if ancestor is root:
+            spans.append(span)
+    return spans
+
+
+def _track_key(span: Span) -> Tuple[Any, Optional[str]]:
+    return span.thread_id, span.task_name
+
+
+def _track_name(span: Span) -> str:
+    if span.task_name:
+        return f"{span.task_name} ({span.thread_name})"
+    return span.thread_name
+
+
+def to_chrome_trace(spans: List[Span]) -> Dict[str, Any]:
+    """转换为 Chrome Trace Event 格式，时间戳为相对最早 span 的微秒数"""
+    if not spans:
+        return {"traceEvents": [], "displayTimeUnit": "ms"}
+    pid = os.getpid()
+    origin = min(span.start_time for span in spans)
+    ordered = sorted(spans, key=lambda span: (span.start_time, -span.duration))
+    tracks: Dict[Tuple[Any, Optional[str]], int] = {}
+    events: List[Dict[str, Any]] = []
+    for span in ordered:
+        key = _track_key(span)
+        if key not in tracks:
+            tracks[key] = len(tracks) + 1
+            events.append(
+                {
+                    "ph": "M",
+                    "name": "thread_name",
+                    "pid": pid,
+                    "tid": tracks[key],
+                    "args": {"name": _track_name(span)},
+                }
+            )
+            events.append(
+                {
+                    "ph": "M",
+                    "name": "thread_sort_index",
+                    "pid": pid,
+                    "tid": tracks[key],
+                    "args": {"sort_index": tracks[key]},
+                }
+            )
+
+    by_id = {span.span_id: span for span in spans}
+    for flow_id, span in enumerate(ordered):
+        tid = tracks[_track_key(span)]
+        ts = (span.start_time - origin) * 1e6
+        args = dict(span.attributes, status=span.status)
+        if span.error:
+            args["error"] = span.error
+        events.append(
+            {
+                "ph": "X",
+                "name": span.name,
+                "cat": span.attributes.get("kind", "phase"),
+                "pid": pid,
+                "tid": tid,
+                "ts": ts,
+                "dur": span.duration * 1e6,
+                "args": args,
+            }
+        )
+        # 子 span 在其他线程 / 任务上执行时，从父 span 所在轨道画一条 flow 箭头
+        parent = by_id.get(span.parent_id)
+        if parent is not None and _track_key(parent) != _track_key(span):
+            parent_tid = tracks[_track_key(parent)]
+            events.append(
+                {
+                    "ph": "s",
+                    "name": "spawn",
+                    "cat": "flow",
+                    "id": flow_id,
+                    "pid": pid,
+                    "tid": parent_tid,
+                    "ts": ts,
+                }
+            )
+            events.append(
+                {
+                    "ph": "f",
+                    "bp": "e",
+                    "name": "spawn",
+                    "cat": "flow",
+                    "id": flow_id,
+                    "pid": pid,
+                    "tid": tid,
+                    "ts": ts,
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(spans: List[Span], path: str) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as trace_file:
+        json.dump(to_chrome_trace(spans), trace_file, ensure_ascii=False, default=str)
+
+
+def _children_map(spans: List[Span]) -> Dict[Optional[str], List[Span]]:
+    children = defaultdict(list)
+    for span in spans:
+        children[span.parent_id].append(span)
+    return children
+
+
+def _critical_children(span: Span, children: List[Span]) -> List[Span]:
+    """从父 span 结束时刻往前，依次选取在当前时刻之前最晚结束的子 span"""
+    path = []
+    cursor = span.end_time
+    for child in sorted(children, key=lambda child: child.end_time, reverse=True):
+        if child.end_time <= cursor + _CLOCK_TOLERANCE:
+            path.append(child)
+            cursor = child.start_time
+    path.reverse()
+    return path
+
+
+def critical_path(spans: List[Span]) -> List[Tuple[Span, float]]:
+    """返回关键路径上的 span 及其自身耗时（不含关键路径上的子 span），按先后排列
+
+    关键路径从耗时最长的根 span 出发，逐层选取决定父 span 结束时刻的子 span 链；
+    不在关键路径上的 span 与关键路径并行执行，缩短它们不会缩短总耗时。
+    """
+    if not spans:
+        return []
+    ids = {span.span_id for span in spans}
+    roots = [span for span in spans if span.parent_id not in ids]
+    children = _children_map(spans)
+    path = []
+    stack = [max(roots, key=lambda span: span.duration)]
+    while stack:
+        span = stack.pop()
+        on_path = _critical_children(span, children[span.span_id])
+        path.append((span, span.duration - sum(child.duration for child in on_path)))
+        stack.extend(reversed(on_path))
+    return path
+
+
+def _span_label(span: Span) -> str:
+    attributes = span.attributes
+    if "attempt" in attributes:
+        return f"{span.name}#{attributes['attempt']}"
+    if "verifier" in attributes:
+        return f"{span.name}[{attributes['verifier']}]"
+    if "sample" in attributes:
+        return f"{span.name}#{attributes['sample']}"
+    return span.name
+
+
+def _span_path(span: Span, root: Span) -> str:
+    labels = []
+    while span is not None and span is not root:
+        labels.append(_span_label(span))
+        span = span.parent
+    return " > ".join(reversed(labels))
+
+
+def format_critical_path(spans: List[Span], top_n: int = 10) -> str:
+    """关键路径摘要：总耗时、并行度与自身耗时最长的 top_n 个关键路径 span"""
+    path = critical_path(spans)
+    if not path:
+        return "没有可分析的 span"
+    root = path[0][0]
+    total = root.duration
+    children = _children_map(spans)
+    leaf_time = sum(span.duration for span in spans if not children[span.span_id])
+    lines = [
+        f"关键路径: {_span_label(root)} 总耗时 {total:.3f}s，关键路径上 {len(path)} 个 span；"
+        f"叶子 span 耗时合计 {leaf_time:.3f}s（平均并行度 {leaf_time / total if total else 0:.2f}）",
+        f"关键路径自身耗时 Top {top_n}:",
+    ]
+    slowest = sorted(path, key=lambda item: item[1], reverse=True)[:top_n]
+    for rank, (span, self_time) in enumerate(slowest, 1):
+        share = self_time / total if total else 0
+        lines.append(
+            f"{rank:>3}. {self_time:8.3f}s {share:6.1%}  "
+            f"{_span_path(span, root) or _span_label(root)}  @{_track_name(span)}"
+        )
+    return "\n".join(lines)
+
+
+def export_session_trace(
+    session_stats: Any,
+    exporter: InMemorySpanExporter,
+    path: str,
+    top_n: int = 10,
+) -> str:
+    """将 function_monitor 会话导出为 Chrome Trace Event JSON，并输出关键路径摘要"""
+    spans = session_spans(session_stats, exporter)
+    write_chrome_trace(spans, path)
+    summary = format_critical_path(spans, top_n)
+    logger.info(f"调用链已导出到 {path}\n{summary}")
+    return summary
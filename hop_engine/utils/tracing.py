@@ -0,0 +1,261 @@
+import asyncio
+import contextvars
+import json
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# ==============================
+# 调用链追踪
+# ==============================
+# 算子调用按阶段拆分为 span：算子 -> 尝试 -> prompt 构建 / 生成 / 解析 / 核验 -> LLM 调用 -> 单次请求，
+# 当前 span 存储在 contextvars 中，协程与通过 submit_with_context 提交的线程任务自动继承父 span。
+# 未注册导出器时 Tracer.span 返回共享的空 span，不分配对象、不读取时钟。
+
+
+class Span:
+    """一次阶段调用，退出时交给已注册的导出器"""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "parent",
+        "attributes",
+        "start_time",
+        "end_time",
+        "status",
+        "error",
+        "thread_id",
+        "thread_name",
+        "task_name",
+        "_start",
+        "_token",
+    )
+
+    recording = True
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else "%032x" % random.getrandbits(128)
+        self.span_id = "%016x" % random.getrandbits(64)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_time = 0.0
+        self.end_time = 0.0
+        self.status = "ok"
+        self.error = None
+        thread = threading.current_thread()
+        self.thread_id = thread.ident
+        self.thread_name = thread.name
+        self.task_name = _current_task_name()
+        self._start = 0.0
+        self._token = None
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def add(self, key: str, value: float) -> None:
+        self.attributes[key] = self.attributes.get(key, 0) + value
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        # 起止时间取墙钟，时长取单调时钟，避免系统时间调整导致时长为负
+        self.end_time = self.start_time + time.perf_counter() - self._start
+        if exc_type is not None:
+            self.status = "error"
+            self.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self._token = None
+        Tracer._export(self)
+        return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": self.duration,
+            "status": self.status,
+            "error": self.error,
+            "thread_id": self.thread_id,
+            "thread_name": self.thread_name,
+            "task_name": self.task_name,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """追踪关闭时使用的空 span，所有操作均为空操作"""
+
+    __slots__ = ()
+
+    recording = False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes) -> None:
+        pass
+
+    def add(self, key: str, value: float) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def _current_task_name() -> Optional[str]:
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return None
+    return task.get_name() if task is not None else None
+
+
+class SpanExporter:
+    """span 导出器基类，export 在 span 结束的线程中同步调用，实现需线程安全且尽量轻量"""
+
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """在内存中保留最近 max_spans 个 span，用于测试与进程内分析"""
+
+    def __init__(self, max_spans: int = 10000):
+        self._spans: Deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def get_spans(self, trace_id: Optional[str] = None) -> List[Span]:
+        """按结束先后返回 span，指定 trace_id 时只返回该调用链"""
+        spans = list(self._spans)
+        if trace_id is None:
+            return spans
+        return [span for span in spans if span.trace_id == trace_id]
+
+    def clear(self) -> None:
+        self._spans.clear()
+
+
+class JsonlSpanExporter(SpanExporter):
+    """每个 span 结束时追加一行 JSON 到文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+                self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class Tracer:
+    """span 的创建与导出入口，注册至少一个导出器后开启追踪"""
+
+    # 写时复制，导出时无需加锁
+    _exporters: Tuple[SpanExporter, ...] = ()
+    _lock = threading.Lock()
+    _accumulate_lock = threading.Lock()
+
+    @classmethod
+    def add_exporter(cls, exporter: SpanExporter) -> SpanExporter:
+        with cls._lock:
+            cls._exporters = cls._exporters + (exporter,)
+        return exporter
+
+    @classmethod
+    def remove_exporter(cls, exporter: SpanExporter) -> None:
+        with cls._lock:
+            cls._exporters = tuple(e for e in cls._exporters if e is not exporter)
+        exporter.shutdown()
+
+    @classmethod
+    def clear_exporters(cls) -> None:
+        with cls._lock:
+            exporters, cls._exporters = cls._exporters, ()
+        for exporter in exporters:
+            exporter.shutdown()
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return bool(cls._exporters)
+
+    @classmethod
+    def span(cls, name: str, **attributes):
+        """创建当前 span 的子 span，作为上下文管理器使用；追踪关闭时返回空 span"""
+        if not cls._exporters:
+            return NOOP_SPAN
+        return Span(name, _current_span.get(), attributes)
+
+    @classmethod
+    def current_span(cls):
+        return _current_span.get() or NOOP_SPAN
+
+    @classmethod
+    def set_attributes(cls, **attributes) -> None:
+        span = _current_span.get()
+        if span is not None:
+            span.attributes.update(attributes)
+
+    @classmethod
+    def accumulate(cls, **values: float) -> None:
+        """累加到当前 span 及其所有祖先 span，用于 token 数等需要逐层汇总的计数"""
+        span = _current_span.get()
+        if span is None:
+            return
+        # 一致性核验的并发采样会同时累加到共同的祖先 span
+        with cls._accumulate_lock:
+            while span is not None:
+                for key, value in values.items():
+                    span.attributes[key] = span.attributes.get(key, 0) + value
+                span = span.parent
+
+    @classmethod
+    def _export(cls, span: Span) -> None:
+        for exporter in cls._exporters:
+            exporter.export(span)
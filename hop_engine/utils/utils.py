@@ -1,10 +1,14 @@
 from pydantic import BaseModel, create_model, ValidationError, Field
-from typing import List, Any, Type
+from pydantic.fields import FieldInfo
+from typing import List, Any, Type, Dict, Iterable, Optional
+from collections import OrderedDict
 import re
 import logging
 import json
 import ast
 import inspect
+import threading
+from hop_engine.config.constants import SAFETY_TOKENS
 
 
 class LoggerUtils:
@@ -35,19 +39,165 @@ class LoggerUtils:
         return cls._logger
 
 
+# 越狱 TOKEN 表，导入时构建一次；长 TOKEN 优先，避免被其前缀截断匹配
+_SAFETY_TOKENS = tuple(sorted(SAFETY_TOKENS, key=len, reverse=True))
+
+
+def sanitize_text(text: str) -> str:
+    """过滤越狱 TOKEN，重复匹配直到不再出现（删除后拼接出的新 TOKEN 也会被过滤）
+
+    使用 C 实现的子串查找而非正则多选匹配：后者逐字符匹配，在长文本上慢数倍。
+    绝大多数文本不含越狱 TOKEN，只做查找、不产生字符串拷贝。
+    """
+    while True:
+        found = [token for token in _SAFETY_TOKENS if token in text]
+        if not found:
+            return text
+        for token in found:
+            text = text.replace(token, "")
+
+
+def sanitize_texts(texts: Iterable[str]) -> List[str]:
+    """批量过滤越狱 TOKEN"""
+    return [sanitize_text(text) for text in texts]
+
+
+class JSONPayloadError(ValueError):
+    """模型输出中找不到可解析的 JSON，区别于 JSON 合法但不符合模型定义的校验失败"""
+
+
 def safe_json_parse(s: str, model: Type[BaseModel]) -> BaseModel:
     """
     安全解析并验证JSON字符串到指定Pydantic模型
+
+    定位 JSON 片段后直接交给 model_validate_json，解析与校验一次完成，不再 loads/dumps 往返；
+    找不到合法 JSON 时抛出 JSONPayloadError，JSON 合法但校验失败时抛出 ValueError
     """
+    return _validate_json(_json_segment(s), model)
+
+
+def repair_json_parse(s: str, model: Type[BaseModel]) -> BaseModel:
+    """
+    对接近合法的 JSON 做确定性修复后再校验，用于 safe_json_parse 失败后、触发重试前
+
+    修复项：尾随逗号、Python 风格的 True/False/None、单引号字符串；
+    被截断的输出不做补全，交由重试重新生成
+    """
+    segment = _json_segment(s)
+    starts = [i for i in (segment.find("{"), segment.find("[")) if i >= 0]
+    if not starts:
+        raise JSONPayloadError("JSON修复失败: 未找到JSON内容")
+    return _validate_json(_repair_json_text(segment[min(starts) :]), model)
+
+
+def _validate_json(text: str, model: Type[BaseModel]) -> BaseModel:
+    """整体校验失败且原因是 JSON 不合法时，截取第一个完整的 JSON 值再校验一次"""
     try:
-        cleaned_json = extract_json_from_string(s)
-        return model.model_validate_json(cleaned_json)
+        return model.model_validate_json(text)
+    except ValidationError as e:
+        if not _is_json_error(e):
+            raise ValueError("Validation failed {}".format(e)) from e
+    try:
+        text = _scan_json(text)
     except json.JSONDecodeError as e:
-        raise ValueError("Invalid JSON format{}".format(e)) from e
+        raise JSONPayloadError(f"无法解析JSON内容: {str(e)}") from e
+    try:
+        return model.model_validate_json(text)
     except ValidationError as e:
         raise ValueError("Validation failed {}".format(e)) from e
 
 
+def _is_json_error(error: ValidationError) -> bool:
+    return any(detail["type"] == "json_invalid" for detail in error.errors())
+
+
+_JSON_FENCE = "```json"
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _json_segment(s: str) -> str:
+    """去掉 </think> 及其后的内容、```json 围栏前的内容与首尾的 Markdown 围栏标记"""
+    think = s.find("</think>")
+    if think >= 0:
+        s = s[:think]
+    fence = s.find(_JSON_FENCE)
+    if fence >= 0:
+        s = s[fence + len(_JSON_FENCE) :]
+    s = s.strip()
+    if s.startswith("```"):
+        s = s[3:].lstrip()
+    if s.endswith("```"):
+        s = s[:-3].rstrip()
+    return s
+
+
+def _scan_json(text: str) -> str:
+    """从第一个 { 或 [ 起截取一个完整 JSON 值的文本，忽略前后多余文本"""
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+    start = min(starts)
+    _, end = _JSON_DECODER.raw_decode(text, start)
+    return text[start:end]
+
+
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _repair_json_text(text: str) -> str:
+    """单次扫描修复 JSON 文本，只改动字符串之外的结构，字符串内容保持原样
+
+    未闭合的字符串与括号原样保留，截断的输出修复后仍无法解析
+    """
+    out = []
+    quote = None  # 当前所在字符串的引号，None 表示不在字符串内
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if quote is not None:
+            if ch == "\\" and i + 1 < n:
+                # 单引号字符串中的 \' 在 JSON 中无需转义
+                nxt = text[i + 1]
+                out.append(nxt if quote == "'" and nxt == "'" else ch + nxt)
+                i += 2
+                continue
+            if ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "}]":
+            _strip_trailing_comma(out)
+            out.append(ch)
+        elif ch.isalpha() or ch == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(ch)
+        i += 1
+    return "".join(out)
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ",":
+        out.pop()
+
+
 def extract_json_from_string(s: str) -> str:
     """
     从混合内容中分离思考过程和JSON数据（返回元组：思考内容, 清理后的JSON）
@@ -90,11 +240,135 @@ def extract_json_from_string(s: str) -> str:
         raise ValueError(f"无法解析JSON内容: {str(e)}")
 
 
+class ResponseModelCache:
+    """动态响应模型与 JSON Schema 缓存
+
+    相同 return_format 重复调用时复用已编译的 pydantic 模型（含其校验器）与 JSON Schema，
+    避免每次调用重新 create_model / model_json_schema。按最近最少使用淘汰。
+    """
+
+    max_entries = 4096
+
+    _lock = threading.Lock()
+    _models: "OrderedDict[Any, Type[BaseModel]]" = OrderedDict()
+    _schemas: "OrderedDict[Type[BaseModel], dict]" = OrderedDict()
+    _stats = {
+        "model_hits": 0,
+        "model_misses": 0,
+        "schema_hits": 0,
+        "schema_misses": 0,
+        "uncacheable": 0,
+    }
+
+    @classmethod
+    def _get(cls, store: OrderedDict, key: Any, stat: str) -> Optional[Any]:
+        with cls._lock:
+            value = store.get(key)
+            if value is None:
+                cls._stats[f"{stat}_misses"] += 1
+                return None
+            store.move_to_end(key)
+            cls._stats[f"{stat}_hits"] += 1
+            return value
+
+    @classmethod
+    def _put(cls, store: OrderedDict, key: Any, value: Any) -> Any:
+        with cls._lock:
+            # 并发未命中时保留先写入的对象，保证同一 key 始终返回同一个模型
+            value = store.setdefault(key, value)
+            store.move_to_end(key)
+            while len(store) > cls.max_entries:
+                store.popitem(last=False)
+            return value
+
+    @classmethod
+    def get_model(cls, key: Any) -> Optional[Type[BaseModel]]:
+        return cls._get(cls._models, key, "model")
+
+    @classmethod
+    def put_model(cls, key: Any, model: Type[BaseModel]) -> Type[BaseModel]:
+        return cls._put(cls._models, key, model)
+
+    @classmethod
+    def get_schema(cls, model: Type[BaseModel]) -> dict:
+        schema = cls._get(cls._schemas, model, "schema")
+        if schema is None:
+            schema = cls._put(cls._schemas, model, model.model_json_schema())
+        return schema
+
+    @classmethod
+    def mark_uncacheable(cls):
+        with cls._lock:
+            cls._stats["uncacheable"] += 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats["models"] = len(cls._models)
+            stats["schemas"] = len(cls._schemas)
+        return stats
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._models.clear()
+            cls._schemas.clear()
+
+
+def _canonical_format(value: Any) -> Any:
+    """将 return_format 转为可哈希的规范形式，字段顺序影响生成的模型，保持原顺序"""
+    if isinstance(value, dict):
+        return ("dict", tuple((k, _canonical_format(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return ("list", tuple(_canonical_format(v) for v in value))
+    if isinstance(value, tuple):
+        return ("tuple", tuple(_canonical_format(v) for v in value))
+    if isinstance(value, FieldInfo):
+        return ("field", repr(value))
+    hash(value)
+    return value
+
+
+def get_json_schema(model: Type[BaseModel]) -> dict:
+    """获取模型的 JSON Schema（缓存），返回值为共享对象，不要修改"""
+    return ResponseModelCache.get_schema(model)
+
+
 def create_response_format_model(
     model_name: str,
     return_format: Any = None,
     explanation_description: str = "对于输出结果的解释",
 ) -> Type[BaseModel]:
+    """按 return_format 创建响应模型，相同参数复用缓存的模型"""
+    try:
+        key = (
+            model_name,
+            _canonical_format(return_format),
+            explanation_description,
+        )
+    except TypeError:
+        # 含不可哈希的取值时不缓存
+        ResponseModelCache.mark_uncacheable()
+        return _build_response_format_model(
+            model_name, return_format, explanation_description
+        )
+    model = ResponseModelCache.get_model(key)
+    if model is None:
+        model = ResponseModelCache.put_model(
+            key,
+            _build_response_format_model(
+                model_name, return_format, explanation_description
+            ),
+        )
+    return model
+
+
+def _build_response_format_model(
+    model_name: str,
+    return_format: Any = None,
+    explanation_description: str = "对于输出结果的解释",
+) -> Type[BaseModel]:
 
     explanation_field = (str, Field(..., description=explanation_description))
 
@@ -1,4 +1,4 @@
-from hop_engine.config.constants import TOOL_DOMAINS
+from hop_engine.config.constants import PROMPT_LAYOUT_DEFAULT, TOOL_DOMAINS
 from hop_engine.config.constants import JsonValue, HopStatus
 from hop_engine.prompts.prompt_strategies import (
     HopReverseVerifyStrategy,
@@ -7,18 +7,27 @@ from hop_engine.prompts.prompt_strategies import (
     MulVeriPromptStrategy,
     PlusVeriPromptStrategy,
 )
+from hop_engine.callers.async_llm import AsyncLLM
 from hop_engine.callers.llm import LLM
+from hop_engine.utils.status_recorder import submit_with_context
+from hop_engine.utils.tracing import Tracer
 from hop_engine.utils.utils import (
     create_response_format_model,
+    get_json_schema,
     safe_json_parse,
     LoggerUtils,
 )
-from typing import List, Optional, Literal, Type
+from typing import Awaitable, Callable, List, Optional, Literal, Tuple, Type
 from qwen_agent.tools.base import BaseTool, register_tool, TOOL_REGISTRY
 
 from pydantic import BaseModel
-from dataclasses import dataclass
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import islice
+import asyncio
 import json
+import threading
 
 logger = LoggerUtils.get_logger()
 
@@ -36,22 +45,91 @@ class VerifyContext:
     tool_domain: str  # 工具域 用于工具核验
     response_format: Optional[Type[BaseModel]]
     verify_llm: LLM  # 验证用LLM实例
+    async_verify_llm: Optional[AsyncLLM] = None  # 异步核验使用的LLM实例
+    prompt_layout: str = PROMPT_LAYOUT_DEFAULT  # 核验 prompt 布局，与算子一致
 
 
-def reverse_verify(
-    task: str, context: str, model_result: JsonValue, ctx: VerifyContext
-) -> HopVerifyResult:
+# 正向交叉/工具核验的一致性阈值
+CONSENSUS_STATUS_MAPPING = [
+    (0.7, HopStatus.OK),  # ≥70%匹配
+    (0.4, HopStatus.UNCERTAIN),  # ≥40%匹配
+    (0, HopStatus.FAIL),  # <40%
+]
+
+
+@dataclass
+class ConsensusConfig:
+    """正向交叉/工具核验的采样配置
+
+    按调用定制时通过 functools.partial 传入，例如：
+        verifier=partial(forward_cross_verify, consensus=ConsensusConfig(samples=5))
+    """
+
+    samples: int = 3  # 采样次数
+    status_mapping: List[Tuple[float, HopStatus]] = field(
+        default_factory=lambda: list(CONSENSUS_STATUS_MAPPING)
+    )  # (最低匹配比例, 状态)，按比例从高到低排列
+    early_stop: bool = True  # 结果已确定时提前结束并取消剩余采样
+    # 同时在途的采样数，为空时一次发起全部采样；
+    # 调小可在提前结束时少发请求，代价是采样分批进行
+    max_in_flight: Optional[int] = None
+
+
+# 同步一致性核验采样共享的线程池上限，所有核验调用共用；
+# 线程池已满时采样在调用方线程中执行，核验并发度不低于调用核验的线程数
+SAMPLE_EXECUTOR_WORKERS = 32
+_sample_executor: Optional[ThreadPoolExecutor] = None
+_sample_executor_lock = threading.Lock()
+_sample_slots = threading.BoundedSemaphore(SAMPLE_EXECUTOR_WORKERS)
+
+
+def _get_sample_executor() -> ThreadPoolExecutor:
+    global _sample_executor
+    if _sample_executor is None:
+        with _sample_executor_lock:
+            if _sample_executor is None:
+                _sample_executor = ThreadPoolExecutor(
+                    max_workers=SAMPLE_EXECUTOR_WORKERS,
+                    thread_name_prefix="hop-verify-sample",
+                )
+    return _sample_executor
+
+
+def _submit_sample(sample: Callable[[int], Optional[str]], attempt: int) -> Future:
+    """提交一次采样到共享线程池，线程池已满时在调用方线程中执行并返回已完成的 Future"""
+    if not _sample_slots.acquire(blocking=False):
+        future = Future()
+        try:
+            future.set_result(_traced_sample(sample, attempt))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    # 复制调用方上下文，使采样线程中的指标归属到当前算子
+    future = submit_with_context(
+        _get_sample_executor(), _traced_sample, sample, attempt
+    )
+    # 完成或被取消时归还名额
+    future.add_done_callback(lambda _: _sample_slots.release())
+    return future
 
+
+def _build_reverse_verify_prompt(
+    task: str, context: str, model_result: JsonValue, ctx: VerifyContext
+):
     hop_status_dict = {status.name: status for status in HopStatus}
     hop_status_desc_dict = {status.name: status.description for status in HopStatus}
 
     strategy = (
-        HopReverseProcessVerifyStrategy()
+        HopReverseProcessVerifyStrategy(ctx.prompt_layout)
         if ctx.think
-        else HopReverseNoProcessVerifyStrategy()
+        else HopReverseNoProcessVerifyStrategy(ctx.prompt_layout)
     )
 
-    full_context = f"{context}\n{hop_status_desc_dict}\nTask: {task}"
+    if ctx.prompt_layout == PROMPT_LAYOUT_DEFAULT:
+        full_context = f"{context}\n{hop_status_desc_dict}\nTask: {task}"
+    else:
+        # 静态的状态说明置于上下文之前，同一上下文的核验请求共享更长的前缀
+        full_context = f"{hop_status_desc_dict}\n{context}\nTask: {task}"
 
     response_format = create_response_format_model(
         "HOPVerifyReasoning", return_format=Literal[tuple(hop_status_dict.keys())]
@@ -61,12 +139,14 @@ def reverse_verify(
         context=full_context,
         think=ctx.think or "",
         conclusion=model_result,
-        return_format=str(response_format.model_json_schema()),
+        return_format=str(get_json_schema(response_format)),
     )
+    return verify_prompt, response_format, hop_status_dict
 
-    success, raw_response = ctx.verify_llm.query_llm(
-        verify_prompt, response_format=response_format, temperature=0.1, max_tokens=2000
-    )
+
+def _parse_reverse_verify_response(
+    success: bool, raw_response, response_format, hop_status_dict
+) -> HopVerifyResult:
     if not success:
         return HopVerifyResult(HopStatus.FAIL, f"LLM调用失败: {raw_response}")
     try:
@@ -86,55 +166,328 @@ def reverse_verify(
     )
 
 
-def forward_cross_verify(
+def reverse_verify(
     task: str, context: str, model_result: JsonValue, ctx: VerifyContext
 ) -> HopVerifyResult:
-    params = {
+    verify_prompt, response_format, hop_status_dict = _build_reverse_verify_prompt(
+        task, context, model_result, ctx
+    )
+    success, raw_response = ctx.verify_llm.query_llm(
+        verify_prompt, response_format=response_format, temperature=0.1, max_tokens=2000
+    )
+    return _parse_reverse_verify_response(
+        success, raw_response, response_format, hop_status_dict
+    )
+
+
+async def reverse_verify_async(
+    task: str, context: str, model_result: JsonValue, ctx: VerifyContext
+) -> HopVerifyResult:
+    verify_prompt, response_format, hop_status_dict = _build_reverse_verify_prompt(
+        task, context, model_result, ctx
+    )
+    success, raw_response = await ctx.async_verify_llm.query_llm(
+        verify_prompt, response_format=response_format, temperature=0.1, max_tokens=2000
+    )
+    return _parse_reverse_verify_response(
+        success, raw_response, response_format, hop_status_dict
+    )
+
+
+def _consensus_status(
+    match_count: int, total: int, status_mapping: List[Tuple[float, HopStatus]]
+) -> Optional[HopStatus]:
+    for threshold, status in status_mapping:
+        if (match_count / total if total > 0 else 0) >= threshold:
+            return status
+    return None
+
+
+def _consensus_result(
+    match_count: int,
+    total: int,
+    reason: str,
+    status_mapping: List[Tuple[float, HopStatus]] = CONSENSUS_STATUS_MAPPING,
+) -> HopVerifyResult:
+    status = _consensus_status(match_count, total, status_mapping)
+    if status is not None:
+        return HopVerifyResult(
+            status=status, reason=f"{reason} ({match_count}/{total})"
+        )
+
+    return HopVerifyResult(HopStatus.FAIL, "无法确定验证状态")
+
+
+def _settled_status(
+    matches: int,
+    misses: int,
+    remaining: int,
+    status_mapping: List[Tuple[float, HopStatus]],
+) -> Optional[HopStatus]:
+    """剩余采样无论匹配、不匹配或调用失败，最终状态都不变时返回该状态，否则返回 None"""
+    settled = _consensus_status(matches, matches + misses, status_mapping)
+    for extra_matches in range(remaining + 1):
+        for extra_misses in range(remaining - extra_matches + 1):
+            total = matches + extra_matches + misses + extra_misses
+            status = _consensus_status(matches + extra_matches, total, status_mapping)
+            if status != settled:
+                return None
+    return settled
+
+
+def _tally_consensus(
+    results: List[Optional[str]],
+    is_match: Callable[[str], bool],
+    reason: str,
+    config: ConsensusConfig,
+) -> HopVerifyResult:
+    valid_results = [result for result in results if result is not None]
+    match_count = len([result for result in valid_results if is_match(result)])
+    return _consensus_result(
+        match_count, len(valid_results), reason, config.status_mapping
+    )
+
+
+def _batch_sampler(llm: LLM, params: dict, parse_sample: Callable):
+    """引擎支持 n 参数时返回单请求多候选的采样函数，否则返回 None"""
+    if not llm.supports_n:
+        return None
+
+    def batch_sample(n: int):
+        success, raw_responses = llm.query_llm_multi(n=n, **params)
+        if not success:
+            logger.error(f"多候选验证调用失败，回退为逐次采样: {raw_responses}")
+            return None
+        return [
+            parse_sample(attempt, True, raw_response)
+            for attempt, raw_response in enumerate(raw_responses)
+        ]
+
+    return batch_sample
+
+
+def _batch_sampler_async(llm: AsyncLLM, params: dict, parse_sample: Callable):
+    if not llm.supports_n:
+        return None
+
+    async def batch_sample(n: int):
+        success, raw_responses = await llm.query_llm_multi(n=n, **params)
+        if not success:
+            logger.error(f"多候选验证调用失败，回退为逐次采样: {raw_responses}")
+            return None
+        return [
+            parse_sample(attempt, True, raw_response)
+            for attempt, raw_response in enumerate(raw_responses)
+        ]
+
+    return batch_sample
+
+
+def _traced_sample(sample: Callable[[int], Optional[str]], attempt: int):
+    with Tracer.span("verify.sample", sample=attempt):
+        return sample(attempt)
+
+
+async def _traced_sample_async(
+    sample: Callable[[int], Awaitable[Optional[str]]], attempt: int
+):
+    with Tracer.span("verify.sample", sample=attempt):
+        return await sample(attempt)
+
+
+def _collect_consensus(
+    sample: Callable[[int], Optional[str]],
+    is_match: Callable[[str], bool],
+    consensus: Optional[ConsensusConfig],
+    reason: str,
+    batch_sample: Optional[Callable[[int], Optional[List[Optional[str]]]]] = None,
+) -> HopVerifyResult:
+    """在共享线程池中并发采样，结果确定后立即返回并取消尚未发出的采样
+
+    线程池已满时采样在当前线程中逐个执行。
+    同时在途的采样数不超过 max_in_flight；提前结束时已发出的同步请求无法中断，
+    会在后台执行完成（仍占用限流额度），结果丢弃。
+    提供 batch_sample 时优先单次请求取回全部候选，失败再回退为逐次采样。
+    """
+    config = consensus or ConsensusConfig()
+    if batch_sample is not None and config.samples > 1:
+        with Tracer.span("verify.batch", n=config.samples):
+            results = batch_sample(config.samples)
+        if results is not None:
+            return _tally_consensus(results, is_match, reason, config)
+    matches = misses = 0
+    remaining = config.samples
+    attempts = iter(range(config.samples))
+
+    def submit(count: int) -> set:
+        return {_submit_sample(sample, attempt) for attempt in islice(attempts, count)}
+
+    pending = submit(config.max_in_flight or config.samples)
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                remaining -= 1
+                result = future.result()
+                if result is not None:
+                    if is_match(result):
+                        matches += 1
+                    else:
+                        misses += 1
+            if (
+                config.early_stop
+                and remaining
+                and _settled_status(matches, misses, remaining, config.status_mapping)
+                is not None
+            ):
+                logger.info(
+                    f"一致性核验提前结束，剩余 {remaining} 次采样不再等待"
+                    f"（其中 {len(pending)} 次已发出，执行完成后丢弃）"
+                )
+                Tracer.set_attributes(samples_cancelled=remaining)
+                break
+            pending |= submit(len(done))
+    finally:
+        # 仅取消排队中的采样，已开始的同步请求无法中断
+        for future in pending:
+            future.cancel()
+    return _consensus_result(matches, matches + misses, reason, config.status_mapping)
+
+
+async def _collect_consensus_async(
+    sample: Callable[[int], Awaitable[Optional[str]]],
+    is_match: Callable[[str], bool],
+    consensus: Optional[ConsensusConfig],
+    reason: str,
+    batch_sample: Optional[
+        Callable[[int], Awaitable[Optional[List[Optional[str]]]]]
+    ] = None,
+) -> HopVerifyResult:
+    """异步版本：同时在途的采样数不超过 max_in_flight，结果确定后取消仍在进行中的采样协程"""
+    config = consensus or ConsensusConfig()
+    if batch_sample is not None and config.samples > 1:
+        with Tracer.span("verify.batch", n=config.samples):
+            results = await batch_sample(config.samples)
+        if results is not None:
+            return _tally_consensus(results, is_match, reason, config)
+    matches = misses = 0
+    remaining = config.samples
+    attempts = iter(range(config.samples))
+
+    def submit(count: int) -> set:
+        return {
+            asyncio.ensure_future(_traced_sample_async(sample, attempt))
+            for attempt in islice(attempts, count)
+        }
+
+    pending = submit(config.max_in_flight or config.samples)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                remaining -= 1
+                result = task.result()
+                if result is not None:
+                    if is_match(result):
+                        matches += 1
+                    else:
+                        misses += 1
+            if (
+                config.early_stop
+                and remaining
+                and _settled_status(matches, misses, remaining, config.status_mapping)
+                is not None
+            ):
+                logger.info(f"一致性核验提前结束，剩余 {remaining} 次采样已取消")
+                Tracer.set_attributes(samples_cancelled=remaining)
+                break
+            pending |= submit(len(done))
+    finally:
+        for task in pending:
+            task.cancel()
+    return _consensus_result(matches, matches + misses, reason, config.status_mapping)
+
+
+def _cross_verify_params(ctx: VerifyContext) -> dict:
+    return {
         "messages": ctx.messages,
         "temperature": 0.3,
         "response_format": ctx.response_format,
         "max_tokens": 2000,
     }
-    reference_results = []
-    for attempt in range(3):
-        success, raw_response = ctx.verify_llm.query_llm(**params)
 
-        if not success:
-            logger.error(f"第 {attempt+1} 次验证调用失败: {raw_response}")
-            continue
-        try:
-            if ctx.response_format:
-                parsed = safe_json_parse(str(raw_response), ctx.response_format)
-                result = parsed.final_answer
-            else:
-                result = raw_response
-            reference_results.append(
-                result.json() if isinstance(result, BaseModel) else result
-            )
-        except ValueError as e:
-            logger.error(f"结果解析失败: {str(e)}")
 
-    match_count = reference_results.count(model_result)
-    total = len(reference_results)
+def _parse_cross_sample(attempt: int, success: bool, raw_response, ctx: VerifyContext):
+    """解析一次正向交叉采样，失败返回 None"""
+    if not success:
+        logger.error(f"第 {attempt+1} 次验证调用失败: {raw_response}")
+        return None
+    try:
+        if ctx.response_format:
+            parsed = safe_json_parse(str(raw_response), ctx.response_format)
+            result = parsed.final_answer
+        else:
+            result = raw_response
+        return result.json() if isinstance(result, BaseModel) else result
+    except ValueError as e:
+        logger.error(f"结果解析失败: {str(e)}")
+        return None
+
 
-    status_mapping = [
-        (0.7, HopStatus.OK),  # ≥70%匹配
-        (0.4, HopStatus.UNCERTAIN),  # ≥40%匹配
-        (0, HopStatus.FAIL),  # <40%
-    ]
+def forward_cross_verify(
+    task: str,
+    context: str,
+    model_result: JsonValue,
+    ctx: VerifyContext,
+    consensus: Optional[ConsensusConfig] = None,
+) -> HopVerifyResult:
+    params = _cross_verify_params(ctx)
 
-    for threshold, status in status_mapping:
-        if (match_count / total if total > 0 else 0) >= threshold:
-            return HopVerifyResult(
-                status=status, reason=f"一致性验证 ({match_count}/{total})"
-            )
+    def parse_sample(attempt: int, success: bool, raw_response):
+        return _parse_cross_sample(attempt, success, raw_response, ctx)
 
-    return HopVerifyResult(HopStatus.FAIL, "无法确定验证状态")
+    def sample(attempt: int):
+        success, raw_response = ctx.verify_llm.query_llm(**params)
+        return parse_sample(attempt, success, raw_response)
+
+    return _collect_consensus(
+        sample,
+        lambda result: result == model_result,
+        consensus,
+        "一致性验证",
+        batch_sample=_batch_sampler(ctx.verify_llm, params, parse_sample),
+    )
 
 
-def tool_use_verifier(
-    task: str, context: str, model_result: JsonValue, ctx: VerifyContext
+async def forward_cross_verify_async(
+    task: str,
+    context: str,
+    model_result: JsonValue,
+    ctx: VerifyContext,
+    consensus: Optional[ConsensusConfig] = None,
 ) -> HopVerifyResult:
+    params = _cross_verify_params(ctx)
+
+    def parse_sample(attempt: int, success: bool, raw_response):
+        return _parse_cross_sample(attempt, success, raw_response, ctx)
+
+    async def sample(attempt: int):
+        success, raw_response = await ctx.async_verify_llm.query_llm(**params)
+        return parse_sample(attempt, success, raw_response)
+
+    return await _collect_consensus_async(
+        sample,
+        lambda result: result == model_result,
+        consensus,
+        "一致性验证",
+        batch_sample=_batch_sampler_async(ctx.async_verify_llm, params, parse_sample),
+    )
+
+
+def _check_tool_action(model_result: JsonValue, ctx: VerifyContext):
+    """工具合法性与参数检验，返回 (失败结果或None, action)"""
     tool_list = TOOL_DOMAINS[ctx.tool_domain]
     tool_use_dict = json.loads(str(model_result))
     action, action_input = tool_use_dict.get("action"), tool_use_dict.get(
@@ -142,50 +495,115 @@ def tool_use_verifier(
     )
     # action 存在校验
     if action not in tool_list:
-        return HopVerifyResult(HopStatus.FAIL, f"工具 {action} 不在可用范围内")
+        return HopVerifyResult(HopStatus.FAIL, f"工具 {action} 不在可用范围内"), action
     # action_input 参数检验
     tool_params = TOOL_REGISTRY[action].parameters
     for param in tool_params:
         if param["name"] not in action_input:
-            return HopVerifyResult(
-                HopStatus.FAIL, "action_input参数不合法，缺少参数{}".format(param["name"])
+            return (
+                HopVerifyResult(
+                    HopStatus.FAIL,
+                    "action_input参数不合法，缺少参数{}".format(param["name"]),
+                ),
+                action,
             )
-    # 正向交叉核验工具action选取
-    params = {
+    return None, action
+
+
+def _tool_verify_params(ctx: VerifyContext) -> dict:
+    return {
         "messages": ctx.messages,
         "temperature": 0.3,
         "max_tokens": 5000,
     }
-    reference_results = []
-    for attempt in range(3):
+
+
+def _parse_tool_sample(attempt: int, success: bool, raw_response):
+    if not success:
+        logger.error(f"第 {attempt+1} 次验证调用失败: {raw_response}")
+        return None
+    result = raw_response
+    return result.json() if isinstance(result, BaseModel) else result
+
+
+def tool_use_verifier(
+    task: str,
+    context: str,
+    model_result: JsonValue,
+    ctx: VerifyContext,
+    consensus: Optional[ConsensusConfig] = None,
+) -> HopVerifyResult:
+    failure, action = _check_tool_action(model_result, ctx)
+    if failure:
+        return failure
+    # 正向交叉核验工具action选取
+    params = _tool_verify_params(ctx)
+
+    def sample(attempt: int):
         success, raw_response = ctx.verify_llm.query_llm(**params)
+        return _parse_tool_sample(attempt, success, raw_response)
+
+    return _collect_consensus(
+        sample,
+        lambda result: action in result,
+        consensus,
+        "工具action核验成功",
+        batch_sample=_batch_sampler(ctx.verify_llm, params, _parse_tool_sample),
+    )
 
-        if not success:
-            logger.error(f"第 {attempt+1} 次验证调用失败: {raw_response}")
-            continue
 
-        result = raw_response
-        reference_results.append(
-            result.json() if isinstance(result, BaseModel) else result
-        )
+async def tool_use_verifier_async(
+    task: str,
+    context: str,
+    model_result: JsonValue,
+    ctx: VerifyContext,
+    consensus: Optional[ConsensusConfig] = None,
+) -> HopVerifyResult:
+    failure, action = _check_tool_action(model_result, ctx)
+    if failure:
+        return failure
+    params = _tool_verify_params(ctx)
+
+    async def sample(attempt: int):
+        success, raw_response = await ctx.async_verify_llm.query_llm(**params)
+        return _parse_tool_sample(attempt, success, raw_response)
+
+    return await _collect_consensus_async(
+        sample,
+        lambda result: action in result,
+        consensus,
+        "工具action核验成功",
+        batch_sample=_batch_sampler_async(
+            ctx.async_verify_llm, params, _parse_tool_sample
+        ),
+    )
 
-    match_cases = [result for result in reference_results if action in result]
-    match_count = len(match_cases)
-    total = len(reference_results)
 
-    status_mapping = [
-        (0.7, HopStatus.OK),  # ≥70%匹配
-        (0.4, HopStatus.UNCERTAIN),  # ≥40%匹配
-        (0, HopStatus.FAIL),  # <40%
-    ]
+# 内置核验器对应的异步实现，异步算子据此选择原生协程核验
+ASYNC_VERIFIERS = {
+    reverse_verify: reverse_verify_async,
+    forward_cross_verify: forward_cross_verify_async,
+    tool_use_verifier: tool_use_verifier_async,
+}
 
-    for threshold, status in status_mapping:
-        if (match_count / total if total > 0 else 0) >= threshold:
-            return HopVerifyResult(
-                status=status, reason=f"工具action核验成功 ({match_count}/{total})"
-            )
 
-    return HopVerifyResult(HopStatus.FAIL, "无法确定验证状态")
+def unwrap_verifier(verifier: Callable) -> Callable:
+    """取出 functools.partial 包装的原始核验函数"""
+    while isinstance(verifier, partial):
+        verifier = verifier.func
+    return verifier
+
+
+def resolve_async_verifier(verifier: Callable) -> Optional[Callable]:
+    """返回核验器的协程实现（保留 partial 绑定的参数），没有时返回 None"""
+    if isinstance(verifier, partial):
+        async_func = resolve_async_verifier(verifier.func)
+        if async_func is None:
+            return None
+        return partial(async_func, *verifier.args, **verifier.keywords)
+    if asyncio.iscoroutinefunction(verifier):
+        return verifier
+    return ASYNC_VERIFIERS.get(verifier)
 
 
 #### 场景自定义核验 ######
@@ -225,9 +643,7 @@ def plus_verifier(
     full_context = """
 数字1：{num1}
 数字2：{num2}
-""".format(
-        num1=num1, num2=num2
-    )
+""".format(num1=num1, num2=num2)
 
     response_format = create_response_format_model(
         "HOPVerifyReasoning", return_format=Literal[tuple(hop_status_dict.keys())]
@@ -235,7 +651,7 @@ def plus_verifier(
     verify_prompt = strategy.create_prompt(
         context=full_context,
         model_result=mul_result,
-        return_format=str(response_format.model_json_schema()),
+        return_format=str(get_json_schema(response_format)),
     )
 
     success, raw_response = ctx.verify_llm.query_llm(
@@ -277,9 +693,7 @@ def multation_verifier(
     full_context = """
 数字1：{num1}
 数字2：{num2}
-""".format(
-        num1=num1, num2=num2
-    )
+""".format(num1=num1, num2=num2)
 
     response_format = create_response_format_model(
         "HOPVerifyReasoning", return_format=Literal[tuple(hop_status_dict.keys())]
@@ -287,7 +701,7 @@ def multation_verifier(
     verify_prompt = strategy.create_prompt(
         context=full_context,
         model_result=mul_result,
-        return_format=str(response_format.model_json_schema()),
+        return_format=str(get_json_schema(response_format)),
     )
 
     success, raw_response = ctx.verify_llm.query_llm(
@@ -339,7 +753,7 @@ def phishing_judge_verifier(
 
     hop_status_dict = {"Passed": HopStatus.OK, "Not Passed": HopStatus.FAIL}
 
-    strategy = HopReverseVerifyStrategy()
+    strategy = HopReverseVerifyStrategy(ctx.prompt_layout)
 
     full_context = f"{context}\n"
 
@@ -353,7 +767,7 @@ def phishing_judge_verifier(
         task=str(task),
         context=full_context,
         conclusion=str(model_result),
-        return_format=str(response_format.model_json_schema()),
+        return_format=str(get_json_schema(response_format)),
     )
 
     success, raw_response = ctx.verify_llm.query_llm(
@@ -392,10 +806,16 @@ def phishing_judge_verifier(
         )
 
     keywords_1 = (
-        ctx.think.replace("，", ",").split("关键词有**", 1)[1].split("**", 1)[0].split(",")
+        ctx.think.replace("，", ",")
+        .split("关键词有**", 1)[1]
+        .split("**", 1)[0]
+        .split(",")
     )
     keywords_2 = (
-        explanation.replace("，", ",").split("关键词有**", 1)[1].split("**", 1)[0].split(",")
+        explanation.replace("，", ",")
+        .split("关键词有**", 1)[1]
+        .split("**", 1)[0]
+        .split(",")
     )
 
     if keywords_1 == keywords_2:
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from hop_engine.callers.response_cache import (
+    PendingCacheWrites,
+    ResponseCache,
+    defer_cache_writes,
+    pending_cache_writes,
+)
+from hop_engine.config.constants import HopStatus
+from hop_engine.config.model_config import ModelConfig
+from hop_engine.processors.hop_processor import HopProc
+
+ANSWER = '{"explanation": "e", "final_answer": "x"}'
+VERIFY_OK = '{"explanation": "e", "final_answer": "OK"}'
+VERIFY_FAIL = '{"explanation": "e", "final_answer": "FAIL"}'
+
+
+class _ScriptedServer(BaseHTTPRequestHandler):
+    """OpenAI 兼容的 mock 服务，按顺序返回 script 中的内容"""
+
+    protocol_version = "HTTP/1.1"
+    script = []
+    requests = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests += 1
+        response = {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": self.script.pop(0)},
+                }
+            ],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        }
+        data = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ScriptedServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def proc(base_url, tmp_path):
+    def create(hop_retry):
+        # 仅生成模型开启缓存，核验响应不写入缓存，便于检查生成结果是否被缓存
+        run_config = ModelConfig(
+            model="m",
+            openai_api_key="k",
+            openai_base_url=base_url,
+            inference_engine="siliconflow",
+            temperature=0,
+            cache_enabled=True,
+            cache_path=str(tmp_path / "cache.db"),
+        )
+        verify_config = ModelConfig(
+            model="m",
+            openai_api_key="k",
+            openai_base_url=base_url,
+            inference_engine="siliconflow",
+        )
+        return HopProc(run_config, verify_config, hop_retry=hop_retry)
+
+    _ScriptedServer.requests = 0
+    return create
+
+
+def _run(proc, use_async):
+    if use_async:
+        return asyncio.run(proc.hop_get_async("t", "c", return_format=str))
+    return proc.hop_get("t", "c", return_format=str)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_failed_verification_is_not_cached(proc, use_async):
+    hop = proc(hop_retry=1)
+    _ScriptedServer.script = [ANSWER, VERIFY_FAIL]
+    # 最终核验失败时算子抛出异常
+    with pytest.raises(ValueError, match="Operator failed"):
+        _run(hop, use_async)
+    assert hop.run_llm.cache.stats()["memory_entries"] == 0
+    # 相同请求不会命中核验失败的答案，重新生成
+    _ScriptedServer.script = [ANSWER, VERIFY_OK]
+    assert _run(hop, use_async) == (HopStatus.OK, "x")
+    assert _ScriptedServer.requests == 4
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_retry_after_failed_verification_regenerates(proc, use_async):
+    hop = proc(hop_retry=2)
+    _ScriptedServer.script = [ANSWER, VERIFY_FAIL, ANSWER, VERIFY_OK]
+    assert _run(hop, use_async) == (HopStatus.OK, "x")
+    assert _ScriptedServer.requests == 4
+    assert hop.run_llm.cache.stats()["memory_entries"] == 1
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_verified_answer_is_committed(proc, use_async):
+    hop = proc(hop_retry=1)
+    _ScriptedServer.script = [ANSWER, VERIFY_OK]
+    assert _run(hop, use_async) == (HopStatus.OK, "x")
+    assert hop.run_llm.cache.stats()["memory_entries"] == 1
+    # 再次调用时生成命中缓存，只发起核验请求
+    _ScriptedServer.script = [VERIFY_OK]
+    assert _run(hop, use_async) == (HopStatus.OK, "x")
+    assert _ScriptedServer.requests == 3
+
+
+def test_pending_writes_commit_and_discard():
+    cache = ResponseCache()
+    assert pending_cache_writes() is None
+    with defer_cache_writes() as pending:
+        assert pending_cache_writes() is pending
+        pending.add(cache, "a", ["1"])
+        assert cache.get("a") is None
+    pending.discard()
+    pending.commit()
+    assert cache.get("a") is None
+
+    pending = PendingCacheWrites()
+    pending.add(cache, "b", ["2"])
+    pending.commit()
+    assert cache.get("b") == ["2"]
+
+
+@pytest.mark.parametrize("outer_ok", [False, True])
+def test_nested_commit_waits_for_outer(outer_ok):
+    cache = ResponseCache()
+    with defer_cache_writes() as outer:
+        with defer_cache_writes() as inner:
+            pending_cache_writes().add(cache, "inner", ["1"])
+        inner.commit()
+        assert pending_cache_writes() is outer
+        assert cache.get("inner") is None
+    if outer_ok:
+        outer.commit()
+        assert cache.get("inner") == ["1"]
+    else:
+        outer.discard()
+        assert cache.get("inner") is None
@@ -0,0 +1,43 @@
+import asyncio
+
+from hop_engine.callers.async_llm import AsyncLLM
+from hop_engine.callers.client_pool import ClientPool
+from hop_engine.callers.llm import LLM
+
+
+def _lookups(base_url, is_async):
+    return [
+        stats["lookups"]
+        for stats in ClientPool.get_stats(base_url)
+        if stats["async"] is is_async
+    ]
+
+
+def test_sync_lookups_count_every_request():
+    base_url = "http://pool-sync.test/v1"
+    first = LLM(model="m", base_url=base_url)
+    second = LLM(model="m", base_url=base_url)
+    client = first._create_client()
+    assert first._create_client() is client
+    assert second._create_client() is client
+    assert _lookups(base_url, False) == [3]
+    ClientPool.close_all()
+    assert _lookups(base_url, False) == []
+
+
+def test_async_lookups_count_every_request():
+    base_url = "http://pool-async.test/v1"
+
+    async def run():
+        first = AsyncLLM(model="m", base_url=base_url)
+        second = AsyncLLM(model="m", base_url=base_url)
+        client = first._create_client()
+        assert first._create_client() is client
+        assert second._create_client() is client
+        lookups = _lookups(base_url, True)
+        await ClientPool.aclose_async_clients()
+        return lookups
+
+    # 与同步客户端口径一致：每次请求计一次，而不是每个实例一次
+    assert asyncio.run(run()) == [3]
+    assert _lookups(base_url, True) == []
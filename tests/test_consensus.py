@@ -0,0 +1,121 @@
+import asyncio
+import threading
+from itertools import product
+
+import pytest
+
+from hop_engine.config.constants import HopStatus
+from hop_engine.validators import result_validators
+from hop_engine.validators.result_validators import (
+    CONSENSUS_STATUS_MAPPING,
+    ConsensusConfig,
+    _collect_consensus,
+    _collect_consensus_async,
+    _consensus_status,
+    _settled_status,
+)
+
+
+def _outcomes(matches, misses, remaining):
+    """逐一枚举剩余采样匹配 / 不匹配 / 调用失败的全部组合下的最终状态"""
+    statuses = set()
+    for rest in product(("match", "miss", "fail"), repeat=remaining):
+        extra_matches, extra_misses = rest.count("match"), rest.count("miss")
+        statuses.add(
+            _consensus_status(
+                matches + extra_matches,
+                matches + extra_matches + misses + extra_misses,
+                CONSENSUS_STATUS_MAPPING,
+            )
+        )
+    return statuses
+
+
+@pytest.mark.parametrize("samples", [1, 3, 5, 7])
+def test_settled_status_only_when_every_outcome_agrees(samples):
+    for done in range(samples + 1):
+        remaining = samples - done
+        for matches in range(done + 1):
+            for misses in range(done - matches + 1):
+                outcomes = _outcomes(matches, misses, remaining)
+                settled = _settled_status(
+                    matches, misses, remaining, CONSENSUS_STATUS_MAPPING
+                )
+                if len(outcomes) == 1:
+                    assert settled == outcomes.pop()
+                else:
+                    assert settled is None
+
+
+def test_settled_status_examples():
+    mapping = CONSENSUS_STATUS_MAPPING
+    # 5 次采样 3 次匹配：剩余 2 次全部失败时为 3/3，否则可能为 3/5
+    assert _settled_status(3, 0, 2, mapping) is None
+    assert _settled_status(4, 0, 1, mapping) == HopStatus.OK
+    assert _settled_status(0, 3, 2, mapping) is None
+    assert _settled_status(0, 4, 1, mapping) == HopStatus.FAIL
+
+
+def _sampler(results):
+    calls = []
+
+    def sample(attempt):
+        calls.append(threading.current_thread())
+        return results[attempt]
+
+    return sample, calls
+
+
+def _is_match(result):
+    return result == "a"
+
+
+@pytest.mark.parametrize(
+    "results, early_stop, expected_status, expected_calls",
+    [
+        (["a", "a", "a", "a", "b"], True, HopStatus.OK, 4),
+        (["a", "a", "a", "a", "b"], False, HopStatus.OK, 5),
+        (["b", "b", "b", "b", "a"], True, HopStatus.FAIL, 4),
+        (["a", "b", "a", "b", "a"], True, HopStatus.UNCERTAIN, 4),
+        ([None, None, "a", "a", "b"], True, HopStatus.UNCERTAIN, 5),
+    ],
+)
+def test_collect_consensus_stops_at_settled_vote(
+    results, early_stop, expected_status, expected_calls
+):
+    config = ConsensusConfig(samples=5, early_stop=early_stop, max_in_flight=1)
+    sample, calls = _sampler(results)
+    result = _collect_consensus(sample, _is_match, config, "核验")
+    assert result.status == expected_status
+    assert len(calls) == expected_calls
+
+    async def sample_async(attempt):
+        return sample(attempt)
+
+    calls.clear()
+    result = asyncio.run(
+        _collect_consensus_async(sample_async, _is_match, config, "核验")
+    )
+    assert result.status == expected_status
+    assert len(calls) == expected_calls
+
+
+def test_collect_consensus_runs_on_caller_thread_when_pool_is_full(monkeypatch):
+    monkeypatch.setattr(result_validators, "_sample_slots", threading.Semaphore(0))
+    sample, calls = _sampler(["a", "a", "a"])
+    result = _collect_consensus(sample, _is_match, ConsensusConfig(samples=3), "核验")
+    assert result.status == HopStatus.OK
+    assert calls == [threading.current_thread()] * 3
+
+
+def test_collect_consensus_releases_pool_slots():
+    sample, _ = _sampler(["a"] * 5)
+    for _ in range(3):
+        _collect_consensus(sample, _is_match, ConsensusConfig(samples=5), "核验")
+    slots = result_validators._sample_slots
+    acquired = 0
+    while slots.acquire(blocking=False):
+        acquired += 1
+    for _ in range(acquired):
+        slots.release()
+    assert acquired == result_validators.SAMPLE_EXECUTOR_WORKERS
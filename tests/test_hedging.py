@@ -0,0 +1,53 @@
+import asyncio
+
+from hop_engine.callers.async_llm import AsyncLLM
+from hop_engine.callers.hedging import HedgePolicy
+
+
+def test_no_hedge_until_min_samples():
+    policy = HedgePolicy(min_samples=5, min_delay=0)
+    for _ in range(4):
+        policy.record(1.0)
+    assert policy.delay() is None
+    policy.record(1.0)
+    assert policy.delay() == 1.0
+
+
+def test_delay_is_refreshed_every_interval():
+    policy = HedgePolicy(percentile=50, min_samples=2, min_delay=0, refresh_interval=3)
+    policy.record(1.0)
+    policy.record(1.0)
+    assert policy.delay() == 1.0
+    # 未满 refresh_interval 个新样本时沿用缓存的分位数
+    policy.record(9.0)
+    policy.record(9.0)
+    assert policy.delay() == 1.0
+    policy.record(9.0)
+    assert policy.delay() == 9.0
+
+
+def test_delay_respects_min_delay():
+    policy = HedgePolicy(min_samples=1, min_delay=0.5)
+    policy.record(0.01)
+    assert policy.delay() == 0.5
+
+
+def test_async_hedge_records_end_to_end_latency_when_hedge_wins():
+    policy = HedgePolicy(min_samples=1, min_delay=0.05, refresh_interval=1)
+    policy.record(0.05)
+    llm = AsyncLLM(model="m", base_url="http://llm.test/v1", hedge=policy)
+    calls = []
+
+    async def send_once(messages, params, use_parse, base_url, tried):
+        calls.append(base_url)
+        # 主请求很慢，对冲请求立即返回
+        await asyncio.sleep(5 if len(calls) == 1 else 0)
+        return "hedge"
+
+    llm._send_once = send_once
+    recorded = []
+    policy.record = recorded.append
+    assert asyncio.run(llm._send([], {}, False, set())) == "hedge"
+    assert len(calls) == 2
+    # 记录的是主请求发出后的端到端耗时，而不是对冲请求自身的耗时
+    assert len(recorded) == 1 and 0.05 <= recorded[0] < 5
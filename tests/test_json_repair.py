@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from hop_engine.processors.hop_processor import HopProc
+from hop_engine.utils.status_recorder import OperatorMetrics
+from hop_engine.utils.utils import (
+    JSONPayloadError,
+    _repair_json_text,
+    create_response_format_model,
+    repair_json_parse,
+)
+
+IntAnswer = create_response_format_model("IntAnswer", (int, ...))
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+        ('{"a": True, "b": False, "c": None}', {"a": True, "b": False, "c": None}),
+        ("{'a': 'it\\'s', 'b': \"x\"}", {"a": "it's", "b": "x"}),
+        ("{'a': 'say \"hi\"'}", {"a": 'say "hi"'}),
+        # 字符串内的内容保持原样
+        ('{"a": "True, None,]"}', {"a": "True, None,]"}),
+    ],
+)
+def test_repair_json_text(text, expected):
+    assert json.loads(_repair_json_text(text)) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"explanation": "被截断的解',
+        '{"explanation": "e", "final_answer": [1, 2',
+        '{"explanation": "e", "final_answer":',
+    ],
+)
+def test_truncated_output_is_not_completed(text):
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(_repair_json_text(text))
+    with pytest.raises(JSONPayloadError):
+        repair_json_parse(text, IntAnswer)
+
+
+@pytest.fixture
+def metrics():
+    token = OperatorMetrics.reset_metrics()
+    yield OperatorMetrics.get_metrics
+    OperatorMetrics.restore_metrics(token)
+
+
+def test_parse_structured_repairs_malformed_json(metrics):
+    parsed = HopProc._parse_structured(
+        "```json\n{'explanation': 'e', 'final_answer': 3,}\n```", IntAnswer
+    )
+    assert parsed.final_answer == 3
+    assert metrics().get("json_repaired") == 1
+
+
+def test_parse_structured_does_not_repair_schema_errors(metrics):
+    with pytest.raises(ValueError) as raised:
+        HopProc._parse_structured(
+            '{"explanation": "e", "final_answer": "three"}', IntAnswer
+        )
+    assert not isinstance(raised.value, JSONPayloadError)
+    assert "json_repaired" not in metrics()
+    assert "json_retried" not in metrics()
+
+
+def test_parse_structured_retries_truncated_output(metrics):
+    with pytest.raises(JSONPayloadError):
+        HopProc._parse_structured('{"explanation": "e", "final_answer": 3', IntAnswer)
+    assert metrics().get("json_retried") == 1
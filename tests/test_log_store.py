@@ -0,0 +1,41 @@
+from hop_engine.utils.log_store import FunctionLogStore
+
+
+def test_bounded_by_entries_and_bytes():
+    store = FunctionLogStore(max_entries=3, max_bytes=1024)
+    store.extend("f", [("OK", str(i)) for i in range(5)])
+    assert store.logs("f") == ["2", "3", "4"]
+    assert store.stats()["evicted"] == 2
+
+    store = FunctionLogStore(max_entries=100, max_bytes=10)
+    store.append("f", "OK", "x" * 6)
+    store.append("f", "OK", "y" * 6)
+    assert store.logs("f") == ["y" * 6]
+    # 单条超过字节上限时仍保留最新一条
+    store.append("f", "OK", "z" * 20)
+    assert store.logs("f") == ["z" * 20]
+
+
+def test_query_by_function_and_limit():
+    store = FunctionLogStore()
+    store.append("a", "OK", "a1")
+    store.extend("b", [("OK", "b1"), ("FAIL", "b2")])
+    assert [r["log"] for r in store.query("b")] == ["b1", "b2"]
+    assert [r["log"] for r in store.query(limit=1)] == ["b2"]
+    assert store.query("a")[0]["status"] == "OK"
+
+
+def test_spill_appends_batches_to_jsonl(tmp_path):
+    path = str(tmp_path / "logs" / "function_log.jsonl")
+    store = FunctionLogStore(max_entries=1, spill_path=path)
+    store.extend("f", [("OK", "1"), ("FAIL", "2")])
+    store.append("g", "OK", "3")
+    # 内存只保留 1 条，落盘文件保留全部
+    assert store.logs("g") == ["3"]
+    spilled = FunctionLogStore.query_spill(path=path)
+    assert [r["log"] for r in spilled] == ["1", "2", "3"]
+    assert [r["log"] for r in FunctionLogStore.query_spill("f", path=path)] == [
+        "1",
+        "2",
+    ]
+    assert FunctionLogStore.query_spill(path=str(tmp_path / "missing.jsonl")) == []
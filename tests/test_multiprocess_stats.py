@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from hop_engine.config.constants import HopStatus
+from hop_engine.utils import multiprocess_stats
+from hop_engine.utils.multiprocess_stats import (
+    _HEADER,
+    _SnapshotFile,
+    _read_snapshot,
+    aggregate_stats,
+    compact,
+    disable_multiprocess,
+    enable_multiprocess,
+)
+from hop_engine.utils.status_recorder import ExecutionStats
+
+
+def _record(stats: ExecutionStats, calls: int) -> None:
+    for _ in range(calls):
+        stats.record_operator("op", HopStatus.OK, {"final_result": ""}, 0.1, 0)
+
+
+def test_snapshot_file_round_trip_and_grow(tmp_path):
+    snapshot_file = _SnapshotFile(str(tmp_path / "a.hopstats"), capacity=64)
+    try:
+        snapshot_file.write(b'{"n": 1}')
+        assert _read_snapshot(snapshot_file.path) == {"n": 1}
+        # 超过初始容量时扩容，读取方仍拿到完整快照
+        payload = {"items": list(range(100))}
+        snapshot_file.write(json.dumps(payload).encode("utf-8"))
+        assert _read_snapshot(snapshot_file.path) == payload
+    finally:
+        snapshot_file.close()
+
+
+def test_read_snapshot_skips_write_in_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(multiprocess_stats, "_READ_ATTEMPTS", 2)
+    monkeypatch.setattr(multiprocess_stats, "_READ_RETRY_DELAY", 0)
+    snapshot_file = _SnapshotFile(str(tmp_path / "a.hopstats"))
+    try:
+        assert _read_snapshot(snapshot_file.path) is None  # 尚未写入
+        snapshot_file.write(b'{"n": 1}')
+        # 序号为奇数表示写入中
+        _HEADER.pack_into(snapshot_file._mmap, 0, 3, 0)
+        assert _read_snapshot(snapshot_file.path) is None
+    finally:
+        snapshot_file.close()
+    assert _read_snapshot(str(tmp_path / "missing.hopstats")) is None
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "fork") or multiprocess_stats.fcntl is None,
+    reason="需要 fork 与 fcntl",
+)
+def test_forked_child_does_not_double_count(tmp_path):
+    directory = str(tmp_path)
+    stats = ExecutionStats()
+    writer = enable_multiprocess(directory, stats, flush_interval=60)
+    try:
+        _record(stats, 3)
+        writer.flush()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                # fork 钩子已清零继承的统计并切换到子进程自己的快照文件
+                _record(stats, 2)
+                code = 0 if stats.get_operator_stats("op")["calls"] == 2 else 2
+                disable_multiprocess()
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        writer.flush()
+        assert aggregate_stats(directory).get_operator_stats("op")["calls"] == 5
+        # 子进程已退出，其快照并入归档；父进程的文件锁未被子进程释放，不会被归档
+        assert compact(directory) == 1
+        assert os.path.exists(writer.path)
+        assert aggregate_stats(directory).get_operator_stats("op")["calls"] == 5
+    finally:
+        disable_multiprocess()
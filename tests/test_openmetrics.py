@@ -0,0 +1,109 @@
+import urllib.request
+
+import pytest
+
+from hop_engine.config.constants import HopStatus
+from hop_engine.utils.openmetrics import (
+    OPENMETRICS_CONTENT_TYPE,
+    PROMETHEUS_CONTENT_TYPE,
+    render_openmetrics,
+    start_metrics_server,
+)
+from hop_engine.utils.status_recorder import USAGE_FIELDS, ExecutionStats
+
+
+def _usage(phase, **values):
+    record = {field: 0 for field in USAGE_FIELDS}
+    record.update(values, phase=phase, attempt=1)
+    return record
+
+
+@pytest.fixture
+def stats():
+    stats = ExecutionStats()
+    stats.record_operator(
+        'say "hi"',
+        HopStatus.OK,
+        {"final_result": ""},
+        0.2,
+        0,
+        metrics={"llm_cache_hits": 1},
+        token_usage=[
+            _usage("generation", llm_calls=1, prompt_tokens=10, completion_tokens=4)
+        ],
+    )
+    stats.record_operator("op", HopStatus.FAIL, {"final_result": ""}, 3.0, 2)
+    stats.record_function("func", 1.5, [(HopStatus.OK, "log")])
+    return stats
+
+
+def _samples(text):
+    return dict(
+        line.rsplit(" ", 1) for line in text.splitlines() if line and line[0] != "#"
+    )
+
+
+def test_render_openmetrics_counters_and_histograms(stats):
+    text = render_openmetrics(stats, buckets=(0.1, 1, 5))
+    samples = _samples(text)
+    assert text.endswith("# EOF\n")
+    assert "# TYPE hop_operator_calls counter" in text
+    assert "# UNIT hop_operator_duration_seconds seconds" in text
+    # 标签值中的引号需转义
+    assert (
+        samples['hop_operator_calls_total{operator="say \\"hi\\"",outcome="success"}']
+        == "1"
+    )
+    assert samples['hop_operator_calls_total{operator="op",outcome="error"}'] == "1"
+    assert samples['hop_operator_retries_total{operator="op"}'] == "2"
+    assert (
+        samples[
+            'hop_operator_tokens_total{operator="say \\"hi\\"",phase="generation",type="prompt"}'
+        ]
+        == "10"
+    )
+    assert (
+        samples[
+            'hop_operator_metric_total{operator="say \\"hi\\"",metric="llm_cache_hits"}'
+        ]
+        == "1"
+    )
+    buckets = [
+        samples[f'hop_operator_duration_seconds_bucket{{operator="op",le="{le}"}}']
+        for le in ("0.1", "1.0", "5.0", "+Inf")
+    ]
+    assert buckets == ["0", "0", "1", "1"]
+    assert samples['hop_operator_duration_seconds_count{operator="op"}'] == "1"
+    assert samples['hop_operator_duration_seconds_sum{operator="op"}'] == "3"
+    assert samples['hop_function_calls_total{function="func",outcome="success"}'] == "1"
+    assert samples['hop_function_duration_seconds_count{function="func"}'] == "1"
+
+
+def test_render_prometheus_text_format(stats):
+    text = render_openmetrics(stats, prefix="svc", openmetrics=False)
+    assert "# TYPE svc_operator_calls_total counter" in text
+    assert "# UNIT" not in text
+    assert "# EOF" not in text
+    assert 'svc_operator_calls_total{operator="op",outcome="error"} 1' in text
+
+
+def test_render_empty_stats():
+    assert render_openmetrics(ExecutionStats()).splitlines()[-1] == "# EOF"
+
+
+def test_metrics_server_negotiates_format(stats):
+    server = start_metrics_server(port=0, stats=stats)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        request = urllib.request.Request(
+            url, headers={"Accept": "application/openmetrics-text"}
+        )
+        with urllib.request.urlopen(request) as response:
+            assert response.headers["Content-Type"] == OPENMETRICS_CONTENT_TYPE
+            assert response.read().decode("utf-8").endswith("# EOF\n")
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"] == PROMETHEUS_CONTENT_TYPE
+            assert "# EOF" not in response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import pytest
+
+from hop_engine.config.constants import RETRY_CONTINUE, RETRY_REBUILD
+from hop_engine.processors.hop_processor import HopProc
+from hop_engine.utils.status_recorder import OperatorMetrics, TokenUsageRecorder
+
+
+def _usage(prompt_tokens, cached_tokens=None):
+    details = (
+        None if cached_tokens is None else SimpleNamespace(cached_tokens=cached_tokens)
+    )
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=5,
+        completion_tokens_details=None,
+        prompt_tokens_details=details,
+    )
+
+
+@pytest.fixture(autouse=True)
+def scope():
+    usage_token = TokenUsageRecorder.reset_usage()
+    metrics_token = OperatorMetrics.reset_metrics()
+    yield
+    OperatorMetrics.restore_metrics(metrics_token)
+    TokenUsageRecorder.restore_usage(usage_token)
+
+
+def _saved(retry_mode, attempt, *usages):
+    TokenUsageRecorder.record_usage(_usage(1000, 0), 0.1)  # 之前的调用不计入
+    mark = TokenUsageRecorder.usage_mark()
+    for usage in usages:
+        TokenUsageRecorder.record_usage(usage, 0.1)
+    HopProc._track_prefix_reuse(SimpleNamespace(retry_mode=retry_mode), attempt, mark)
+    return OperatorMetrics.get_metrics().get("retry_prompt_tokens_saved")
+
+
+def test_counts_reported_cached_tokens_on_retry():
+    assert _saved(RETRY_CONTINUE, 2, _usage(1200, 960)) == 960
+
+
+def test_unreported_cached_tokens_are_not_estimated():
+    assert _saved(RETRY_CONTINUE, 2, _usage(1200)) is None
+    assert TokenUsageRecorder.reported_cached_tokens(0) == 0
+
+
+def test_zero_cached_tokens_saves_nothing():
+    assert _saved(RETRY_CONTINUE, 2, _usage(1200, 0)) is None
+
+
+def test_no_usage_from_cache_hit_saves_nothing():
+    assert _saved(RETRY_CONTINUE, 2) is None
+
+
+def test_first_attempt_and_rebuild_mode_are_not_counted():
+    assert _saved(RETRY_CONTINUE, 1, _usage(1200, 960)) is None
+    assert _saved(RETRY_REBUILD, 2, _usage(1200, 960)) is None
@@ -0,0 +1,89 @@
+import json
+import random
+
+import pytest
+
+from hop_engine.utils.quantile_sketch import QuantileSketch, RingBuffer
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(0, 1.5) for _ in range(20000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    for q in (0.01, 0.5, 0.95, 0.99):
+        assert sketch.quantile(q) == pytest.approx(_exact(values, q), rel=0.011)
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(sum(values) / len(values))
+    assert sketch.quantile(0) == pytest.approx(min(values), rel=0.011)
+    assert sketch.quantile(1) == pytest.approx(max(values), rel=0.011)
+
+
+def test_empty_and_zero_samples():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+    assert sketch.mean == 0.0
+    for value in [0, 0, 0, 5]:
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1) == 5
+
+
+def test_merge_matches_single_sketch():
+    rng = random.Random(11)
+    values = [rng.expovariate(1.0) for _ in range(5000)]
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i % 2 else right).add(value)
+    left.merge(right)
+    assert left.count == whole.count
+    assert left.min == whole.min and left.max == whole.max
+    for q in (0.5, 0.9, 0.99):
+        assert left.quantile(q) == whole.quantile(q)
+
+
+def test_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def test_max_bins_bounds_memory_and_keeps_high_quantiles():
+    sketch = QuantileSketch(max_bins=64)
+    values = [1.01**i for i in range(2000)]
+    for value in values:
+        sketch.add(value)
+    assert len(sketch._bins) <= 64
+    assert sketch.quantile(0.99) == pytest.approx(_exact(values, 0.99), rel=0.011)
+
+
+def test_cumulative_counts():
+    sketch = QuantileSketch()
+    for value in [0, 0.05, 0.2, 0.2, 3, 12]:
+        sketch.add(value)
+    assert sketch.cumulative_counts([0.1, 1, 10, 100]) == [2, 4, 5, 6]
+
+
+def test_dict_round_trip():
+    sketch = QuantileSketch()
+    for value in [0, 0.3, 1.5, 7]:
+        sketch.add(value)
+    restored = QuantileSketch.from_dict(json.loads(json.dumps(sketch.to_dict())))
+    assert restored.to_dict() == sketch.to_dict()
+    assert restored.quantile(0.5) == sketch.quantile(0.5)
+    empty = QuantileSketch.from_dict(QuantileSketch().to_dict())
+    assert empty.count == 0 and empty.quantile(0.5) is None
+
+
+def test_ring_buffer_keeps_latest():
+    buffer = RingBuffer(3)
+    buffer.extend(range(5))
+    buffer.append(5)
+    assert buffer.values() == [3, 4, 5]
+    assert len(buffer) == 3
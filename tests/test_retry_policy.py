@@ -0,0 +1,88 @@
+import time
+
+import httpx
+import openai
+import pytest
+
+from hop_engine.callers.retry_policy import (
+    ERROR_CONNECTION,
+    ERROR_FATAL,
+    ERROR_RATE_LIMIT,
+    ERROR_SERVER,
+    ERROR_TIMEOUT,
+    RetryPolicy,
+    classify_error,
+    retry_after,
+)
+
+REQUEST = httpx.Request("POST", "http://llm.test/v1/chat/completions")
+
+
+def _status_error(status_code: int, headers=None) -> openai.APIStatusError:
+    response = httpx.Response(status_code, headers=headers, request=REQUEST)
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (
+            openai.RateLimitError(
+                "limited",
+                response=httpx.Response(429, request=REQUEST),
+                body=None,
+            ),
+            ERROR_RATE_LIMIT,
+        ),
+        (openai.APITimeoutError(REQUEST), ERROR_TIMEOUT),
+        (httpx.ReadTimeout("timeout"), ERROR_TIMEOUT),
+        (openai.APIConnectionError(request=REQUEST), ERROR_CONNECTION),
+        (httpx.ConnectError("refused"), ERROR_CONNECTION),
+        (_status_error(408), ERROR_TIMEOUT),
+        (_status_error(429), ERROR_RATE_LIMIT),
+        (_status_error(503), ERROR_SERVER),
+        (_status_error(400), ERROR_FATAL),
+        (_status_error(401), ERROR_FATAL),
+        (ValueError("解析失败"), ERROR_FATAL),
+    ],
+)
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+def test_retry_after_headers():
+    assert retry_after(_status_error(429, {"retry-after": "2"})) == 2.0
+    assert retry_after(_status_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after(_status_error(429, {"retry-after": "soon"})) is None
+    assert retry_after(_status_error(429)) is None
+    assert retry_after(ValueError()) is None
+
+
+def test_next_delay_skips_fatal_and_last_attempt():
+    policy = RetryPolicy(max_attempts=3)
+    start = time.monotonic()
+    error = _status_error(400)
+    assert policy.next_delay(error, ERROR_FATAL, 0, start) is None
+    error = _status_error(503)
+    assert policy.next_delay(error, ERROR_SERVER, 2, start) is None
+    assert policy.next_delay(error, ERROR_SERVER, 1, start) is not None
+
+
+def test_next_delay_is_bounded_exponential_backoff():
+    policy = RetryPolicy(max_attempts=10, base_delay=0.5, max_delay=2.0)
+    start = time.monotonic()
+    error = _status_error(503)
+    for attempt, cap in [(0, 0.5), (1, 1.0), (2, 2.0), (5, 2.0)]:
+        for _ in range(50):
+            delay = policy.next_delay(error, ERROR_SERVER, attempt, start)
+            assert 0 <= delay <= cap
+
+
+def test_next_delay_prefers_retry_after_and_respects_deadline():
+    error = _status_error(429, {"retry-after": "5"})
+    start = time.monotonic()
+    # Retry-After 不受 max_delay 限制
+    assert RetryPolicy(max_delay=1.0).next_delay(error, ERROR_RATE_LIMIT, 0, start) == 5
+    # 等待会超过截止时间时不再重试
+    policy = RetryPolicy(deadline=3.0)
+    assert policy.next_delay(error, ERROR_RATE_LIMIT, 0, start) is None
@@ -0,0 +1,88 @@
+from hop_engine.utils.trace_export import (
+    critical_path,
+    format_critical_path,
+    to_chrome_trace,
+)
+from hop_engine.utils.tracing import Span
+
+
+def _span(name, parent, start, end, **attributes):
+    span = Span(name, parent, attributes)
+    span.start_time = start
+    span.end_time = end
+    return span
+
+
+def _operator_spans():
+    """operator 0-10s：generation 0-4s，随后两个并行核验 4-9s / 4-6s"""
+    root = _span("operator", None, 0.0, 10.0)
+    generation = _span("generation", root, 0.0, 4.0)
+    llm = _span("llm", generation, 0.5, 3.5)
+    slow = _span("verify", root, 4.0, 9.0, verifier="slow")
+    fast = _span("verify", root, 4.0, 6.0, verifier="fast")
+    return [root, generation, llm, slow, fast]
+
+
+def test_critical_path_follows_latest_finishing_children():
+    spans = _operator_spans()
+    root, generation, llm, slow, fast = spans
+    path = critical_path(spans)
+    assert [span for span, _ in path] == [root, generation, llm, slow]
+    self_times = {
+        span.name + span.attributes.get("verifier", ""): t for span, t in path
+    }
+    # root 自身耗时 = 10 - 4 - 5，generation 自身耗时 = 4 - 3
+    assert self_times["operator"] == 1.0
+    assert self_times["generation"] == 1.0
+    assert self_times["llm"] == 3.0
+    assert self_times["verifyslow"] == 5.0
+    assert fast not in [span for span, _ in path]
+
+
+def test_critical_path_picks_longest_root():
+    short = _span("short", None, 0.0, 1.0)
+    long = _span("long", None, 0.0, 5.0)
+    assert critical_path([short, long])[0][0] is long
+    assert critical_path([]) == []
+
+
+def test_format_critical_path_summary():
+    summary = format_critical_path(_operator_spans(), top_n=2)
+    lines = summary.splitlines()
+    assert "总耗时 10.000s" in lines[0]
+    assert "关键路径上 4 个 span" in lines[0]
+    # 叶子 span：llm 3s + 两个核验 5s、2s
+    assert "叶子 span 耗时合计 10.000s" in lines[0]
+    assert len(lines) == 4
+    assert "verify[slow]" in lines[2]
+    assert format_critical_path([]) == "没有可分析的 span"
+
+
+def test_to_chrome_trace_events():
+    spans = _operator_spans()
+    trace = to_chrome_trace(spans)
+    complete = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+    assert len(complete) == len(spans)
+    by_name = {event["name"]: event for event in complete}
+    assert by_name["operator"]["ts"] == 0
+    assert by_name["llm"]["ts"] == 0.5e6
+    assert by_name["llm"]["dur"] == 3e6
+    # 同一线程上的父子 span 不画 flow 箭头
+    assert not [event for event in trace["traceEvents"] if event["ph"] in "sf"]
+
+
+def test_to_chrome_trace_links_spans_across_tracks():
+    root = _span("operator", None, 0.0, 2.0)
+    child = _span("llm", root, 0.5, 1.5)
+    child.thread_id, child.thread_name = -1, "worker"
+    trace = to_chrome_trace([root, child])
+    flows = [event for event in trace["traceEvents"] if event["ph"] in "sf"]
+    assert [event["ph"] for event in flows] == ["s", "f"]
+    assert flows[0]["tid"] != flows[1]["tid"]
+    names = [
+        event["args"]["name"]
+        for event in trace["traceEvents"]
+        if event["ph"] == "M" and event["name"] == "thread_name"
+    ]
+    assert "worker" in names
+    assert to_chrome_trace([]) == {"traceEvents": [], "displayTimeUnit": "ms"}